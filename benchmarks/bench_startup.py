@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Measure CLI start-up cost: wall time of ``main.py --help`` and import time per module.
+
+Usage::
+
+    python benchmarks/bench_startup.py --runs 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def time_command(command: Sequence[str], runs: int) -> List[float]:
+    durations: List[float] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, check=True)
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def slowest_imports(limit: int) -> List[Tuple[int, str]]:
+    """Return ``(cumulative microseconds, module)`` pairs reported by ``-X importtime``."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import paper_review.cli"],
+        cwd=REPO_ROOT,
+        stderr=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        text=True,
+        check=True,
+    )
+    rows: List[Tuple[int, str]] = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|", 2)
+        rows.append((int(cumulative.strip()), module.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CLI 启动耗时基准")
+    parser.add_argument("--runs", type=int, default=10, help="每项测量的重复次数。")
+    parser.add_argument("--top", type=int, default=15, help="列出耗时最多的模块数量。")
+    args = parser.parse_args()
+
+    baseline = time_command([sys.executable, "-c", "pass"], args.runs)
+    help_run = time_command([sys.executable, "main.py", "--help"], args.runs)
+    baseline_ms = statistics.median(baseline) * 1000
+    help_ms = statistics.median(help_run) * 1000
+    print(f"python -c pass        中位数 {baseline_ms:7.1f} ms")
+    print(f"main.py --help        中位数 {help_ms:7.1f} ms")
+    print(f"CLI 额外启动开销      {help_ms - baseline_ms:7.1f} ms")
+    print("\n导入耗时最多的模块（累计，含子模块）：")
+    for cumulative, module in slowest_imports(args.top):
+        print(f"  {cumulative / 1000:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
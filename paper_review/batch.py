@@ -0,0 +1,316 @@
+"""Offline batch-API mode: write request JSONL files and ingest provider results.
+
+``prepare_batch`` writes every classification and summary request in the
+OpenAI batch input format, one line per request with a ``custom_id`` of the
+form ``"<stage>:<PaperEntry.key>"``. ``ingest_batch_results`` reads the
+provider's output JSONL, validates each answer with the same code paths as
+interactive calls and exports the review. ``simulate_batch`` stands in for
+the provider during tests.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .classification import LLMCategoryAssigner, _format_schema
+from .deadletter import STAGE_LABELS, mark_failed, write_failed_report
+from .exporters.markdown import export_markdown
+from .exporters.stats import STATS_NAME
+from .models import CategoryNode, PaperEntry
+from .serialization import (
+    paper_from_dict,
+    paper_to_dict,
+    read_json,
+    schema_from_list,
+    schema_to_list,
+    write_json,
+)
+from .summarization.deepseek import DeepSeekSummarizer
+from .text import terms
+
+BATCH_STATE_NAME = "batch_state.json"
+BATCH_ENDPOINT = "/v1/chat/completions"
+# OpenAI accepts at most 50,000 requests per batch input file.
+MAX_REQUESTS_PER_FILE = 50_000
+
+
+class BatchIngestError(ValueError):
+    """Raised when batch result files cannot be matched to the prepared state."""
+
+
+def custom_id(stage: str, paper: PaperEntry) -> str:
+    return f"{stage}:{paper.key}"
+
+
+def split_custom_id(value: str) -> Tuple[str, str]:
+    stage, _, key = value.partition(":")
+    if not key or stage not in STAGE_LABELS:
+        raise BatchIngestError(f"无法识别的 custom_id：{value}")
+    return stage, key
+
+
+def prepare_batch(
+    papers: Sequence[PaperEntry],
+    schema: Dict[str, CategoryNode],
+    assigner: LLMCategoryAssigner,
+    summarizer: DeepSeekSummarizer,
+    out_dir: Path,
+    *,
+    classify: bool = True,
+    max_requests_per_file: int = MAX_REQUESTS_PER_FILE,
+) -> List[Path]:
+    """Write batch request files plus ``batch_state.json``; return the request files."""
+    schema_text, mapping = _format_schema(schema)
+    if classify and not mapping:
+        raise ValueError("schema 中缺少大类定义，无法生成分类请求。")
+
+    def requests() -> Iterator[Dict[str, Any]]:
+        for paper in papers:
+            if classify:
+                yield _batch_line(custom_id("classify", paper), assigner.build_request(paper, schema_text))
+            yield _batch_line(custom_id("summary", paper), summarizer.build_request(paper))
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths: List[Path] = []
+    handle = None
+    written = 0
+    try:
+        for line in requests():
+            if handle is None or written >= max_requests_per_file:
+                if handle is not None:
+                    handle.close()
+                path = out_dir / f"batch_requests-{len(paths) + 1:04d}.jsonl"
+                paths.append(path)
+                handle = path.open("w", encoding="utf-8")
+                written = 0
+            handle.write(json.dumps(line, ensure_ascii=False) + "\n")
+            written += 1
+    finally:
+        if handle is not None:
+            handle.close()
+
+    write_json(
+        out_dir / BATCH_STATE_NAME,
+        {
+            "version": 1,
+            "kind": "batch_state",
+            "classify": classify,
+            "schema": schema_to_list(schema),
+            "papers": [paper_to_dict(paper) for paper in papers],
+            "request_files": [path.name for path in paths],
+        },
+    )
+    total = len(papers) * (2 if classify else 1)
+    print(f"已写出 {total} 条批量请求，共 {len(paths)} 个文件，状态文件: {out_dir / BATCH_STATE_NAME}")
+    return paths
+
+
+def ingest_batch_results(
+    state_path: Path,
+    result_paths: Sequence[Path],
+    assigner: LLMCategoryAssigner,
+    summarizer: DeepSeekSummarizer,
+    out_dir: Path,
+    *,
+    sort_by_year: str = "none",
+    write_stats: bool = False,
+) -> Path:
+    """Validate batch answers, mark missing or invalid ones, and export ``review.md``."""
+    state = read_json(state_path)
+    if not isinstance(state, dict) or state.get("kind") != "batch_state":
+        raise BatchIngestError(f"{state_path} 不是有效的批量状态文件。")
+    schema = schema_from_list(state["schema"])
+    papers = [paper_from_dict(item) for item in state["papers"]]
+    by_key = {paper.key: paper for paper in papers}
+    _, mapping = _format_schema(schema)
+
+    stages = ["classify", "summary"] if state.get("classify", True) else ["summary"]
+    pending = {(stage, paper.key) for stage in stages for paper in papers}
+    for path in result_paths:
+        for line_number, record in _read_jsonl(path):
+            try:
+                stage, key = split_custom_id(str(record.get("custom_id", "")))
+            except BatchIngestError:
+                # Foreign lines (another job's ids, hand-edited files) must not sink the rest.
+                stage, key = "", ""
+            paper = by_key.get(key)
+            if paper is None or (stage, key) not in pending:
+                print(f"⚠️ {path.name}:{line_number} 的结果 {record.get('custom_id')} 不在待处理列表中，已忽略。")
+                continue
+            pending.discard((stage, key))
+            try:
+                content = _result_content(record)
+                if stage == "classify":
+                    selection = assigner.parse_selection(content, mapping)
+                    if not assigner.apply_selection(paper, selection, mapping):
+                        print(f"⚠️ 模型未返回有效主类，已跳过：{paper.title or paper.first_author}")
+                else:
+                    paper.summary_zh = summarizer.render_content(paper, content)
+            except Exception as exc:
+                mark_failed(paper, stage, f"{type(exc).__name__}: {exc}")
+
+    for stage, key in sorted(pending):
+        mark_failed(by_key[key], stage, "批量结果中缺少该请求。")
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    failed_path = out_dir / "failed.jsonl"
+    failed = write_failed_report(papers, failed_path)
+    if failed:
+        print(f"⚠️ {failed} 篇文献的批量结果缺失或无效，清单已写入: {failed_path}")
+
+    out_md = out_dir / "review.md"
+    stats_path = out_dir / STATS_NAME if write_stats else None
+    export_markdown(papers, schema, out_md, sort_by_year=sort_by_year, stats_path=stats_path)
+    print(f"\n✅ 已导出 Markdown 到: {out_md}")
+    return out_md
+
+
+def simulate_batch(
+    request_paths: Sequence[Path],
+    results_path: Path,
+    client: Optional[Any] = None,
+) -> Path:
+    """Turn request files into a result file, like the provider's batch endpoint would.
+
+    Requests are sent to ``client`` when given; otherwise a deterministic
+    offline responder answers them, which is enough to exercise the whole
+    prepare/ingest cycle without network access.
+    """
+    responder = client if client is not None else OfflineResponder()
+    count = 0
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    with results_path.open("w", encoding="utf-8") as out:
+        for path in request_paths:
+            for _, line in _read_jsonl(path):
+                count += 1
+                record: Dict[str, Any] = {"id": f"batch_req_{count}", "custom_id": line["custom_id"]}
+                try:
+                    response = responder.chat.completions.create(**line["body"])
+                    record["response"] = {"status_code": 200, "body": _response_body(response)}
+                    record["error"] = None
+                except Exception as exc:
+                    record["response"] = None
+                    record["error"] = {"code": type(exc).__name__, "message": str(exc)}
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(f"已模拟执行 {count} 条批量请求，结果写入: {results_path}")
+    return results_path
+
+
+class _Message:
+    def __init__(self, content: str) -> None:
+        self.role = "assistant"
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, content: str) -> None:
+        self.index = 0
+        self.message = _Message(content)
+        self.finish_reason = "stop"
+
+
+class _Completion:
+    def __init__(self, model: str, content: str) -> None:
+        self.model = model
+        self.choices = [_Choice(content)]
+        self.usage = None
+
+
+class OfflineResponder:
+    """Deterministic stand-in for a chat model, used by ``batch-simulate``.
+
+    Classification prompts get the listed category sharing the most terms
+    with the paper; summary prompts get a templated sentence built from the
+    title. It exposes ``chat.completions.create`` like an SDK client.
+    """
+
+    _SCHEMA_LINE = re.compile(r"^- (.+?)：(.*)$", re.M)
+    _FIELD = re.compile(r"^(标题|摘要)：(.*)$", re.M)
+
+    def __init__(self) -> None:
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs: Any) -> _Completion:
+        prompt = str(kwargs["messages"][-1]["content"])
+        if "main_category" in prompt:
+            content = self._classify(prompt)
+        else:
+            content = self._summarize(prompt)
+        return _Completion(str(kwargs.get("model", "offline")), content)
+
+    def _classify(self, prompt: str) -> str:
+        fields = dict(self._FIELD.findall(prompt))
+        paper_terms = set(terms(fields.get("标题", "") + " " + fields.get("摘要", "")))
+
+        def score(name: str) -> int:
+            return sum(1 for term in terms(name) if term in paper_terms)
+
+        best_main, best_sub, best_score = "", "", -1
+        for main, children in self._SCHEMA_LINE.findall(prompt):
+            subs = [] if children == "无子类" else children.split("、")
+            sub = max(subs, key=score) if subs else ""
+            total = score(main) + (score(sub) if sub else 0)
+            if total > best_score:
+                best_main, best_sub, best_score = main, sub, total
+        return json.dumps({"main_category": best_main, "sub_category": best_sub}, ensure_ascii=False)
+
+    def _summarize(self, prompt: str) -> str:
+        title = dict(self._FIELD.findall(prompt)).get("标题", "").strip()
+        return json.dumps({"summary": f"围绕“{title}”开展研究。"}, ensure_ascii=False)
+
+
+def _batch_line(identifier: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    return {"custom_id": identifier, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+
+
+def _read_jsonl(path: Path) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    with path.open("r", encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise BatchIngestError(f"{path}:{line_number} 不是有效的 JSON：{exc.msg}") from exc
+
+
+def _result_content(record: Dict[str, Any]) -> str:
+    if record.get("error"):
+        error = record["error"]
+        message = error.get("message") if isinstance(error, dict) else error
+        raise BatchIngestError(f"批量请求失败：{message}")
+    response = record.get("response") or {}
+    status = response.get("status_code", 200)
+    if status != 200:
+        raise BatchIngestError(f"批量请求返回状态码 {status}。")
+    body = response.get("body") or {}
+    choices = body.get("choices") or []
+    if not choices:
+        raise BatchIngestError("批量结果中缺少 choices。")
+    return str((choices[0].get("message") or {}).get("content") or "")
+
+
+def _response_body(response: Any) -> Dict[str, Any]:
+    usage = getattr(response, "usage", None)
+    body: Dict[str, Any] = {
+        "object": "chat.completion",
+        "model": getattr(response, "model", ""),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": response.choices[0].message.content or ""},
+                "finish_reason": getattr(response.choices[0], "finish_reason", "stop"),
+            }
+        ],
+    }
+    if usage is not None:
+        body["usage"] = {
+            name: getattr(usage, name, 0)
+            for name in ("prompt_tokens", "completion_tokens", "total_tokens")
+        }
+    return body
+
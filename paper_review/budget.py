@@ -0,0 +1,162 @@
+"""Run-wide caps on LLM spend and the paper orderings used when a cap applies.
+
+:class:`BudgetedClient` wraps the shared chat-completions client and refuses
+new calls with :class:`BudgetExhausted` once ``max_requests`` calls were made
+or ``max_tokens`` tokens were used. Calls already in flight are allowed to
+finish, so the cap can be overshot by at most the concurrency level.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from .metrics import metrics
+from .models import PaperEntry
+from .text import estimate_tokens
+
+PRIORITY_POLICIES = ("input", "recent", "abstract", "categories")
+
+
+class BudgetExhausted(RuntimeError):
+    """Raised instead of issuing an LLM call once the run budget is spent."""
+
+
+class LLMBudget:
+    """Thread-safe request and token counters checked before every call."""
+
+    def __init__(self, *, max_tokens: Optional[int] = None, max_requests: Optional[int] = None) -> None:
+        self.max_tokens = max_tokens if max_tokens and max_tokens > 0 else None
+        self.max_requests = max_requests if max_requests and max_requests > 0 else None
+        self.tokens = 0
+        self.requests = 0
+        self.refused = 0
+        self._lock = threading.Lock()
+
+    @property
+    def limited(self) -> bool:
+        return self.max_tokens is not None or self.max_requests is not None
+
+    def acquire(self) -> None:
+        with self._lock:
+            exhausted = (self.max_requests is not None and self.requests >= self.max_requests) or (
+                self.max_tokens is not None and self.tokens >= self.max_tokens
+            )
+            if exhausted:
+                self.refused += 1
+            else:
+                self.requests += 1
+        if exhausted:
+            metrics.increment("budget.refused")
+            raise BudgetExhausted("LLM 调用预算已用尽。")
+
+    def charge(self, tokens: int) -> None:
+        with self._lock:
+            self.tokens += max(0, tokens)
+
+    def report_lines(self) -> List[str]:
+        if not self.limited:
+            return []
+        requests = f"{self.requests}/{self.max_requests}" if self.max_requests else str(self.requests)
+        tokens = f"{self.tokens}/{self.max_tokens}" if self.max_tokens else str(self.tokens)
+        return [f"请求 {requests}，tokens {tokens}，因预算拒绝 {self.refused} 次"]
+
+
+class _Completions:
+    def __init__(self, owner: "BudgetedClient") -> None:
+        self._owner = owner
+
+    def create(self, **kwargs: Any) -> Any:
+        return self._owner.create(**kwargs)
+
+
+class _Chat:
+    def __init__(self, owner: "BudgetedClient") -> None:
+        self.completions = _Completions(owner)
+
+
+class BudgetedClient:
+    """Charge every chat completion against an :class:`LLMBudget`."""
+
+    def __init__(self, client: Any, budget: LLMBudget) -> None:
+        self.client = client
+        self.budget = budget
+        self.chat = _Chat(self)
+
+    def create(self, **kwargs: Any) -> Any:
+        self.budget.acquire()
+        response = self.client.chat.completions.create(**kwargs)
+        prompt = sum(estimate_tokens(str(message.get("content", ""))) for message in kwargs.get("messages", []))
+        if kwargs.get("stream"):
+            return _ChargedStream(response, self.budget, prompt)
+        usage = getattr(response, "usage", None)
+        total = getattr(usage, "total_tokens", None) if usage is not None else None
+        if not isinstance(total, int):
+            total = prompt + estimate_tokens(response.choices[0].message.content or "")
+        self.budget.charge(total)
+        return response
+
+
+class _ChargedStream:
+    """Pass a stream through, charging the prompt plus the received text when it ends."""
+
+    def __init__(self, stream: Any, budget: LLMBudget, prompt_tokens: int) -> None:
+        self._stream = stream
+        self._budget = budget
+        self._prompt_tokens = prompt_tokens
+        self._received: List[str] = []
+        self._charged = False
+
+    def __iter__(self) -> Iterator[Any]:
+        try:
+            for chunk in self._stream:
+                choices = getattr(chunk, "choices", None)
+                delta = getattr(choices[0], "delta", None) if choices else None
+                text = getattr(delta, "content", None) if delta is not None else None
+                if text:
+                    self._received.append(text)
+                yield chunk
+        finally:
+            self._charge()
+
+    def close(self) -> None:
+        self._charge()
+        close = getattr(self._stream, "close", None)
+        if callable(close):
+            close()
+
+    def _charge(self) -> None:
+        if not self._charged:
+            self._charged = True
+            self._budget.charge(self._prompt_tokens + estimate_tokens("".join(self._received)))
+
+
+def skipped_summary(paper: PaperEntry) -> str:
+    title = paper.title.strip() if paper.title else ""
+    title_part = f"《{title}》" if title else ""
+    return f"{paper.first_author}等人{title_part}（调用预算已用尽，未生成摘要）"
+
+
+def prioritize(papers: Sequence[PaperEntry], policy: str) -> List[PaperEntry]:
+    """Order ``papers`` for processing; ties keep the input order."""
+    if policy == "recent":
+        return sorted(papers, key=lambda paper: -(paper.year or 0))
+    if policy == "abstract":
+        return sorted(papers, key=lambda paper: not paper.abstract.strip())
+    return list(papers)
+
+
+def interleave_by_category(papers: Sequence[PaperEntry]) -> List[PaperEntry]:
+    """Round-robin over main categories, smallest first, so thin categories get covered early."""
+    sizes = Counter(paper.main_category or "" for paper in papers)
+    queues: Dict[str, List[PaperEntry]] = {}
+    for paper in papers:
+        queues.setdefault(paper.main_category or "", []).append(paper)
+    order = sorted(queues, key=lambda name: (name == "", sizes[name]))
+    result: List[PaperEntry] = []
+    for index in range(max(sizes.values(), default=0)):
+        for name in order:
+            if index < len(queues[name]):
+                result.append(queues[name][index])
+    return result
@@ -1,18 +1,31 @@
 from __future__ import annotations
 
-import json
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from .budget import BudgetExhausted
+from .concurrency import run_concurrently
+from .deadletter import DeadLetterQueue
+from .llm.json_repair import extract_json
+from .llm.routing import record_escalation
+from .llm.streaming import complete_json
+from .metrics import metrics
 from .models import CategoryNode, PaperEntry
-from .progress import ProgressReporter
+from .progress import StageDashboard
+from .retrieval import CategoryRetriever
+from .text import budgeted_abstract, estimate_tokens, trim_to_budget
+from .trace import trace
 
 
 @dataclass(frozen=True)
 class CategorySelection:
     main: Optional[str]
     sub: Optional[str]
+    # The answer was not parseable JSON at all (as opposed to naming no known category).
+    malformed: bool = False
+    # The answer was cut off; whatever it named is not trusted.
+    truncated: bool = False
 
 
 class ClassificationFailed(RuntimeError):
@@ -26,19 +39,18 @@ class CategoryAssigner(ABC):
     def assign(self, papers: List[PaperEntry], schema: Dict[str, CategoryNode]) -> None:
         """Populate the ``main_category``/``sub_category`` fields in-place."""
 
-
-def _extract_json(payload: str) -> Optional[Dict[str, Any]]:
-    try:
-        return json.loads(payload)
-    except json.JSONDecodeError:
-        start = payload.find("{")
-        end = payload.rfind("}")
-        if start != -1 and end != -1 and start < end:
+    def assign_isolated(
+        self,
+        papers: List[PaperEntry],
+        schema: Dict[str, CategoryNode],
+        dead_letters: DeadLetterQueue,
+    ) -> None:
+        """Like :meth:`assign`, but record per-paper failures instead of raising."""
+        for paper in papers:
             try:
-                return json.loads(payload[start : end + 1])
-            except json.JSONDecodeError:
-                return None
-        return None
+                self.assign([paper], schema)
+            except Exception as exc:
+                dead_letters.add(paper, "classify", exc)
 
 
 def _match_choice(candidate: str, options: Iterable[str]) -> Optional[str]:
@@ -52,9 +64,17 @@ def _match_choice(candidate: str, options: Iterable[str]) -> Optional[str]:
     return lower_map.get(candidate.lower())
 
 
-def _format_schema(schema: Dict[str, CategoryNode]) -> Tuple[str, Dict[str, List[str]]]:
+def _format_schema(
+    schema: Dict[str, CategoryNode], only: Optional[Iterable[str]] = None
+) -> Tuple[str, Dict[str, List[str]]]:
+    """Render the main/sub category list; ``only`` restricts it to some main categories."""
+    selected = set(only) if only is not None else None
     main_nodes = sorted(
-        (node for node in schema.values() if node.parent is None),
+        (
+            node
+            for node in schema.values()
+            if node.parent is None and (selected is None or node.name in selected)
+        ),
         key=lambda node: node.name,
     )
     description_lines: List[str] = []
@@ -70,8 +90,10 @@ def _format_schema(schema: Dict[str, CategoryNode]) -> Tuple[str, Dict[str, List
     return "\n".join(description_lines), mapping
 
 
-def _build_prompt(schema_text: str, paper: PaperEntry) -> str:
+def _build_prompt(schema_text: str, paper: PaperEntry, abstract: Optional[str] = None) -> str:
     authors = ", ".join(paper.authors)
+    if abstract is None:
+        abstract = paper.abstract
     return (
         "你是一名中文学术综述助手，将论文归入预定义的分类结构。\n"
         "可选的大类及其子类如下：\n"
@@ -80,77 +102,212 @@ def _build_prompt(schema_text: str, paper: PaperEntry) -> str:
         "输出 JSON，对应字段为 main_category、sub_category；若无合适子类可设为空字符串。\n\n"
         f"标题：{paper.title or '未知标题'}\n"
         f"作者：{authors or paper.first_author}\n"
-        f"摘要：{paper.abstract or '（暂无摘要）'}"
+        f"摘要：{abstract or '（暂无摘要）'}"
     )
 
 
 class LLMCategoryAssigner(CategoryAssigner):
     """Assign categories by querying a chat-completions compatible client."""
 
-    def __init__(self, client: Any, *, model: str = "deepseek-chat") -> None:
+    def __init__(
+        self,
+        client: Any,
+        *,
+        model: str = "deepseek-chat",
+        max_workers: int = 1,
+        abstract_budget: Optional[int] = None,
+        stream: bool = False,
+        top_k: Optional[int] = None,
+        escalation_model: Optional[str] = None,
+    ) -> None:
         self.client = client
         self.model = model
+        # Stronger model that gets a second attempt when ``model`` returns no usable label.
+        self.escalation_model = escalation_model
+        self.max_workers = max_workers
+        self.abstract_budget = abstract_budget
+        self.stream = stream
+        # Show only the top-k retrieved main categories per paper; None/0 keeps the full schema.
+        self.top_k = top_k
 
     def assign(self, papers: List[PaperEntry], schema: Dict[str, CategoryNode]) -> None:
+        self._assign_all(papers, schema, None)
+
+    def assign_isolated(
+        self,
+        papers: List[PaperEntry],
+        schema: Dict[str, CategoryNode],
+        dead_letters: DeadLetterQueue,
+    ) -> None:
+        self._assign_all(papers, schema, dead_letters)
+
+    def _assign_all(
+        self,
+        papers: List[PaperEntry],
+        schema: Dict[str, CategoryNode],
+        dead_letters: Optional[DeadLetterQueue],
+    ) -> None:
         schema_text, mapping = _format_schema(schema)
         if not mapping:
             raise ClassificationFailed("schema 中缺少大类定义，无法完成模型分类。")
         if not papers:
             return
 
-        progress = ProgressReporter(total_steps=len(papers))
-        progress.start(f"开始分类 {len(papers)} 篇文献。")
+        retriever = CategoryRetriever(schema, self.top_k) if self.top_k else None
+        if retriever is not None and not retriever.active:
+            retriever = None
 
-        for paper in papers:
-            try:
-                selection = self._classify_single(paper, schema_text, mapping)
-            except Exception as exc:  # pragma: no cover - depends on remote API behaviour
-                raise ClassificationFailed(str(exc)) from exc
+        dashboard = StageDashboard("classify", "分类", len(papers))
+        dashboard.start()
 
-            if selection.main is None:
-                title = paper.title or paper.first_author
-                print(f"⚠️ 模型未返回有效主类，已跳过：{title}")
-                paper.main_category = None
-                paper.sub_category = None
-                progress.advance(f"跳过：{title}")
-                continue
-
-            paper.main_category = selection.main
-            if selection.sub and selection.sub in mapping.get(selection.main, []):
-                paper.sub_category = selection.sub
-            else:
-                paper.sub_category = None
+        def assign_one(paper: PaperEntry) -> None:
+            dashboard.task_started()
+            ok = False
+            try:
+                ok = self._assign_single(paper, schema_text, mapping, dashboard, dead_letters, retriever)
+            finally:
+                dashboard.task_finished(failed=not ok)
 
-            progress.advance(f"完成分类：{paper.title or paper.first_author}")
+        try:
+            run_concurrently(assign_one, papers, self.max_workers)
+        finally:
+            dashboard.close()
 
-    def _classify_single(
+    def _assign_single(
         self,
         paper: PaperEntry,
         schema_text: str,
         mapping: Dict[str, List[str]],
-    ) -> CategorySelection:
-        prompt = _build_prompt(schema_text, paper)
-        print("\n🤖 分类请求 Prompt:\n" + prompt + "\n")
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
+        dashboard: StageDashboard,
+        dead_letters: Optional[DeadLetterQueue] = None,
+        retriever: Optional[CategoryRetriever] = None,
+    ) -> bool:
+        """Classify one paper; return ``False`` when it failed or matched no category."""
+        try:
+            selection = self._classify_with_candidates(paper, schema_text, mapping, retriever)
+            if self.escalation_model:
+                selection = self._escalate(paper, selection, schema_text, mapping)
+        except BudgetExhausted:
+            # Not a failure: the paper is exported as unclassified without a retry.
+            metrics.increment("budget.skipped.classify")
+            return False
+        except Exception as exc:  # pragma: no cover - depends on remote API behaviour
+            if dead_letters is None:
+                raise ClassificationFailed(str(exc)) from exc
+            letter = dead_letters.add(paper, "classify", exc)
+            dashboard.log(f"⚠️ 分类失败（第 {letter.attempts} 次），稍后重试：{paper.title or paper.first_author}")
+            return False
+
+        if not self.apply_selection(paper, selection, mapping):
+            dashboard.log(f"⚠️ 模型未返回有效主类，已跳过：{paper.title or paper.first_author}")
+            return False
+        return True
+
+    def build_request(
+        self, paper: PaperEntry, schema_text: str, model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Return the ``chat.completions.create`` arguments used to classify ``paper``."""
+        abstract = budgeted_abstract(paper, self.abstract_budget, "classify")
+        prompt = _build_prompt(schema_text, paper, abstract)
+        return {
+            "model": model or self.model,
+            "messages": [
                 {"role": "system", "content": "You are a helpful assistant."},
                 {"role": "user", "content": prompt},
             ],
-            response_format={"type": "json_object"},
-            stream=False,
-        )
-        content = response.choices[0].message.content or ""
-        print("📨 模型返回 (分类)：\n" + content + "\n")
-        data = _extract_json(content) or {}
+            "response_format": {"type": "json_object"},
+        }
+
+    def parse_selection(self, content: str, mapping: Dict[str, List[str]]) -> CategorySelection:
+        """Validate a raw model answer against the schema ``mapping``."""
+        data, truncated = extract_json(content, "classify")
+        if not isinstance(data, dict) or truncated:
+            return CategorySelection(main=None, sub=None, malformed=True, truncated=truncated)
         main = _match_choice(str(data.get("main_category", "")), mapping.keys())
         sub = None
         if main is not None:
             sub = _match_choice(str(data.get("sub_category", "")), mapping.get(main, []))
-        print(
-            "📊 分类结果: 主类="
-            + (main or "未匹配")
-            + ", 子类="
-            + (sub or "未匹配")
-        )
         return CategorySelection(main=main, sub=sub)
+
+    @staticmethod
+    def apply_selection(
+        paper: PaperEntry, selection: CategorySelection, mapping: Dict[str, List[str]]
+    ) -> bool:
+        """Store ``selection`` on ``paper``; return ``False`` when no main category matched."""
+        if selection.main is None:
+            paper.main_category = None
+            paper.sub_category = None
+            return False
+        paper.main_category = selection.main
+        if selection.sub and selection.sub in mapping.get(selection.main, []):
+            paper.sub_category = selection.sub
+        else:
+            paper.sub_category = None
+        return True
+
+    def _classify_with_candidates(
+        self,
+        paper: PaperEntry,
+        schema_text: str,
+        mapping: Dict[str, List[str]],
+        retriever: Optional[CategoryRetriever],
+    ) -> CategorySelection:
+        """Ask with the retrieved candidates first, then with the full schema if none fit."""
+        candidates = retriever.candidates(paper) if retriever is not None else []
+        if not candidates:
+            return self._classify_single(paper, schema_text, mapping)
+
+        narrowed_text, narrowed_mapping = _format_schema(retriever.schema, candidates)
+        metrics.increment("retrieval.classify.narrowed")
+        metrics.increment(
+            "retrieval.classify.tokens_saved", estimate_tokens(schema_text) - estimate_tokens(narrowed_text)
+        )
+        selection = self._classify_single(paper, narrowed_text, narrowed_mapping)
+        if selection.main is not None:
+            return selection
+        # The model rejected every candidate: the full prompt is paid on top of the narrowed one.
+        metrics.increment("retrieval.classify.fallback")
+        # Estimated without build_request, which would count the abstract trim a second time.
+        abstract, _ = trim_to_budget(paper.abstract, self.abstract_budget, title=paper.title)
+        metrics.increment(
+            "retrieval.classify.fallback_tokens", estimate_tokens(_build_prompt(schema_text, paper, abstract))
+        )
+        return self._classify_single(paper, schema_text, mapping)
+
+    def _escalate(
+        self,
+        paper: PaperEntry,
+        selection: CategorySelection,
+        schema_text: str,
+        mapping: Dict[str, List[str]],
+    ) -> CategorySelection:
+        """Ask the escalation model with the full schema when the default model gave no label."""
+        if selection.main is not None:
+            record_escalation("classify")
+            return selection
+        reason = "truncated" if selection.truncated else "invalid_json" if selection.malformed else "no_match"
+        escalated = self._classify_single(paper, schema_text, mapping, model=self.escalation_model)
+        record_escalation("classify", reason, recovered=escalated.main is not None)
+        return escalated
+
+    def _classify_single(
+        self,
+        paper: PaperEntry,
+        schema_text: str,
+        mapping: Dict[str, List[str]],
+        model: Optional[str] = None,
+    ) -> CategorySelection:
+        request = self.build_request(paper, schema_text, model)
+        if trace.enabled:
+            trace.emit("classify", "prompt", request["messages"][-1]["content"], label="🤖 分类请求 Prompt:")
+        content = complete_json(self.client, request, stream=self.stream, stage="classify")
+        selection = self.parse_selection(content, mapping)
+        if trace.enabled:
+            trace.emit("classify", "response", content, label="📨 模型返回 (分类)：")
+            trace.emit(
+                "classify",
+                "result",
+                f"{paper.key} 主类={selection.main or '未匹配'}, 子类={selection.sub or '未匹配'}",
+                label="📊 分类结果:",
+            )
+        return selection
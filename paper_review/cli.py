@@ -2,24 +2,47 @@ from __future__ import annotations
 
 import argparse
 import os
+import sys
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Optional
-
-try:  # pragma: no cover - optional dependency
-    from openai import OpenAI
-except ImportError:  # pragma: no cover - graceful fallback when SDK is missing
-    OpenAI = None  # type: ignore
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
 
+from .budget import PRIORITY_POLICIES, BudgetedClient, LLMBudget
 from .classification import LLMCategoryAssigner
-from .pipeline import ReviewPipeline
-from .parsing import registry
-from .schema import LLMSchemaBuilder
-from .summarization.deepseek import DeepSeekSummarizer
+from .fanout import ReviewSpec, build_review_specs, load_review_specs, parse_review_spec
+from .llm.hedging import HedgedClient
+from .llm.json_repair import report_lines as json_repair_report_lines
+from .llm.pool import ClientPool, EndpointConfig, load_endpoint_configs, parse_endpoint_spec
+from .llm.routing import ESCALATION_STAGES, EscalationReport
+from .llm.streaming import stream_timings
+from .metrics import metrics
+from .models import PaperEntry
+from .pipeline import ReviewPipeline, parse_source
+from .parsing import RecordFilter, registry
+from .schema import DefaultSchemaBuilder, LLMSchemaBuilder, SchemaBuilder
+from .snapshot import SnapshotCache, parser_identity
+from .trace import NORMAL, QUIET, trace
+
+# Subcommand, service and transport modules are imported where they are used, so that
+# ``--help`` and a plain run do not pay for http.server, sqlite3 and friends.
+if TYPE_CHECKING:  # pragma: no cover - annotations only
+    from .corpus_index import CorpusIndex
+    from .llm.transport import TransportConfig
+    from .schema_cache import SchemaCache
+    from .summary_store import SummaryStore
+
+
+SUBCOMMANDS = ("shard", "run-shard", "merge", "batch-prepare", "batch-ingest", "batch-simulate", "serve", "query")
 
 
 def build_argparser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
-        description="从文献引用文件生成分层中文综述 Markdown 草稿"
+        description="从文献引用文件生成分层中文综述 Markdown 草稿",
+        epilog=(
+            "分布式执行请使用子命令：shard / run-shard / merge；离线批量接口请使用 "
+            "batch-prepare / batch-simulate / batch-ingest；常驻 HTTP 服务请使用 serve；"
+            "按检索词选取子集综述请使用 query（如 `main.py shard --help`）。"
+        ),
     )
 
     source_group = parser.add_mutually_exclusive_group(required=True)
@@ -35,6 +58,158 @@ def build_argparser() -> argparse.ArgumentParser:
     )
 
     parser.add_argument("--out-dir", type=Path, required=True, help="输出目录，将在其中生成 review.md")
+    _add_schema_arguments(parser)
+    _add_export_arguments(parser)
+    parser.add_argument(
+        "--review",
+        action="append",
+        default=[],
+        metavar="SPEC",
+        help=(
+            "额外的一份综述配置（可重复），如 name=topic,categories=a.yaml,sort_by_year=desc；"
+            "未给出的字段沿用 --categories/--n-main/--m-sub/--sort-by-year。"
+            "给出后只解析与摘要一次，每份综述写到 <out-dir>/<name>/review.md。"
+        ),
+    )
+    parser.add_argument(
+        "--reviews-file",
+        type=Path,
+        default=None,
+        help="YAML/JSON 综述配置列表，字段同 --review，可与 --review 同时使用。",
+    )
+    _add_llm_arguments(parser)
+    _add_input_format_argument(parser)
+    _add_filter_arguments(parser)
+    _add_output_arguments(parser)
+    return parser
+
+
+def build_subcommand_parser() -> argparse.ArgumentParser:
+    from .batch import BATCH_STATE_NAME
+
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description=(
+            "分片执行：先 shard 切分语料，再在各节点 run-shard，最后 merge 合并导出；"
+            "批量接口：batch-prepare 生成请求文件，提交服务商（或 batch-simulate）后用 batch-ingest 导入；"
+            "serve 启动常驻 HTTP 服务，复用同一套客户端与缓存处理上传的任务；"
+            "query 在倒排索引中检索前 N 篇文献并只对其生成综述。"
+        ),
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    shard = subparsers.add_parser("shard", help="解析语料、固定分类体系并切分为 N 个分片。")
+    shard.add_argument("--input", type=Path, required=True, help="输入的文献文件路径。")
+    shard.add_argument("--out-dir", type=Path, required=True, help="分片文件与 manifest.json 的输出目录。")
+    shard.add_argument("--num-shards", type=int, required=True, help="分片数量 N。")
+    _add_schema_arguments(shard)
+    _add_llm_arguments(shard)
+    _add_input_format_argument(shard)
+    _add_filter_arguments(shard)
+
+    run_shard = subparsers.add_parser("run-shard", help="对单个分片执行分类与摘要，写出结果文件。")
+    run_shard.add_argument("--shard", type=Path, required=True, help="shard 子命令生成的分片文件。")
+    run_shard.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="结果文件路径，默认与分片同目录，文件名以 result- 开头。",
+    )
+    _add_llm_arguments(run_shard)
+
+    merge = subparsers.add_parser("merge", help="校验并合并各分片结果，导出 review.md。")
+    merge.add_argument("--manifest", type=Path, required=True, help="shard 子命令生成的 manifest.json。")
+    merge.add_argument(
+        "--results",
+        type=Path,
+        nargs="+",
+        required=True,
+        help="分片结果文件，或包含结果文件的目录。",
+    )
+    merge.add_argument("--out-dir", type=Path, required=True, help="输出目录，将在其中生成 review.md")
+    _add_export_arguments(merge)
+
+    batch_prepare = subparsers.add_parser(
+        "batch-prepare", help="把全部分类与摘要请求写成批量接口的 JSONL 文件。"
+    )
+    batch_prepare.add_argument("--input", type=Path, required=True, help="输入的文献文件路径。")
+    batch_prepare.add_argument(
+        "--out-dir", type=Path, required=True, help=f"请求文件与 {BATCH_STATE_NAME} 的输出目录。"
+    )
+    _add_schema_arguments(batch_prepare)
+    _add_llm_arguments(batch_prepare)
+    _add_input_format_argument(batch_prepare)
+    _add_filter_arguments(batch_prepare)
+
+    batch_ingest = subparsers.add_parser("batch-ingest", help="校验批量接口返回的结果文件并导出 review.md。")
+    batch_ingest.add_argument(
+        "--state", type=Path, required=True, help=f"batch-prepare 生成的 {BATCH_STATE_NAME}。"
+    )
+    batch_ingest.add_argument(
+        "--results", type=Path, nargs="+", required=True, help="服务商返回的结果 JSONL 文件。"
+    )
+    batch_ingest.add_argument("--out-dir", type=Path, required=True, help="输出目录，将在其中生成 review.md")
+    _add_export_arguments(batch_ingest)
+
+    batch_simulate = subparsers.add_parser(
+        "batch-simulate", help="在本地把请求文件转换为结果文件，用于测试批量流程。"
+    )
+    batch_simulate.add_argument(
+        "--requests", type=Path, nargs="+", required=True, help="batch-prepare 生成的请求 JSONL 文件。"
+    )
+    batch_simulate.add_argument("--output", type=Path, required=True, help="结果 JSONL 文件路径。")
+    batch_simulate.add_argument(
+        "--use-llm",
+        action="store_true",
+        help="逐条调用真实模型接口生成结果；默认使用离线的确定性应答器。",
+    )
+    _add_llm_arguments(batch_simulate)
+
+    serve = subparsers.add_parser("serve", help="启动常驻 HTTP 服务，通过任务接口上传文献并下载 review.md。")
+    serve.add_argument("--host", type=str, default="127.0.0.1", help="监听地址，默认为 127.0.0.1。")
+    serve.add_argument("--port", type=int, default=8765, help="监听端口，默认为 8765。")
+    serve.add_argument(
+        "--work-dir", type=Path, required=True, help="任务目录，每个任务的上传文件与输出写在 <work-dir>/<任务 ID>/ 下。"
+    )
+    serve.add_argument("--max-jobs", type=int, default=1, help="同时执行的任务数，其余任务排队，默认为 1。")
+    serve.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=16,
+        help="所有任务合计的 LLM 并发请求上限，默认为 16（--llm-concurrency 仍限制单个任务）。",
+    )
+    serve.add_argument(
+        "--max-upload-mb", type=float, default=200.0, help="单次上传的文件大小上限（MB），默认为 200。"
+    )
+    _add_schema_arguments(serve)
+    _add_export_arguments(serve)
+    _add_llm_arguments(serve)
+    _add_input_format_argument(serve)
+    _add_filter_arguments(serve)
+
+    query = subparsers.add_parser("query", help="在语料倒排索引中检索前 N 篇文献，只对这些文献生成综述。")
+    query.add_argument("--index", type=Path, required=True, help="倒排索引文件路径（SQLite），不存在或已过期时由 --input 重建。")
+    query.add_argument(
+        "--input",
+        type=Path,
+        default=None,
+        help="主文献文件；给出时若索引缺失或与该文件不一致则重新建立索引，省略时直接使用已有索引。",
+    )
+    query.add_argument("--query", type=str, required=True, help="检索词，中文按双字切分、英文按单词匹配，BM25 排序。")
+    query.add_argument("--top-n", type=int, default=200, help="参与综述的文献数量上限，默认为 200。")
+    query.add_argument("--out-dir", type=Path, required=True, help="输出目录，将在其中生成 review.md")
+    _add_schema_arguments(query)
+    _add_export_arguments(query)
+    _add_llm_arguments(query)
+    _add_input_format_argument(query)
+    _add_filter_arguments(query)
+
+    for subparser in subparsers.choices.values():
+        _add_output_arguments(subparser)
+    return parser
+
+
+def _add_schema_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "--categories",
         type=Path,
@@ -53,6 +228,9 @@ def build_argparser() -> argparse.ArgumentParser:
         default=None,
         help="自动生成类别结构时，每个大类下面的小类数量 M（可选）。",
     )
+
+
+def _add_export_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "--sort-by-year",
         type=str,
@@ -60,6 +238,84 @@ def build_argparser() -> argparse.ArgumentParser:
         choices=["none", "asc", "desc"],
         help="每个小类内部是否按年份排序。",
     )
+    parser.add_argument(
+        "--stats-json",
+        action="store_true",
+        help="同时在 review.md 旁写出 stats.json：全文、各大类与各小类的篇数、年份分布、主要期刊与高产作者。",
+    )
+
+
+def _add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="count",
+        default=0,
+        help="在终端回显每篇文献的请求 Prompt、模型返回与结果。",
+    )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="只输出警告与最终结果，不显示进度。",
+    )
+    parser.add_argument(
+        "--trace-file",
+        type=Path,
+        default=None,
+        help="将每次请求的 Prompt、模型返回与结果以 JSONL 追加写入该文件（带缓冲，不影响终端输出）。",
+    )
+
+
+def _add_input_format_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--input-format",
+        type=_input_format,
+        default=None,
+        metavar="{" + ",".join(registry.available_formats(discover=False)) + ",...}",
+        help="书目文件格式（如 ris/refworks/bibtex/csl-json/medline，插件解析器通过 entry point 自动发现），若不指定则根据文件后缀自动检测。",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=1,
+        help=(
+            "解析单个大文件（8 MB 以上的 RIS/RefWorks）时使用的进程数，默认 1 即顺序解析；"
+            "0 表示使用全部 CPU。文件按记录边界切块并行解析，结果与顺序解析完全一致。"
+        ),
+    )
+
+
+def _input_format(value: str) -> str:
+    """Validate ``--input-format`` against the registry so argparse reports unknown names."""
+    try:
+        registry.get(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from exc
+    return value
+
+
+def _add_filter_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--year-min", type=int, default=None, help="只保留该年份及之后的文献（无年份的文献会被过滤）。")
+    parser.add_argument("--year-max", type=int, default=None, help="只保留该年份及之前的文献（无年份的文献会被过滤）。")
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        metavar="KEYWORD",
+        help="只保留标题或摘要包含该关键词的文献（不区分大小写），可重复指定，命中任一即可。",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="KEYWORD",
+        help="过滤标题或摘要包含该关键词的文献（不区分大小写），可重复指定。",
+    )
+    parser.add_argument("--require-abstract", action="store_true", help="过滤没有摘要的文献。")
+
+
+def _add_llm_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "--llm-api-key",
         type=str,
@@ -78,52 +334,724 @@ def build_argparser() -> argparse.ArgumentParser:
         default="deepseek-chat",
         help="用于摘要与分类的对话模型名称，默认为 deepseek-chat。",
     )
+    for stage, label in (("schema", "推断类别结构"), ("classify", "分类"), ("summary", "摘要")):
+        parser.add_argument(
+            f"--{stage}-model",
+            type=str,
+            default=None,
+            help=f"{label}阶段使用的模型，默认沿用 --llm-model。",
+        )
     parser.add_argument(
-        "--input-format",
+        "--escalation-model",
         type=str,
         default=None,
-        choices=registry.available_formats(),
-        help="书目文件格式（如 ris/refworks），若不指定则根据文件后缀自动检测。",
+        help=(
+            "更强的升级模型（可选）。分类返回无法解析的 JSON 或未匹配主类、摘要为空或超长时，"
+            "该文献改用此模型重试一次；运行统计给出各阶段升级比例。"
+        ),
+    )
+    parser.add_argument(
+        "--schema-abstract-budget",
+        type=int,
+        default=None,
+        help="推断类别结构时每篇摘要的 token 上限；默认沿用按 400 字截断。",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help=(
+            "跨运行缓存目录（可选）。指定后解析结果保存为二进制快照，由大模型推断的类别结构会按语料指纹缓存，"
+            "生成的摘要按 DOI 或标题+第一作者+年份存入摘要库，并在后续运行（可跨项目共享）中复用。"
+        ),
+    )
+    parser.add_argument(
+        "--schema-extend-threshold",
+        type=float,
+        default=0.2,
+        help="新文献占比不超过该值时，在缓存的类别结构上增量扩展而非重新推断，默认为 0.2。",
+    )
+    parser.add_argument(
+        "--summary-store-size",
+        type=int,
+        default=50_000,
+        help="缓存目录中摘要库保留的最多条目数，超出后按最近最少使用淘汰，默认为 50000。",
+    )
+    parser.add_argument(
+        "--classify-abstract-budget",
+        type=int,
+        default=512,
+        help="分类请求中摘要的 token 上限，超出时保留开头及与标题最相关的句子，0 表示不裁剪。",
+    )
+    parser.add_argument(
+        "--classify-top-k",
+        type=int,
+        default=0,
+        help=(
+            "分类请求中只列出按 BM25 检索出的前 K 个大类（及其子类），模型全部拒绝时回退到完整类别结构；"
+            "适合类别较多的 YAML，0 表示始终列出全部类别。"
+        ),
+    )
+    parser.add_argument(
+        "--summary-abstract-budget",
+        type=int,
+        default=1024,
+        help="摘要请求中摘要的 token 上限，0 表示不裁剪。",
+    )
+    parser.add_argument(
+        "--llm-endpoint",
+        action="append",
+        default=[],
+        metavar="SPEC",
+        help=(
+            "追加一个 LLM endpoint，可重复指定，格式如 "
+            "base_url=https://api.deepseek.com,api_key_env=DEEPSEEK_KEY_2,weight=2,name=ds2。"
+        ),
+    )
+    parser.add_argument(
+        "--llm-endpoints-file",
+        type=Path,
+        default=None,
+        help="endpoint 列表文件（YAML/JSON），每项包含 base_url、api_key 或 api_key_env、weight、name。",
+    )
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=1,
+        help="分类与摘要阶段同时进行的模型请求数量，默认为 1（串行）。",
+    )
+    parser.add_argument(
+        "--llm-timeout",
+        type=float,
+        default=120.0,
+        help="单次模型调用的截止时间（秒），超时视为失败，0 表示不限制，默认为 120。",
+    )
+    parser.add_argument(
+        "--llm-hedge",
+        action="store_true",
+        help="启用对冲请求：调用耗时超过近期 p95 延迟时发送一份重复请求，取先返回者。",
+    )
+    parser.add_argument(
+        "--llm-hedge-quantile",
+        type=float,
+        default=0.95,
+        help="触发对冲的延迟分位数，默认为 0.95。",
+    )
+    parser.add_argument(
+        "--llm-hedge-min-samples",
+        type=int,
+        default=20,
+        help="同一阶段至少完成多少次调用后才开始对冲，默认为 20。",
+    )
+    parser.add_argument(
+        "--llm-stream",
+        action="store_true",
+        help="以流式方式接收模型输出，JSON 对象一闭合即断开连接，并统计首 token 与 JSON 完整耗时。",
+    )
+    parser.add_argument(
+        "--retry-attempts",
+        type=int,
+        default=2,
+        help="分类/摘要失败的文献在流程末尾统一重试的轮数，默认为 2。",
+    )
+    parser.add_argument(
+        "--max-tokens-budget",
+        type=int,
+        default=None,
+        help="本次运行的 token 上限（含 Prompt 与输出），用尽后不再发起模型调用，未处理文献以占位内容导出。",
+    )
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=None,
+        help="本次运行的模型请求次数上限，用尽后不再发起模型调用。",
+    )
+    parser.add_argument(
+        "--priority",
+        type=str,
+        default="input",
+        choices=list(PRIORITY_POLICIES),
+        help=(
+            "文献处理顺序：input 按输入顺序；recent 新年份优先；abstract 有摘要者优先；"
+            "categories 先完成分类，再按大类轮转生成摘要（文献少的大类优先）。设置预算时尤其有用。"
+        ),
+    )
+    parser.add_argument(
+        "--llm-max-failures",
+        type=int,
+        default=3,
+        help="endpoint 连续失败多少次后暂时移出轮转，默认为 3。",
+    )
+    parser.add_argument(
+        "--llm-cooldown",
+        type=float,
+        default=30.0,
+        help="endpoint 被移出轮转后的冷却秒数，默认为 30。",
+    )
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument(
+        "--llm-record",
+        type=Path,
+        default=None,
+        metavar="CASSETTE",
+        help="把每次模型调用的返回、token 用量与耗时追加录制到 gzip 压缩的回放文件（如 runs/calls.jsonl.gz）。",
+    )
+    cassette.add_argument(
+        "--llm-replay",
+        type=Path,
+        default=None,
+        metavar="CASSETTE",
+        help="从 --llm-record 录制的文件回放模型返回，不访问网络、不需要凭证，用于离线基准测试。",
+    )
+    parser.add_argument(
+        "--llm-replay-latency-scale",
+        type=float,
+        default=0.0,
+        help="回放时按录制耗时乘以该倍率等待（1 为原速），默认为 0 即不等待。",
+    )
+    parser.add_argument(
+        "--http-max-connections",
+        type=int,
+        default=100,
+        help="所有 endpoint 共用的 HTTP 连接池最大连接数，默认为 100。",
+    )
+    parser.add_argument(
+        "--http-max-keepalive",
+        type=int,
+        default=32,
+        help="连接池中保持空闲（keep-alive）的最大连接数，应不小于 --llm-concurrency，默认为 32。",
+    )
+    parser.add_argument(
+        "--http-keepalive-expiry",
+        type=float,
+        default=60.0,
+        help="空闲连接保留的秒数，默认为 60。",
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="启用 HTTP/2 多路复用（需要 `pip install 'httpx[http2]'`）。",
+    )
+    parser.add_argument(
+        "--http-connect-timeout",
+        type=float,
+        default=10.0,
+        help="建立连接（含 TLS 握手）的超时秒数，默认为 10。",
+    )
+    parser.add_argument(
+        "--http-read-timeout",
+        type=float,
+        default=120.0,
+        help="两次收到数据之间的最长等待秒数，0 表示不限制，默认为 120。",
     )
-    return parser
 
 
-def run_cli(args: Optional[argparse.Namespace] = None) -> Path:
+def run_cli(args: Optional[Sequence[str]] = None) -> Path:
+    argv = list(sys.argv[1:] if args is None else args)
+    if argv and argv[0] in SUBCOMMANDS:
+        parsed = build_subcommand_parser().parse_args(argv)
+        _configure_output(parsed)
+        try:
+            result = _run_subcommand(parsed)
+        finally:
+            trace.close()
+        _print_run_summary()
+        return result
+
     parser = build_argparser()
-    parsed = parser.parse_args(args=args)
+    parsed = parser.parse_args(args=argv)
+    specs = None
+    if parsed.review or parsed.reviews_file is not None:
+        if parsed.categorized_dir is not None:
+            parser.error("--review/--reviews-file 需要配合 --input 使用。")
+        try:
+            specs = _review_specs(parsed)
+        except (OSError, ValueError) as exc:
+            parser.error(str(exc))
+    _configure_output(parsed)
+
+    if specs is not None:
+        try:
+            _build_pipeline(parsed).run_many(
+                parsed.input, parsed.out_dir, specs, input_format=parsed.input_format
+            )
+        finally:
+            trace.close()
+        _print_run_summary()
+        return parsed.out_dir
+
+    try:
+        pipeline = _build_pipeline(parsed)
+        out_md = pipeline.run(
+            source=parsed.input,
+            categorized_dir=parsed.categorized_dir,
+            out_dir=parsed.out_dir,
+            categories_yaml=parsed.categories,
+            n_main=parsed.n_main,
+            m_sub=parsed.m_sub,
+            sort_by_year=parsed.sort_by_year,
+            input_format=parsed.input_format,
+        )
+    finally:
+        trace.close()
+    _print_run_summary()
+    return out_md
+
+
+def _review_specs(parsed: argparse.Namespace) -> List[ReviewSpec]:
+    items: List[Dict[str, Any]] = []
+    if parsed.reviews_file is not None:
+        items.extend(load_review_specs(parsed.reviews_file))
+    items.extend(parse_review_spec(spec) for spec in parsed.review)
+    defaults = {
+        "categories": parsed.categories,
+        "n_main": parsed.n_main,
+        "m_sub": parsed.m_sub,
+        "sort_by_year": parsed.sort_by_year,
+    }
+    return build_review_specs(items, defaults)
+
+
+def _configure_output(parsed: argparse.Namespace) -> None:
+    verbosity = QUIET if parsed.quiet else NORMAL + parsed.verbose
+    trace.configure(verbosity=verbosity, path=parsed.trace_file)
+    # Listed only when some answer needed repair or could not be parsed at all.
+    metrics.add_section("JSON 容错解析", json_repair_report_lines)
+
+
+def _run_subcommand(parsed: argparse.Namespace) -> Path:
+    if parsed.command == "shard":
+        from .sharding import split_corpus
+
+        # A YAML schema needs no model, so only ask for credentials when inferring one.
+        if parsed.categories is not None:
+            schema_builder: SchemaBuilder = DefaultSchemaBuilder()
+        else:
+            schema_builder = _build_pipeline(parsed).schema_builder
+        papers = parse_source(
+            parsed.input,
+            input_format=parsed.input_format,
+            snapshots=_snapshot_cache(parsed),
+            record_filter=_record_filter(parsed),
+            workers=parsed.parse_workers,
+        )
+        schema = schema_builder.build(papers, parsed.categories, parsed.n_main, parsed.m_sub)
+        return split_corpus(papers, schema, parsed.num_shards, parsed.out_dir)
+
+    if parsed.command == "run-shard":
+        from .sharding import default_result_path, run_shard
+
+        pipeline = _build_pipeline(parsed)
+        out_path = parsed.output or default_result_path(parsed.shard)
+        return run_shard(parsed.shard, pipeline, out_path)
+
+    if parsed.command == "batch-prepare":
+        from .batch import BATCH_STATE_NAME, prepare_batch
+
+        if parsed.categories is not None:
+            pipeline = _build_pipeline(parsed, offline=True)
+            pipeline.schema_builder = DefaultSchemaBuilder()
+        else:
+            pipeline = _build_pipeline(parsed)
+        papers = parse_source(
+            parsed.input,
+            input_format=parsed.input_format,
+            snapshots=_snapshot_cache(parsed),
+            record_filter=_record_filter(parsed),
+            workers=parsed.parse_workers,
+        )
+        schema = pipeline.schema_builder.build(papers, parsed.categories, parsed.n_main, parsed.m_sub)
+        prepare_batch(papers, schema, pipeline.category_assigner, pipeline.summarizer, parsed.out_dir)
+        return parsed.out_dir / BATCH_STATE_NAME
+
+    if parsed.command == "batch-simulate":
+        from .batch import simulate_batch
+
+        client = None
+        if parsed.use_llm:
+            client = _stage_client(_build_llm_client_from_args(parsed), "batch", parsed)
+        return simulate_batch(parsed.requests, parsed.output, client)
 
-    client = _build_llm_client(parsed.llm_api_key, parsed.llm_api_base)
-    pipeline = ReviewPipeline(
-        summarizer=DeepSeekSummarizer(client, model=parsed.llm_model),
-        category_assigner=LLMCategoryAssigner(client, model=parsed.llm_model),
-        schema_builder=LLMSchemaBuilder(client, model=parsed.llm_model),
+    if parsed.command == "serve":
+        return _serve(parsed)
+
+    if parsed.command == "query":
+        return _run_query(parsed)
+
+    if parsed.command == "batch-ingest":
+        from .batch import ingest_batch_results
+        from .summarization.deepseek import DeepSeekSummarizer
+
+        # Validation only needs the parsing half of each consumer, never a client.
+        assigner = LLMCategoryAssigner(None, model="")
+        summarizer = DeepSeekSummarizer(None, model="")
+        return ingest_batch_results(
+            parsed.state,
+            parsed.results,
+            assigner,
+            summarizer,
+            parsed.out_dir,
+            sort_by_year=parsed.sort_by_year,
+            write_stats=parsed.stats_json,
+        )
+
+    from .sharding import ShardMergeError, collect_result_paths, merge_shard_results
+
+    result_paths = collect_result_paths(parsed.results)
+    if not result_paths:
+        raise ShardMergeError("未找到任何分片结果文件。")
+    return merge_shard_results(
+        parsed.manifest,
+        result_paths,
+        parsed.out_dir / "review.md",
+        sort_by_year=parsed.sort_by_year,
+        write_stats=parsed.stats_json,
+    )
+
+
+@dataclass
+class _PipelineResources:
+    """Clients and caches that several pipelines (e.g. service jobs) can share."""
+
+    clients: Dict[str, Any] = field(default_factory=dict)
+    schema_cache: Optional[SchemaCache] = None
+    summary_store: Optional[SummaryStore] = None
+    snapshots: Optional[SnapshotCache] = None
+    budget_limited: bool = False
+
+
+def _build_resources(
+    parsed: argparse.Namespace, *, offline: bool = False, client: Any = None
+) -> _PipelineResources:
+    """Build the per-stage clients and caches; ``offline`` skips the clients entirely."""
+    resources = _PipelineResources(
+        schema_cache=_schema_cache(parsed),
+        summary_store=_summary_store(parsed),
+        snapshots=_snapshot_cache(parsed),
     )
+    if offline:
+        return resources
+    if client is None:
+        client = _build_llm_client_from_args(parsed)
+    budget = LLMBudget(max_tokens=parsed.max_tokens_budget, max_requests=parsed.max_requests)
+    if budget.limited:
+        client = BudgetedClient(client, budget)
+        metrics.add_section("调用预算", budget.report_lines)
+        resources.budget_limited = True
+    if parsed.llm_stream:
+        metrics.add_section("流式响应", stream_timings.report_lines)
+    resources.clients = {stage: _stage_client(client, stage, parsed) for stage in ("schema", "classify", "summary")}
+    return resources
+
+
+def _build_pipeline(
+    parsed: argparse.Namespace,
+    *,
+    offline: bool = False,
+    resources: Optional[_PipelineResources] = None,
+) -> ReviewPipeline:
+    """Wire the LLM consumers; ``offline`` skips the client for request-building only."""
+    from .summarization.deepseek import DeepSeekSummarizer
+
+    if resources is None:
+        resources = _build_resources(parsed, offline=offline)
+    clients = resources.clients
+    models = _stage_models(parsed)
+    escalation = {
+        stage: parsed.escalation_model
+        for stage in ESCALATION_STAGES
+        if parsed.escalation_model and parsed.escalation_model != models[stage]
+    }
+    if escalation and not offline:
+        report = EscalationReport({stage: (models[stage], model) for stage, model in escalation.items()})
+        metrics.add_section("模型升级", report.report_lines)
+    return ReviewPipeline(
+        summarizer=DeepSeekSummarizer(
+            clients.get("summary"),
+            model=models["summary"],
+            abstract_budget=parsed.summary_abstract_budget,
+            stream=parsed.llm_stream,
+            store=resources.summary_store,
+            escalation_model=escalation.get("summary"),
+        ),
+        category_assigner=LLMCategoryAssigner(
+            clients.get("classify"),
+            model=models["classify"],
+            max_workers=parsed.llm_concurrency,
+            abstract_budget=parsed.classify_abstract_budget,
+            stream=parsed.llm_stream,
+            top_k=parsed.classify_top_k,
+            escalation_model=escalation.get("classify"),
+        ),
+        schema_builder=LLMSchemaBuilder(
+            clients.get("schema"),
+            model=models["schema"],
+            abstract_budget=parsed.schema_abstract_budget,
+            stream=parsed.llm_stream,
+            cache=resources.schema_cache,
+        ),
+        max_workers=parsed.llm_concurrency,
+        retry_attempts=parsed.retry_attempts,
+        priority=parsed.priority,
+        # One round per concurrency slot: each paper is summarized right after it is classified.
+        budget_batch_size=max(1, parsed.llm_concurrency) if resources.budget_limited else None,
+        snapshots=resources.snapshots,
+        record_filter=_record_filter(parsed),
+        parse_workers=getattr(parsed, "parse_workers", 1),
+        write_stats=getattr(parsed, "stats_json", False),
+    )
+
+
+def _stage_models(parsed: argparse.Namespace) -> Dict[str, str]:
+    """Model per stage: ``--<stage>-model`` when given, otherwise ``--llm-model``."""
+    return {
+        stage: getattr(parsed, f"{stage}_model", None) or parsed.llm_model
+        for stage in ("schema", "classify", "summary")
+    }
+
+
+def _run_query(parsed: argparse.Namespace) -> Path:
+    """Select the top-N papers for ``--query`` from the corpus index and review only those."""
+    index = _open_corpus_index(parsed)
+    pipeline = _build_pipeline(parsed)
+    ranked = index.search(parsed.query)
+    # Filters apply to the ranking, so the selection is the top N of the papers that pass them.
+    selected: List[PaperEntry] = []
+    record_filter = pipeline.record_filter
+    step = max(1, parsed.top_n)
+    for start in range(0, len(ranked), step):
+        for paper in index.papers([paper_id for paper_id, _ in ranked[start : start + step]]):
+            if record_filter is None or record_filter.accepts(
+                title=paper.title, abstract=paper.abstract, year=paper.year
+            ):
+                selected.append(paper)
+        if len(selected) >= parsed.top_n:
+            break
+    index.close()
+    selected = selected[: parsed.top_n]
+    if not selected:
+        raise ValueError(f"检索“{parsed.query}”没有匹配的文献。")
+    for position, paper in enumerate(selected):
+        paper.id = position
+        paper.key = f"paper_{position + 1}"
+    print(f"检索“{parsed.query}”：{len(ranked)} 篇文献命中，选取前 {len(selected)} 篇生成综述。")
     return pipeline.run(
-        source=parsed.input,
-        categorized_dir=parsed.categorized_dir,
+        source=None,
+        papers=selected,
         out_dir=parsed.out_dir,
         categories_yaml=parsed.categories,
         n_main=parsed.n_main,
         m_sub=parsed.m_sub,
         sort_by_year=parsed.sort_by_year,
+    )
+
+
+def _open_corpus_index(parsed: argparse.Namespace) -> CorpusIndex:
+    """Open ``--index``, (re)building it from ``--input`` when missing or out of date."""
+    from .corpus_index import CorpusIndex, build_index
+
+    if parsed.input is None:
+        if not parsed.index.exists():
+            raise ValueError(f"索引 {parsed.index} 不存在，请通过 --input 指定文献文件以建立索引。")
+        return CorpusIndex(parsed.index)
+    parser = registry.get(parsed.input_format or parsed.input.suffix)
+    stat = parsed.input.stat()
+    source = {
+        "path": str(parsed.input.resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "parser": parser_identity(parser),
+    }
+    if parsed.index.exists() and CorpusIndex.read_source(parsed.index) == source:
+        metrics.increment("index.reused")
+        return CorpusIndex(parsed.index)
+    # The index always covers the whole corpus; filters are applied per query.
+    papers = parse_source(
+        parsed.input,
         input_format=parsed.input_format,
+        snapshots=_snapshot_cache(parsed),
+        workers=parsed.parse_workers,
     )
+    return build_index(parsed.index, papers, source)
+
+
+def _serve(parsed: argparse.Namespace) -> Path:
+    """Run the HTTP service until interrupted; every job shares one warm client and cache set."""
+    from .llm.limits import ConcurrencyLimitedClient
+    from .service import JOB_OPTIONS, ReviewService, make_server
+
+    client = ConcurrencyLimitedClient(_build_llm_client_from_args(parsed), parsed.max_concurrency)
+    resources = _build_resources(parsed, client=client)
 
+    def pipeline_factory(options: Dict[str, Any]) -> ReviewPipeline:
+        overrides = {key: value for key, value in options.items() if value is not None}
+        return _build_pipeline(argparse.Namespace(**{**vars(parsed), **overrides}), resources=resources)
+
+    service = ReviewService(
+        pipeline_factory,
+        parsed.work_dir,
+        max_jobs=parsed.max_jobs,
+        defaults={key: getattr(parsed, key) for key in JOB_OPTIONS},
+        default_categories=parsed.categories,
+    )
+    server = make_server(
+        service, parsed.host, parsed.port, max_upload_bytes=int(parsed.max_upload_mb * 1024 * 1024)
+    )
+    service.start()
+    host, port = server.server_address[:2]
+    print(f"🌐 服务已启动：http://{host}:{port}/ （任务目录 {parsed.work_dir}，Ctrl+C 停止）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n正在停止服务，等待已提交的任务执行完毕...")
+    finally:
+        server.server_close()
+        service.stop()
+        if resources.summary_store is not None:
+            resources.summary_store.close()
+    return parsed.work_dir
 
-def _build_llm_client(api_key: Optional[str], api_base: Optional[str]) -> Any:
+
+def _schema_cache(parsed: argparse.Namespace) -> Optional[SchemaCache]:
+    if parsed.cache_dir is None:
+        return None
+    from .schema_cache import SchemaCache
+
+    return SchemaCache(parsed.cache_dir / "schema", extend_threshold=parsed.schema_extend_threshold)
+
+
+def _record_filter(parsed: argparse.Namespace) -> Optional[RecordFilter]:
+    # run-shard and batch commands do not parse, so they have no filter options.
+    record_filter = RecordFilter(
+        year_min=getattr(parsed, "year_min", None),
+        year_max=getattr(parsed, "year_max", None),
+        include=getattr(parsed, "include", []),
+        exclude=getattr(parsed, "exclude", []),
+        require_abstract=getattr(parsed, "require_abstract", False),
+    )
+    if not record_filter.active:
+        return None
+    metrics.add_section("解析过滤", record_filter.report_lines)
+    return record_filter
+
+
+def _snapshot_cache(parsed: argparse.Namespace) -> Optional[SnapshotCache]:
+    if parsed.cache_dir is None:
+        return None
+    return SnapshotCache(parsed.cache_dir / "snapshots")
+
+
+def _summary_store(parsed: argparse.Namespace) -> Optional[SummaryStore]:
+    if parsed.cache_dir is None:
+        return None
+    from .summary_store import SummaryStore
+
+    return SummaryStore(parsed.cache_dir / "summaries.sqlite3", max_entries=parsed.summary_store_size)
+
+
+def _build_llm_client_from_args(parsed: argparse.Namespace) -> Any:
+    from .llm.cassette import RecordingClient, ReplayClient
+    from .llm.transport import TransportConfig
+
+    if parsed.llm_replay is not None:
+        return ReplayClient(parsed.llm_replay, latency_scale=parsed.llm_replay_latency_scale)
+    client = _build_llm_client(
+        parsed.llm_api_key,
+        parsed.llm_api_base,
+        endpoint_specs=parsed.llm_endpoint,
+        endpoints_file=parsed.llm_endpoints_file,
+        max_failures=parsed.llm_max_failures,
+        cooldown=parsed.llm_cooldown,
+        transport=TransportConfig(
+            max_connections=parsed.http_max_connections,
+            max_keepalive=parsed.http_max_keepalive,
+            keepalive_expiry=parsed.http_keepalive_expiry,
+            http2=parsed.http2,
+            connect_timeout=parsed.http_connect_timeout,
+            read_timeout=parsed.http_read_timeout,
+        ),
+    )
+    if parsed.llm_record is not None:
+        client = RecordingClient(client, parsed.llm_record)
+    return client
+
+
+def _stage_client(client: Any, stage: str, parsed: argparse.Namespace) -> Any:
+    """Give each stage its own deadline/hedging wrapper so latency profiles stay separate."""
+    # Every concurrent request (across serve jobs) may need a thread for itself and its backup.
+    workers = max(1, parsed.llm_concurrency) * max(1, getattr(parsed, "max_jobs", 1))
+    staged = HedgedClient(
+        client,
+        name=stage,
+        deadline=parsed.llm_timeout,
+        hedge=parsed.llm_hedge,
+        hedge_quantile=parsed.llm_hedge_quantile,
+        min_samples=parsed.llm_hedge_min_samples,
+        max_workers=workers * 2,
+    )
+    metrics.add_section(f"请求时延与对冲 · {stage}", staged.report_lines)
+    return staged
+
+
+def _print_run_summary() -> None:
+    summary = metrics.render()
+    if summary:
+        print("\n📈 运行统计：\n" + summary)
+
+
+def _openai_client_class() -> Any:
+    """Import the OpenAI SDK on first use so that ``--help`` and offline commands stay fast."""
+    try:  # pragma: no cover - optional dependency
+        from openai import OpenAI
+    except ImportError:  # pragma: no cover - graceful fallback when SDK is missing
+        return None
+    return OpenAI
+
+
+def _build_llm_client(
+    api_key: Optional[str],
+    api_base: Optional[str],
+    *,
+    endpoint_specs: Optional[List[str]] = None,
+    endpoints_file: Optional[Path] = None,
+    max_failures: int = 3,
+    cooldown: float = 30.0,
+    transport: Optional[TransportConfig] = None,
+) -> Any:
+    from .llm.transport import TransportConfig, build_http_client
+
+    OpenAI = _openai_client_class()
     if OpenAI is None:
         raise RuntimeError(
             "未检测到 openai SDK，请先安装 `pip install openai` 以启用大模型工作流。"
         )
 
-    resolved_key = api_key or os.environ.get("DEEPSEEK_API_KEY") or os.environ.get("OPENAI_API_KEY")
-    if not resolved_key:
-        raise RuntimeError(
-            "请通过 --llm-api-key 或环境变量 DEEPSEEK_API_KEY/OPENAI_API_KEY 提供大模型凭证。"
-        )
+    configs: List[EndpointConfig] = []
+    if endpoints_file is not None:
+        configs.extend(load_endpoint_configs(endpoints_file))
+    configs.extend(parse_endpoint_spec(spec) for spec in endpoint_specs or [])
+
+    if not configs:
+        resolved_key = api_key or os.environ.get("DEEPSEEK_API_KEY") or os.environ.get("OPENAI_API_KEY")
+        if not resolved_key:
+            raise RuntimeError(
+                "请通过 --llm-api-key 或环境变量 DEEPSEEK_API_KEY/OPENAI_API_KEY 提供大模型凭证。"
+            )
+        base_url = api_base or os.environ.get("DEEPSEEK_API_BASE") or os.environ.get("OPENAI_BASE_URL")
+        configs.append(EndpointConfig(api_key=resolved_key, base_url=base_url))
 
-    base_url = api_base or os.environ.get("DEEPSEEK_API_BASE") or os.environ.get("OPENAI_BASE_URL")
-    kwargs = {"api_key": resolved_key}
-    if base_url:
-        kwargs["base_url"] = base_url
-    return OpenAI(**kwargs)
+    # One pooled HTTP client for every endpoint keeps warm connections shared across stages.
+    transport = transport or TransportConfig()
+    http_client = build_http_client(transport)
+
+    def client_factory(config: EndpointConfig) -> Any:
+        kwargs = {"api_key": config.api_key, "http_client": http_client, "timeout": transport.timeout()}
+        if config.base_url:
+            kwargs["base_url"] = config.base_url
+        return OpenAI(**kwargs)
+
+    pool = ClientPool.from_configs(
+        configs, client_factory, max_failures=max_failures, cooldown=cooldown
+    )
+    metrics.add_section("LLM endpoint 吞吐", pool.report_lines)
+    return pool
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from typing import Callable, Iterable, List, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def run_concurrently(func: Callable[[T], R], items: Iterable[T], max_workers: int = 1) -> List[R]:
+    """Apply ``func`` to every item, using up to ``max_workers`` threads.
+
+    Results keep the input order. With ``max_workers <= 1`` the items are
+    processed sequentially in the calling thread, and the first exception
+    propagates exactly as in a plain loop.
+    """
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
@@ -0,0 +1,165 @@
+"""Persistent inverted index over a parsed corpus for query-driven sub-reviews.
+
+Titles, abstracts, authors and venues are tokenized with
+:func:`~paper_review.text.terms` (Latin words and CJK bigrams) and stored in
+SQLite: one row per term holding its packed postings (paper ids and term
+frequencies), one row per paper holding the serialized entry. A query only
+reads the postings of its own terms, so selecting the top-N papers of a
+200k-paper bibliography does not rescan or re-parse it. Ranking is BM25.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import sqlite3
+import time
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .metrics import metrics
+from .models import PaperEntry
+from .retrieval import BM25_B, BM25_K1
+from .serialization import paper_from_dict, paper_to_dict
+from .text import terms
+
+INDEX_FORMAT = 1
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value NOT NULL);
+CREATE TABLE papers (id INTEGER PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE postings (term TEXT PRIMARY KEY, df INTEGER NOT NULL, ids BLOB NOT NULL, tfs BLOB NOT NULL)
+    WITHOUT ROWID;
+"""
+
+
+def _document_terms(paper: PaperEntry) -> List[str]:
+    # The title is the densest signal, so it is counted twice (as in category retrieval).
+    return terms(
+        "\n".join([paper.title, paper.title, paper.abstract, " ".join(paper.authors), paper.venue])
+    )
+
+
+def build_index(path: Path, papers: Sequence[PaperEntry], source: Dict[str, Any]) -> "CorpusIndex":
+    """Write a fresh index for ``papers`` to ``path`` and open it."""
+    started = time.perf_counter()
+    postings: Dict[str, Tuple[array, array]] = {}
+    lengths = array("I")
+    for position, paper in enumerate(papers):
+        counts = Counter(_document_terms(paper))
+        lengths.append(sum(counts.values()))
+        for term, frequency in counts.items():
+            entry = postings.get(term)
+            if entry is None:
+                entry = postings[term] = (array("I"), array("H"))
+            entry[0].append(position)
+            entry[1].append(min(frequency, 0xFFFF))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    connection = sqlite3.connect(str(tmp_path))
+    try:
+        connection.executescript(_SCHEMA)
+        connection.executemany(
+            "INSERT INTO papers (id, data) VALUES (?, ?)",
+            (
+                (position, json.dumps(paper_to_dict(paper), ensure_ascii=False))
+                for position, paper in enumerate(papers)
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO postings (term, df, ids, tfs) VALUES (?, ?, ?, ?)",
+            ((term, len(ids), ids.tobytes(), tfs.tobytes()) for term, (ids, tfs) in postings.items()),
+        )
+        meta = {
+            "format": INDEX_FORMAT,
+            "count": len(papers),
+            "average_length": (sum(lengths) / len(lengths)) if lengths else 0.0,
+            "source": source,
+        }
+        connection.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value, ensure_ascii=False)) for key, value in meta.items()]
+            + [("lengths", lengths.tobytes())],
+        )
+        connection.commit()
+    finally:
+        connection.close()
+    tmp_path.replace(path)
+    metrics.increment("index.built_papers", len(papers))
+    elapsed = time.perf_counter() - started
+    print(f"已为 {len(papers)} 篇文献建立检索索引（{len(postings)} 个词项，耗时 {elapsed:.1f}s）: {path}")
+    return CorpusIndex(path)
+
+
+class CorpusIndex:
+    """Read side of an index written by :func:`build_index`."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        meta = dict(self._connection.execute("SELECT key, value FROM meta").fetchall())
+        if json.loads(meta.get("format", "0")) != INDEX_FORMAT:
+            self._connection.close()
+            raise ValueError(f"{path} 的索引格式不受支持，请重新建立索引。")
+        self.count = int(json.loads(meta["count"]))
+        self.average_length = float(json.loads(meta["average_length"])) or 1.0
+        self.source: Dict[str, Any] = json.loads(meta["source"])
+        self._lengths = array("I")
+        self._lengths.frombytes(meta["lengths"])
+
+    @staticmethod
+    def read_source(path: Path) -> Optional[Dict[str, Any]]:
+        """Return the recorded source description of the index at ``path``, if readable."""
+        try:
+            connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        except sqlite3.Error:
+            return None
+        try:
+            row = connection.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        except sqlite3.Error:
+            return None
+        finally:
+            connection.close()
+        return json.loads(row[0]) if row else None
+
+    def search(self, query: str, top_n: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Return ``(paper id, score)`` pairs of matching papers, best first; ties keep corpus order."""
+        query_counts = Counter(terms(query))
+        if not query_counts:
+            return []
+        scores: Dict[int, float] = {}
+        lengths = self._lengths
+        for term, query_frequency in query_counts.items():
+            row = self._connection.execute("SELECT df, ids, tfs FROM postings WHERE term = ?", (term,)).fetchone()
+            if row is None:
+                continue
+            df, raw_ids, raw_tfs = row
+            ids, tfs = array("I"), array("H")
+            ids.frombytes(raw_ids)
+            tfs.frombytes(raw_tfs)
+            idf = query_frequency * math.log(1 + (self.count - df + 0.5) / (df + 0.5))
+            for paper_id, frequency in zip(ids, tfs):
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[paper_id] / self.average_length)
+                gain = idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                scores[paper_id] = scores.get(paper_id, 0.0) + gain
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        metrics.increment("index.queries")
+        return ranked if top_n is None else ranked[:top_n]
+
+    def papers(self, ids: Sequence[int]) -> List[PaperEntry]:
+        """Load the stored entries for ``ids`` in the given order."""
+        rows: Dict[int, str] = {}
+        for start in range(0, len(ids), 500):
+            chunk = list(ids[start : start + 500])
+            placeholders = ",".join("?" * len(chunk))
+            query = f"SELECT id, data FROM papers WHERE id IN ({placeholders})"
+            rows.update(self._connection.execute(query, chunk).fetchall())
+        return [paper_from_dict(json.loads(rows[paper_id])) for paper_id in ids]
+
+    def close(self) -> None:
+        self._connection.close()
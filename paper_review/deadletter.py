@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from .models import PaperEntry
+
+STAGE_LABELS = {"classify": "分类", "summary": "摘要"}
+
+
+@dataclass
+class DeadLetter:
+    """A paper whose stage failed, kept aside for a later retry pass."""
+
+    paper: PaperEntry
+    stage: str
+    error: str
+    attempts: int
+
+    def to_record(self) -> Dict[str, object]:
+        return {
+            "key": self.paper.key,
+            "id": self.paper.id,
+            "title": self.paper.title,
+            "stage": self.stage,
+            "error": self.error,
+            "attempts": self.attempts,
+        }
+
+
+class DeadLetterQueue:
+    """Thread-safe collection of per-paper failures, grouped by stage.
+
+    Letters are keyed by the entry object itself rather than ``paper.key``,
+    so entries that happen to share a key (e.g. from separately numbered
+    files) never overwrite each other's failures.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._letters: Dict[Tuple[int, str], DeadLetter] = {}
+        self._attempts: Dict[Tuple[int, str], int] = {}
+
+    def add(self, paper: PaperEntry, stage: str, error: BaseException) -> DeadLetter:
+        key = (id(paper), stage)
+        message = f"{type(error).__name__}: {error}"
+        with self._lock:
+            attempts = self._attempts.get(key, 0) + 1
+            self._attempts[key] = attempts
+            letter = DeadLetter(paper=paper, stage=stage, error=message, attempts=attempts)
+            self._letters[key] = letter
+        return letter
+
+    def take(self, stage: str) -> List[DeadLetter]:
+        """Remove and return the letters of ``stage``, in paper order, for a retry."""
+        with self._lock:
+            keys = [key for key in self._letters if key[1] == stage]
+            letters = [self._letters.pop(key) for key in keys]
+        return sorted(letters, key=lambda letter: letter.paper.id)
+
+    def letters(self) -> List[DeadLetter]:
+        with self._lock:
+            letters = list(self._letters.values())
+        return sorted(letters, key=lambda letter: (letter.paper.id, letter.stage))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._letters)
+
+    def merge(self, other: "DeadLetterQueue") -> None:
+        """Copy the letters of ``other`` into this queue, e.g. shared summary failures."""
+        for letter in other.letters():
+            with self._lock:
+                self._letters[(id(letter.paper), letter.stage)] = letter
+
+    def write_jsonl(self, path: Path) -> None:
+        with path.open("w", encoding="utf-8") as handle:
+            for letter in self.letters():
+                handle.write(json.dumps(letter.to_record(), ensure_ascii=False) + "\n")
+
+
+def mark_failed(paper: PaperEntry, stage: str, error: str) -> None:
+    """Record a final failure on ``paper`` so that the exporter can flag it."""
+    paper.errors[stage] = error
+    if stage == "classify":
+        paper.main_category = None
+        paper.sub_category = None
+    elif stage == "summary":
+        title = f"《{paper.title}》" if paper.title else ""
+        paper.summary_zh = f"{paper.first_author}等人{title}"
+
+
+def write_failed_report(papers: Iterable[PaperEntry], path: Path) -> int:
+    """Write one ``failed.jsonl`` line per failed stage; remove a stale report if none failed."""
+    count = 0
+    lines: List[str] = []
+    for paper in papers:
+        if not paper.errors:
+            continue
+        count += 1
+        for stage, error in sorted(paper.errors.items()):
+            record = {"key": paper.key, "id": paper.id, "title": paper.title, "stage": stage, "error": error}
+            lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+    if lines:
+        path.write_text("".join(lines), encoding="utf-8")
+    elif path.exists():
+        path.unlink()
+    return count
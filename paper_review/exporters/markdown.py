@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from ..deadletter import STAGE_LABELS
 from ..models import CategoryNode, PaperEntry
+from .stats import CorpusStats, SectionStats, SectionStatsBuilder
 
 
 def export_markdown(
@@ -11,98 +14,169 @@ def export_markdown(
     schema: Dict[str, CategoryNode],
     out_path: Path,
     sort_by_year: str,
+    stats_path: Optional[Path] = None,
 ) -> None:
+    """Write the grouped review; with ``stats_path`` also write the section statistics as JSON.
+
+    Papers are grouped and fed to the statistics builder in one pass over the
+    input order; no section is rescanned afterwards. ``sort_by_year`` only
+    orders the papers listed in each section.
+    """
     main_nodes = [node for node in schema.values() if node.parent is None]
     main_name_order = [node.name for node in main_nodes]
 
+    def sort_key(item: PaperEntry) -> int:
+        if sort_by_year == "none":
+            return 0
+        return item.year if item.year is not None else -9999
+
+    reverse = sort_by_year == "desc"
+
+    builder = SectionStatsBuilder()
     uncategorized: List[PaperEntry] = []
     by_main_sub: Dict[str, Dict[Optional[str], List[PaperEntry]]] = {}
     for paper in papers:
         if not paper.main_category:
             uncategorized.append(paper)
+            builder.add(paper, None, None)
             continue
         main_name = paper.main_category
         sub_name = paper.sub_category
         by_main_sub.setdefault(main_name, {}).setdefault(sub_name, []).append(paper)
+        builder.add(paper, main_name, sub_name)
+    stats = builder.build()
 
-    def sort_key(item: PaperEntry) -> int:
-        if sort_by_year == "none":
-            return 0
-        year = item.year if item.year is not None else -9999
-        return year
-
-    reverse = sort_by_year == "desc"
-
-    lines: List[str] = []
-    lines.append("# 文献综述整理草稿（按大类/小类分组)\n")
-
+    layout: List[Tuple[str, List[Optional[str]]]] = []
     for main_name in main_name_order:
         if main_name not in by_main_sub:
             continue
-        lines.append(f"\n## {main_name}\n")
         sub_dict = by_main_sub[main_name]
         declared_children = schema[main_name].children
         extra_children = [name for name in sub_dict.keys() if name is not None and name not in declared_children]
         all_sub_names: List[Optional[str]] = declared_children + extra_children + [None]
+        layout.append((main_name, [name for name in all_sub_names if sub_dict.get(name)]))
+
+    lines: List[str] = []
+    lines.append("# 文献综述整理草稿（按大类/小类分组)\n")
+    if papers:
+        lines.append(_build_corpus_overview(stats) + "\n")
+
+    for main_name, sub_names in layout:
+        lines.append(f"\n## {main_name}\n")
+        lines.append(_build_main_overview(stats.main(main_name), len(sub_names)) + "\n")
+        sub_dict = by_main_sub[main_name]
 
-        for sub_name in all_sub_names:
-            items = sub_dict.get(sub_name, [])
-            if not items:
-                continue
+        for sub_name in sub_names:
+            items = sub_dict[sub_name]
             heading = sub_name if sub_name is not None else "未指定小类"
+            section = stats.section(main_name, sub_name)
             lines.append(f"\n### {heading}\n")
-            overview = _build_subcategory_overview(heading, items)
+            overview = _build_subcategory_overview(heading, section)
             lines.append(overview + "\n")
 
-            items_sorted = sorted(items, key=sort_key, reverse=reverse)
-            for paper in items_sorted:
-                lines.append(f"{paper.summary_zh}")
+            for paper in sorted(items, key=sort_key, reverse=reverse):
+                lines.append(_render_paper(paper))
 
-            summary_para = _build_subcategory_summary(heading, items)
+            summary_para = _build_subcategory_summary(heading, section, items)
             lines.append("\n" + summary_para + "\n")
 
     if uncategorized:
+        section = stats.section(None, None)
         lines.append("\n## 未分类\n")
-        items_sorted = sorted(uncategorized, key=sort_key, reverse=reverse)
-        overview = _build_subcategory_overview("未指定小类", items_sorted)
+        overview = _build_subcategory_overview("未指定小类", section)
         lines.append(overview + "\n")
 
+        items_sorted = sorted(uncategorized, key=sort_key, reverse=reverse)
         for paper in items_sorted:
-            lines.append(f"{paper.summary_zh}")
+            lines.append(_render_paper(paper))
 
-        summary_para = _build_subcategory_summary("未指定小类", items_sorted)
+        summary_para = _build_subcategory_summary("未指定小类", section, items_sorted)
         lines.append("\n" + summary_para + "\n")
 
     out_path.write_text("\n".join(lines), encoding="utf-8")
+    if stats_path is not None:
+        write_stats(stats, layout, stats_path)
 
 
-def _build_subcategory_overview(sub_name: Optional[str], papers: List[PaperEntry]) -> str:
-    if not papers:
-        return "本小类当前尚无归入的研究工作。"
+def write_stats(
+    stats: CorpusStats, layout: Sequence[Tuple[str, Sequence[Optional[str]]]], stats_path: Path
+) -> None:
+    stats_path.write_text(json.dumps(stats.to_dict(layout), ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def _render_paper(paper: PaperEntry) -> str:
+    if not paper.errors:
+        return f"{paper.summary_zh}"
+    stages = "、".join(STAGE_LABELS.get(stage, stage) for stage in sorted(paper.errors))
+    return f"{paper.summary_zh} ⚠️（{stages}失败，详见 failed.jsonl）"
+
+
+def _year_span(stats: SectionStats) -> str:
+    year_min, year_max = stats.year_min, stats.year_max
+    if year_min is None or year_max is None:
+        return ""
+    return f"{year_min} 年" if year_min == year_max else f"{year_min}–{year_max} 年"
+
 
-    year_values = [paper.year for paper in papers if paper.year is not None]
-    year_min = min(year_values) if year_values else None
-    year_max = max(year_values) if year_values else None
-    count = len(papers)
+def _ranked(entries: List[Tuple[str, int]]) -> str:
+    # Entries seen only once say nothing about where a topic concentrates.
+    return "、".join(f"{name}（{count} 篇）" for name, count in entries if count > 1)
 
+
+def _venue_author_sentence(stats: SectionStats) -> str:
+    parts = []
+    venues = _ranked(stats.top_venues)
+    if venues:
+        parts.append(f"主要发表于 {venues}")
+    authors = _ranked(stats.top_authors)
+    if authors:
+        parts.append(f"高产作者包括 {authors}")
+    return "；".join(parts) + "。" if parts else ""
+
+
+def _build_corpus_overview(stats: CorpusStats) -> str:
+    total = stats.total
+    uncategorized = stats.main(None).count
+    categorized_part = f"（已分类 {total.count - uncategorized} 篇，未分类 {uncategorized} 篇）" if uncategorized else ""
+    span = _year_span(total)
+    span_part = f"，时间范围 {span}" if span else ""
+    return f"本综述共收录 {total.count} 篇文献{categorized_part}{span_part}。"
+
+
+def _build_main_overview(stats: SectionStats, sub_count: int) -> str:
+    span = _year_span(stats)
+    span_part = f"，时间范围 {span}" if span else ""
+    text = f"本大类共收录 {stats.count} 篇文献，分布在 {sub_count} 个小类{span_part}。"
+    if len(stats.year_histogram) > 1:
+        histogram = "、".join(f"{year}（{count}）" for year, count in stats.year_histogram.items())
+        text += f"年份分布：{histogram}。"
+    if stats.missing_year:
+        text += f"另有 {stats.missing_year} 篇未标注年份。"
+    # With a single sub-category its own overview already lists the same venues and authors.
+    return text + _venue_author_sentence(stats) if sub_count > 1 else text
+
+
+def _build_subcategory_overview(sub_name: Optional[str], stats: SectionStats) -> str:
+    if not stats.count:
+        return "本小类当前尚无归入的研究工作。"
+
+    year_min, year_max = stats.year_min, stats.year_max
     name_part = "这一小类" if sub_name in (None, "未指定小类") else f"“{sub_name}”这一小类"
     year_part = ""
     if year_min and year_max:
         year_part = f"，时间范围集中在 {year_min} 年左右" if year_min == year_max else f"，时间范围大致覆盖 {year_min}–{year_max} 年"
+    peak = stats.peak_year
+    if peak is not None and len(stats.year_histogram) > 1 and peak[1] > 1:
+        year_part += f"，发表高峰为 {peak[0]} 年（{peak[1]} 篇）"
 
-    return f"{name_part}主要汇总了 {count} 篇相关工作{year_part}。"
+    return f"{name_part}主要汇总了 {stats.count} 篇相关工作{year_part}。" + _venue_author_sentence(stats)
 
 
-def _build_subcategory_summary(sub_name: Optional[str], papers: List[PaperEntry]) -> str:
-    if not papers:
+def _build_subcategory_summary(sub_name: Optional[str], stats: SectionStats, papers: List[PaperEntry]) -> str:
+    if not stats.count:
         return "综合来看，该小类尚未归入具体文献，后续可以根据研究进展进一步补充。"
 
-    years = [paper.year for paper in papers if paper.year is not None]
-    year_span = ""
-    if years:
-        ymin, ymax = min(years), max(years)
-        year_span = f"{ymin} 年" if ymin == ymax else f"{ymin}–{ymax} 年"
-
+    year_span = _year_span(stats)
     representatives = [paper.first_author for paper in papers[:3]]
     reps_str = "、".join(representatives) if representatives else "若干学者"
     name_part = "这一小类" if sub_name in (None, "未指定小类") else f"“{sub_name}”这一小类"
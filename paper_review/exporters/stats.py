@@ -0,0 +1,303 @@
+"""Per-section statistics for the Markdown export, aggregated in one pass.
+
+The exporter feeds every paper to :class:`SectionStatsBuilder` while it
+groups papers into sections; :meth:`SectionStatsBuilder.build` then counts
+papers, years, venues and authors for every sub-section, every main
+category and the whole corpus at once. Venues and authors are interned to
+integer ids, and the grouped counts are taken
+with NumPy (``bincount``/``unique`` on combined keys) when it is installed,
+otherwise with one ``Counter`` pass over the same ids. Both backends rank
+top entries by count, then by name, so their output is identical.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..models import PaperEntry
+
+STATS_NAME = "stats.json"
+TOP_K = 5
+# Placeholder author written by the parsers when a record has none.
+_UNKNOWN_AUTHOR = "Unknown"
+
+SectionKey = Tuple[Optional[str], Optional[str]]
+
+
+@dataclass
+class SectionStats:
+    """Counts for one section: a sub-category, a main category or the whole corpus."""
+
+    count: int = 0
+    missing_year: int = 0
+    year_histogram: Dict[int, int] = field(default_factory=dict)
+    top_venues: List[Tuple[str, int]] = field(default_factory=list)
+    top_authors: List[Tuple[str, int]] = field(default_factory=list)
+
+    @property
+    def year_min(self) -> Optional[int]:
+        return min(self.year_histogram) if self.year_histogram else None
+
+    @property
+    def year_max(self) -> Optional[int]:
+        return max(self.year_histogram) if self.year_histogram else None
+
+    @property
+    def peak_year(self) -> Optional[Tuple[int, int]]:
+        """The year with the most papers (the earliest one on ties) and its count."""
+        if not self.year_histogram:
+            return None
+        return min(self.year_histogram.items(), key=lambda item: (-item[1], item[0]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "year_min": self.year_min,
+            "year_max": self.year_max,
+            "missing_year": self.missing_year,
+            "year_histogram": {str(year): count for year, count in sorted(self.year_histogram.items())},
+            "top_venues": [{"name": name, "count": count} for name, count in self.top_venues],
+            "top_authors": [{"name": name, "count": count} for name, count in self.top_authors],
+        }
+
+
+@dataclass
+class CorpusStats:
+    """Statistics for every section of one export."""
+
+    total: SectionStats
+    mains: Dict[Optional[str], SectionStats]
+    sections: Dict[SectionKey, SectionStats]
+
+    def section(self, main_name: Optional[str], sub_name: Optional[str]) -> SectionStats:
+        return self.sections.get((main_name, sub_name)) or SectionStats()
+
+    def main(self, main_name: Optional[str]) -> SectionStats:
+        return self.mains.get(main_name) or SectionStats()
+
+    def to_dict(self, layout: Sequence[Tuple[str, Sequence[Optional[str]]]]) -> Dict[str, Any]:
+        """JSON layout following the report: ``layout`` lists ``(main, [sub, ...])`` in output order."""
+        mains = []
+        for main_name, sub_names in layout:
+            entry = {"name": main_name, **self.main(main_name).to_dict()}
+            entry["sub_categories"] = [
+                {"name": sub_name, **self.section(main_name, sub_name).to_dict()} for sub_name in sub_names
+            ]
+            mains.append(entry)
+        uncategorized = self.mains.get(None)
+        return {
+            "total": self.total.to_dict(),
+            "main_categories": mains,
+            "uncategorized": uncategorized.to_dict() if uncategorized is not None else None,
+        }
+
+
+class SectionStatsBuilder:
+    """Collect papers section by section and aggregate all statistics in one go.
+
+    ``use_numpy`` forces a backend; by default NumPy is used when importable.
+    """
+
+    def __init__(self, top_k: int = TOP_K, use_numpy: Optional[bool] = None) -> None:
+        self.top_k = top_k
+        self.use_numpy = use_numpy
+        self._section_ids: Dict[SectionKey, int] = {}
+        self._papers: List[PaperEntry] = []
+        self._paper_sections: List[int] = []
+
+    def add(self, paper: PaperEntry, main_name: Optional[str], sub_name: Optional[str]) -> None:
+        """Record ``paper`` under its section; ``main_name=None`` is the uncategorized section."""
+        key = (main_name, sub_name if main_name is not None else None)
+        self._paper_sections.append(self._section_ids.setdefault(key, len(self._section_ids)))
+        self._papers.append(paper)
+
+    def build(self) -> CorpusStats:
+        sections = list(self._section_ids)
+        main_ids: Dict[Optional[str], int] = {}
+        for main_name, _ in sections:
+            main_ids.setdefault(main_name, len(main_ids))
+        # Group ids: sections first, then main categories, then the whole corpus.
+        section_main = [len(sections) + main_ids[main_name] for main_name, _ in sections]
+        total_group = len(sections) + len(main_ids)
+        groups = total_group + 1
+
+        papers, paper_sections = self._papers, self._paper_sections
+        years = [paper.year if paper.year is not None else -1 for paper in papers]
+        venue_values = [paper.venue.strip() for paper in papers]
+        venue_sections = [section for section, venue in zip(paper_sections, venue_values) if venue]
+        venue_names, venues = _intern([venue for venue in venue_values if venue])
+        author_sections: List[int] = []
+        author_values: List[str] = []
+        for section, paper in zip(paper_sections, papers):
+            # An author listed twice on one paper still counts once for it.
+            names = [name for name in dict.fromkeys(paper.authors) if name and name != _UNKNOWN_AUTHOR]
+            author_values.extend(names)
+            author_sections.extend([section] * len(names))
+        author_names, authors = _intern(author_values)
+
+        numpy = _import_numpy() if self.use_numpy is not False else None
+        if self.use_numpy and numpy is None:
+            raise RuntimeError("未安装 numpy，无法使用向量化统计。请先 `pip install numpy`")
+        counter = _NumpyCounter(numpy, section_main, total_group) if numpy is not None else (
+            _PythonCounter(section_main, total_group)
+        )
+
+        paper_counts = counter.counts(paper_sections, groups)
+        year_counts = counter.grouped(paper_sections, years, groups)
+        top_venues = counter.top(venue_sections, venues, groups, _ranks(venue_names), self.top_k)
+        top_authors = counter.top(author_sections, authors, groups, _ranks(author_names), self.top_k)
+
+        results: List[SectionStats] = []
+        for group in range(groups):
+            histogram = year_counts[group]
+            missing = histogram.pop(-1, 0)
+            results.append(
+                SectionStats(
+                    count=paper_counts[group],
+                    missing_year=missing,
+                    year_histogram=dict(sorted(histogram.items())),
+                    top_venues=[(venue_names[value], count) for value, count in top_venues[group]],
+                    top_authors=[(author_names[value], count) for value, count in top_authors[group]],
+                )
+            )
+        return CorpusStats(
+            total=results[total_group],
+            mains={main_name: results[len(sections) + index] for main_name, index in main_ids.items()},
+            sections={key: results[index] for index, key in enumerate(sections)},
+        )
+
+
+def _import_numpy() -> Any:
+    try:
+        import numpy  # type: ignore
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return numpy
+
+
+def _intern(values: List[str]) -> Tuple[List[str], List[int]]:
+    """Return the distinct names in first-seen order and the id of every value."""
+    distinct = list(dict.fromkeys(values))
+    ids = {name: index for index, name in enumerate(distinct)}
+    return distinct, [ids[name] for name in values]
+
+
+def _ranks(names: List[str]) -> List[int]:
+    """Alphabetical rank of every interned name, used to break count ties."""
+    ranks = [0] * len(names)
+    for rank, index in enumerate(sorted(range(len(names)), key=names.__getitem__)):
+        ranks[index] = rank
+    return ranks
+
+
+class _PythonCounter:
+    """Counter-based backend: each level is counted over packed ``(group, value)`` keys in one pass."""
+
+    def __init__(self, section_main: List[int], total_group: int) -> None:
+        self.section_main = section_main
+        self.total_group = total_group
+
+    def counts(self, sections: List[int], groups: int) -> List[int]:
+        result = [0] * groups
+        for section, count in Counter(sections).items():
+            for group in (section, self.section_main[section], self.total_group):
+                result[group] += count
+        return result
+
+    def grouped(self, sections: List[int], values: List[int], groups: int) -> List[Dict[int, int]]:
+        result: List[Dict[int, int]] = [{} for _ in range(groups)]
+        if not values:
+            return result
+        # Pairs are packed into plain ints: millions of tuple keys would keep the GC busy.
+        low = min(values)
+        width = max(values) - low + 1
+        section_main = self.section_main
+        section_keys = [section * width + value - low for section, value in zip(sections, values)]
+        main_keys = [section_main[section] * width + value - low for section, value in zip(sections, values)]
+        for keys in (section_keys, main_keys):
+            for key, count in Counter(keys).items():
+                group, value = divmod(key, width)
+                result[group][value + low] = count
+        result[self.total_group] = dict(Counter(values))
+        return result
+
+    def top(
+        self, sections: List[int], values: List[int], groups: int, ranks: List[int], k: int
+    ) -> List[List[Tuple[int, int]]]:
+        by_rank = [0] * len(ranks)
+        for value, rank in enumerate(ranks):
+            by_rank[rank] = value
+        return [_top_k(counts, ranks, by_rank, k) for counts in self.grouped(sections, values, groups)]
+
+
+def _top_k(counts: Dict[int, int], ranks: List[int], by_rank: List[int], k: int) -> List[Tuple[int, int]]:
+    if k <= 0 or not counts:
+        return []
+    # Packed sort key ``rank - count * size``: higher counts first, then names in order.
+    size = len(ranks)
+    if len(counts) > k:
+        # Only values reaching the k-th largest count can be in the result.
+        threshold = heapq.nlargest(k, counts.values())[-1]
+        keys = [ranks[value] - count * size for value, count in counts.items() if count >= threshold]
+    else:
+        keys = [ranks[value] - count * size for value, count in counts.items()]
+    return [(by_rank[key % size], -(key // size)) for key in heapq.nsmallest(k, keys)]
+
+
+class _NumpyCounter:
+    """Vectorized backend: occurrences are counted on combined ``group * width + value`` keys."""
+
+    def __init__(self, numpy: Any, section_main: List[int], total_group: int) -> None:
+        self.np = numpy
+        self.section_main = numpy.asarray(section_main, dtype=numpy.int64)
+        self.total_group = total_group
+
+    def _expand(self, sections: List[int]) -> Any:
+        np = self.np
+        own = np.asarray(sections, dtype=np.int64)
+        if not len(own):
+            return own
+        return np.concatenate([own, self.section_main[own], np.full(len(own), self.total_group, dtype=np.int64)])
+
+    def counts(self, sections: List[int], groups: int) -> List[int]:
+        return self.np.bincount(self._expand(sections), minlength=groups).tolist()
+
+    def _pairs(self, sections: List[int], values: List[int]) -> Tuple[Any, Any, Any]:
+        np = self.np
+        group_ids = self._expand(sections)
+        if not len(group_ids):
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        own_values = np.asarray(values, dtype=np.int64)
+        value_ids = np.tile(own_values, 3)
+        low = int(value_ids.min())
+        width = int(value_ids.max()) - low + 1
+        keys, counts = np.unique(group_ids * width + (value_ids - low), return_counts=True)
+        return keys // width, keys % width + low, counts
+
+    def grouped(self, sections: List[int], values: List[int], groups: int) -> List[Dict[int, int]]:
+        result: List[Dict[int, int]] = [{} for _ in range(groups)]
+        group_ids, value_ids, counts = self._pairs(sections, values)
+        for group, value, count in zip(group_ids.tolist(), value_ids.tolist(), counts.tolist()):
+            result[group][value] = count
+        return result
+
+    def top(
+        self, sections: List[int], values: List[int], groups: int, ranks: List[int], k: int
+    ) -> List[List[Tuple[int, int]]]:
+        np = self.np
+        result: List[List[Tuple[int, int]]] = [[] for _ in range(groups)]
+        group_ids, value_ids, counts = self._pairs(sections, values)
+        if not len(group_ids) or k <= 0:
+            return result
+        # Sort by group, then count descending, then name; keep the first k rows of each group.
+        order = np.lexsort((np.asarray(ranks, dtype=np.int64)[value_ids], -counts, group_ids))
+        group_ids, value_ids, counts = group_ids[order], value_ids[order], counts[order]
+        starts = np.searchsorted(group_ids, group_ids, side="left")
+        keep = np.arange(len(group_ids)) - starts < k
+        for group, value, count in zip(group_ids[keep].tolist(), value_ids[keep].tolist(), counts[keep].tolist()):
+            result[group].append((value, count))
+        return result
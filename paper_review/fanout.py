@@ -0,0 +1,99 @@
+"""Review specs for producing several reviews of one corpus in a single run.
+
+Each :class:`ReviewSpec` names an output subdirectory and the schema/sort
+settings of one review. :meth:`ReviewPipeline.run_many` parses the corpus and
+summarizes every paper once, then classifies and exports once per spec.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+SORT_CHOICES = ("none", "asc", "desc")
+_NAME_PATTERN = re.compile(r"^[\w.-]+$")
+
+
+@dataclass
+class ReviewSpec:
+    """Schema and export settings of one review; ``name`` is its output subdirectory."""
+
+    name: str
+    categories: Optional[Path] = None
+    n_main: Optional[int] = None
+    m_sub: Optional[int] = None
+    sort_by_year: str = "none"
+
+
+def parse_review_spec(spec: str) -> Dict[str, Any]:
+    """Parse ``key=value`` pairs such as ``name=topics,categories=a.yaml,sort_by_year=desc``."""
+    fields: Dict[str, Any] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "=" not in part:
+            raise ValueError(f"无法解析综述配置片段“{part}”，应为 key=value 形式。")
+        key, value = part.split("=", 1)
+        fields[key.strip()] = value.strip()
+    return fields
+
+
+def load_review_specs(path: Path) -> List[Dict[str, Any]]:
+    """Load review definitions from a YAML or JSON list (or a mapping with a ``reviews`` list)."""
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() == ".json":
+        data = json.loads(text)
+    else:
+        try:
+            import yaml  # type: ignore
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("未安装 pyyaml，无法解析 YAML。请先 `pip install pyyaml`") from exc
+        data = yaml.safe_load(text)
+
+    if isinstance(data, dict):
+        data = data.get("reviews")
+    if not isinstance(data, list) or not data:
+        raise ValueError(f"{path} 中未找到综述配置列表。")
+    if not all(isinstance(item, dict) for item in data):
+        raise ValueError("每个综述配置应为包含 name/categories 等字段的映射。")
+    # Relative schema paths are resolved against the specs file, like includes.
+    for item in data:
+        categories = item.get("categories")
+        if categories and not Path(str(categories)).is_absolute():
+            item["categories"] = str(path.parent / str(categories))
+    return data
+
+
+def build_review_specs(items: Sequence[Dict[str, Any]], defaults: Dict[str, Any]) -> List[ReviewSpec]:
+    """Validate raw spec mappings, filling unset fields from ``defaults``."""
+    specs: List[ReviewSpec] = []
+    for index, item in enumerate(items, start=1):
+        unknown = sorted(set(item) - {"name", "categories", "n_main", "m_sub", "sort_by_year"})
+        if unknown:
+            raise ValueError(f"综述配置中有不支持的字段：{', '.join(unknown)}")
+        merged = {**defaults, **{key: value for key, value in item.items() if value not in (None, "")}}
+        name = str(merged.get("name") or f"review-{index}")
+        if not _NAME_PATTERN.match(name):
+            raise ValueError(f"综述名称“{name}”只能包含字母、数字、下划线、点与连字符。")
+        sort_by_year = str(merged.get("sort_by_year") or "none")
+        if sort_by_year not in SORT_CHOICES:
+            raise ValueError(f"综述“{name}”的 sort_by_year 取值应为 {'/'.join(SORT_CHOICES)}。")
+        categories = merged.get("categories")
+        specs.append(
+            ReviewSpec(
+                name=name,
+                categories=Path(str(categories)) if categories else None,
+                n_main=int(merged["n_main"]) if merged.get("n_main") is not None else None,
+                m_sub=int(merged["m_sub"]) if merged.get("m_sub") is not None else None,
+                sort_by_year=sort_by_year,
+            )
+        )
+    names = [spec.name for spec in specs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"综述名称重复：{', '.join(duplicates)}")
+    return specs
@@ -0,0 +1,14 @@
+"""Helpers shared by every component that talks to a chat-completions API."""
+
+from .pool import ClientPool, EndpointConfig, load_endpoint_configs, parse_endpoint_spec
+from .streaming import JSONObjectScanner, complete_json, stream_timings
+
+__all__ = [
+    "ClientPool",
+    "EndpointConfig",
+    "JSONObjectScanner",
+    "complete_json",
+    "load_endpoint_configs",
+    "parse_endpoint_spec",
+    "stream_timings",
+]
@@ -0,0 +1,278 @@
+"""Record chat completions to a compressed cassette and replay them offline.
+
+:class:`RecordingClient` wraps the real client and appends every request's
+answer, token usage and latency to a gzip-compressed JSONL cassette.
+:class:`ReplayClient` serves those answers for identical requests without a
+network or credentials, optionally sleeping for the recorded latencies, so
+the full ``ReviewPipeline.run`` path can be benchmarked on production-sized
+workloads offline.
+
+Requests are matched on their body without ``stream``/``timeout``, so a
+recording made without streaming replays with ``--llm-stream`` and vice versa.
+Repeated identical requests are answered in recording order.
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..metrics import metrics
+
+# Transport-level arguments that do not change what the model is asked.
+_IGNORED_KEYS = {"stream", "stream_options", "timeout", "extra_headers"}
+# Records are compressed in members of this many lines; a crash loses at most one member.
+_FLUSH_EVERY = 256
+_REPLAY_CHUNK_CHARS = 16
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+def request_key(kwargs: Dict[str, Any]) -> str:
+    body = {key: value for key, value in kwargs.items() if key not in _IGNORED_KEYS}
+    encoded = json.dumps(body, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _Completions:
+    def __init__(self, owner: Any) -> None:
+        self._owner = owner
+
+    def create(self, **kwargs: Any) -> Any:
+        return self._owner.create(**kwargs)
+
+
+class _Chat:
+    def __init__(self, owner: Any) -> None:
+        self.completions = _Completions(owner)
+
+
+class RecordingClient:
+    """Pass calls through to ``client`` and append each answer to ``path``."""
+
+    def __init__(self, client: Any, path: Path) -> None:
+        self.client = client
+        self.path = path
+        self.recorded = 0
+        self._pending: List[str] = []
+        self._lock = threading.Lock()
+        self.chat = _Chat(self)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        metrics.add_section("请求录制", self.report_lines)
+        atexit.register(self.close)
+
+    def create(self, **kwargs: Any) -> Any:
+        started = time.monotonic()
+        response = self.client.chat.completions.create(**kwargs)
+        if kwargs.get("stream"):
+            return _RecordedStream(response, self, kwargs, started)
+        usage = getattr(response, "usage", None)
+        self.record(
+            kwargs,
+            response.choices[0].message.content or "",
+            latency=time.monotonic() - started,
+            usage={
+                name: getattr(usage, name, None)
+                for name in ("prompt_tokens", "completion_tokens", "total_tokens")
+            }
+            if usage is not None
+            else None,
+        )
+        return response
+
+    def record(
+        self,
+        request: Dict[str, Any],
+        content: str,
+        *,
+        latency: float,
+        first_token: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        line = json.dumps(
+            {
+                "key": request_key(request),
+                "model": request.get("model", ""),
+                "content": content,
+                "usage": usage,
+                "latency": round(latency, 4),
+                "first_token": round(first_token, 4) if first_token is not None else None,
+            },
+            ensure_ascii=False,
+        )
+        with self._lock:
+            self._pending.append(line)
+            self.recorded += 1
+            if len(self._pending) >= _FLUSH_EVERY:
+                self._flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def report_lines(self) -> List[str]:
+        return [f"已录制 {self.recorded} 次调用 → {self.path}"] if self.recorded else []
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        # Each flush appends a complete gzip member; readers see one continuous stream.
+        with gzip.open(self.path, "at", encoding="utf-8") as handle:
+            handle.write("\n".join(self._pending) + "\n")
+        self._pending.clear()
+
+
+class _RecordedStream:
+    """Pass a stream through and record the text received once it ends or is closed."""
+
+    def __init__(self, stream: Any, owner: RecordingClient, request: Dict[str, Any], started: float) -> None:
+        self._stream = stream
+        self._owner = owner
+        self._request = request
+        self._started = started
+        self._first_token: Optional[float] = None
+        self._received: List[str] = []
+        self._done = False
+
+    def __iter__(self) -> Iterator[Any]:
+        try:
+            for chunk in self._stream:
+                choices = getattr(chunk, "choices", None)
+                delta = getattr(choices[0], "delta", None) if choices else None
+                text = getattr(delta, "content", None) if delta is not None else None
+                if text:
+                    if self._first_token is None:
+                        self._first_token = time.monotonic() - self._started
+                    self._received.append(text)
+                yield chunk
+        finally:
+            self._finish()
+
+    def close(self) -> None:
+        self._finish()
+        close = getattr(self._stream, "close", None)
+        if callable(close):
+            close()
+
+    def _finish(self) -> None:
+        if not self._done:
+            self._done = True
+            self._owner.record(
+                self._request,
+                "".join(self._received),
+                latency=time.monotonic() - self._started,
+                first_token=self._first_token,
+            )
+
+
+class _Message:
+    def __init__(self, content: str) -> None:
+        self.role = "assistant"
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, content: str) -> None:
+        self.index = 0
+        self.message = _Message(content)
+        self.finish_reason = "stop"
+
+
+class _Usage:
+    def __init__(self, values: Dict[str, Any]) -> None:
+        self.prompt_tokens = values.get("prompt_tokens")
+        self.completion_tokens = values.get("completion_tokens")
+        self.total_tokens = values.get("total_tokens")
+
+
+class _Completion:
+    def __init__(self, model: str, content: str, usage: Optional[Dict[str, Any]]) -> None:
+        self.model = model
+        self.choices = [_Choice(content)]
+        self.usage = _Usage(usage) if usage else None
+
+
+class _Delta:
+    def __init__(self, content: str) -> None:
+        self.content = content
+
+
+class _ChunkChoice:
+    def __init__(self, content: str) -> None:
+        self.index = 0
+        self.delta = _Delta(content)
+
+
+class _Chunk:
+    def __init__(self, content: str) -> None:
+        self.choices = [_ChunkChoice(content)]
+
+
+class ReplayClient:
+    """Serve recorded answers; ``latency_scale`` > 0 sleeps ``recorded latency * scale``."""
+
+    def __init__(self, path: Path, *, latency_scale: float = 0.0) -> None:
+        self.path = path
+        self.latency_scale = max(0.0, latency_scale)
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.chat = _Chat(self)
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+        metrics.add_section("请求回放", self.report_lines)
+
+    def create(self, **kwargs: Any) -> Any:
+        key = request_key(kwargs)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.misses += 1
+            else:
+                self.hits += 1
+                index = self._cursor.get(key, 0)
+                self._cursor[key] = index + 1
+                entry = entries[index % len(entries)]
+        if not entries:
+            raise CassetteMiss(f"回放文件 {self.path} 中没有与该请求匹配的记录。")
+        if kwargs.get("stream"):
+            return self._stream(entry)
+        self._sleep(entry.get("latency"))
+        return _Completion(str(entry.get("model") or kwargs.get("model", "")), entry["content"], entry.get("usage"))
+
+    def _stream(self, entry: Dict[str, Any]) -> Iterator[_Chunk]:
+        content = entry["content"]
+        latency = entry.get("latency") or 0.0
+        first_token = entry.get("first_token")
+        if first_token is None:
+            first_token = latency
+        self._sleep(first_token)
+        pieces = [content[index : index + _REPLAY_CHUNK_CHARS] for index in range(0, len(content), _REPLAY_CHUNK_CHARS)]
+        gap = max(0.0, latency - first_token) / max(1, len(pieces))
+        for position, piece in enumerate(pieces):
+            if position:
+                self._sleep(gap)
+            yield _Chunk(piece)
+
+    def _sleep(self, seconds: Optional[float]) -> None:
+        if self.latency_scale and seconds:
+            time.sleep(seconds * self.latency_scale)
+
+    def report_lines(self) -> List[str]:
+        total = self.hits + self.misses
+        if not total:
+            return []
+        return [f"命中 {self.hits}/{total} 次（未录制 {self.misses}），延迟倍率 {self.latency_scale:g}"]
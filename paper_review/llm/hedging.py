@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, List, Optional
+
+from ..metrics import metrics
+
+if TYPE_CHECKING:  # pragma: no cover - annotations only
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """Raised when a chat-completion call does not finish within its deadline."""
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies used to derive hedging thresholds."""
+
+    def __init__(self, window: int = 256) -> None:
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[index]
+
+
+class _Completions:
+    def __init__(self, owner: "HedgedClient") -> None:
+        self._owner = owner
+
+    def create(self, **kwargs: Any) -> Any:
+        return self._owner.create(**kwargs)
+
+
+class _Chat:
+    def __init__(self, owner: "HedgedClient") -> None:
+        self.completions = _Completions(owner)
+
+
+class HedgedClient:
+    """Wrap a chat-completions client with per-call deadlines and optional hedging.
+
+    Every call gets ``deadline`` seconds, passed to the SDK as ``timeout``.
+    Without hedging the call runs on the caller's thread and the SDK enforces
+    that timeout. With ``hedge`` enabled, calls run on a pool of
+    ``max_workers`` threads (size it for the callers' concurrency plus their
+    backups), the deadline is enforced here as well, and a call that is still
+    running after the observed ``hedge_quantile`` latency (once
+    ``min_samples`` calls have completed) is duplicated; the first answer
+    wins and the other one is cancelled, or abandoned if already on the wire.
+    Use one instance per stage so that each stage learns its own latency
+    profile.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        name: str = "llm",
+        deadline: Optional[float] = None,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        min_samples: int = 20,
+        min_hedge_delay: float = 0.5,
+        max_workers: int = 32,
+    ) -> None:
+        self.client = client
+        self.name = name
+        self.deadline = deadline if deadline and deadline > 0 else None
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = max(1, min_samples)
+        self.min_hedge_delay = min_hedge_delay
+        self.latencies = LatencyTracker()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._max_workers = max_workers
+        self.chat = _Chat(self)
+
+    def create(self, **kwargs: Any) -> Any:
+        with self._lock:
+            self.requests += 1
+        if self.deadline is not None:
+            kwargs.setdefault("timeout", self.deadline)
+        if not self.hedge:
+            return self._direct_call(kwargs)
+
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        started = time.monotonic()
+        primary = self._submit(kwargs)
+        attempts: List[Future] = [primary]
+
+        delay = self._hedge_delay()
+        if delay is not None:
+            first_wait = delay if self.deadline is None else min(delay, self.deadline)
+            done, _ = wait(attempts, timeout=first_wait)
+            if not done and not self._expired(started):
+                attempts.append(self._submit(kwargs))
+                with self._lock:
+                    self.hedged += 1
+                metrics.increment(f"hedge.{self.name}.sent")
+
+        error: Optional[BaseException] = None
+        pending = list(attempts)
+        while pending:
+            remaining = None
+            if self.deadline is not None:
+                remaining = max(0.0, self.deadline - (time.monotonic() - started))
+            done, not_done = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    self._abandon(not_done)
+                    if future is not primary:
+                        with self._lock:
+                            self.hedge_wins += 1
+                        metrics.increment(f"hedge.{self.name}.won")
+                    return future.result()
+                error = future.exception()
+            pending = list(not_done)
+
+        if error is not None and not pending:
+            raise error
+        self._abandon(pending)
+        self._count_deadline_exceeded()
+        raise LLMDeadlineExceeded(f"{self.name} 请求超过 {self.deadline:.0f} 秒仍未完成。")
+
+    def report_lines(self) -> List[str]:
+        if not self.requests:
+            return []
+        p50 = self.latencies.quantile(0.5)
+        p95 = self.latencies.quantile(0.95)
+        latency = ""
+        if p50 is not None and p95 is not None:
+            latency = f"，p50 {p50:.2f}s，p95 {p95:.2f}s"
+        return [
+            f"{self.name}: 请求 {self.requests}，对冲 {self.hedged}（备份胜出 {self.hedge_wins}），"
+            f"超时 {self.deadline_exceeded}{latency}"
+        ]
+
+    def _direct_call(self, kwargs: Any) -> Any:
+        started = time.monotonic()
+        try:
+            return self._timed_call(kwargs)
+        except Exception as exc:
+            if not self._expired(started):
+                raise
+            # The SDK gave up at ``timeout``: report it like an enforced deadline.
+            self._count_deadline_exceeded()
+            raise LLMDeadlineExceeded(f"{self.name} 请求超过 {self.deadline:.0f} 秒仍未完成。") from exc
+
+    def _count_deadline_exceeded(self) -> None:
+        with self._lock:
+            self.deadline_exceeded += 1
+        metrics.increment(f"deadline.{self.name}.exceeded")
+
+    def _timed_call(self, kwargs: Any) -> Any:
+        started = time.monotonic()
+        response = self.client.chat.completions.create(**kwargs)
+        self.latencies.record(time.monotonic() - started)
+        return response
+
+    def _submit(self, kwargs: Any) -> Future:
+        with self._lock:
+            if self._executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix=f"llm-{self.name}"
+                )
+            executor = self._executor
+        return executor.submit(self._timed_call, dict(kwargs))
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge or len(self.latencies) < self.min_samples:
+            return None
+        threshold = self.latencies.quantile(self.hedge_quantile)
+        if threshold is None:
+            return None
+        return max(threshold, self.min_hedge_delay)
+
+    def _expired(self, started: float) -> bool:
+        return self.deadline is not None and time.monotonic() - started >= self.deadline
+
+    @staticmethod
+    def _abandon(futures: Any) -> None:
+        for future in futures:
+            if not future.cancel():
+                # Already running: drop the connection once it returns, if it is a stream.
+                future.add_done_callback(_close_result)
+
+
+def _close_result(future: Future) -> None:
+    if future.cancelled() or future.exception() is not None:
+        return
+    close = getattr(future.result(), "close", None)
+    if callable(close):
+        close()
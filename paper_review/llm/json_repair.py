@@ -0,0 +1,284 @@
+"""Tolerant extraction of the JSON object in a model answer.
+
+Answers are tried in three steps, cheapest first:
+
+1. ``json.loads`` on the whole text;
+2. ``json.loads`` on the slice between the first ``{`` and the last ``}``;
+3. a lenient single-pass parser that accepts what models commonly get wrong:
+   Markdown code fences and surrounding prose, single-quoted strings,
+   unquoted keys, Python literals, trailing or doubled commas, unescaped
+   quotes inside strings and several concatenated objects (the first one
+   wins). Answers cut off mid-string or mid-object are closed as well, but
+   are flagged as truncated: the content is incomplete, so callers treat
+   them as failed answers (escalated or retried) rather than as usable ones.
+
+Every complete answer recovered by step 3 would otherwise have been an
+unparseable response, costing a retry, an escalation or an unclassified
+paper, so the counters ``json.<stage>.repaired`` count the model calls saved;
+truncated answers are counted under ``json.<stage>.truncated`` only.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..metrics import metrics
+
+JSON_OUTCOMES = {
+    "strict": "直接解析",
+    "sliced": "截取花括号",
+    "repaired": "容错修复",
+    "truncated": "输出被截断",
+    "failed": "无法解析",
+}
+
+_WHITESPACE = re.compile(r"\s*")
+_NUMBER = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_BARE_WORD = re.compile(r"[^\s,:{}\[\]\"']+")
+_LITERALS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+# After a closing quote a well-formed value or key is followed by one of these.
+_STRING_END_FOLLOWERS = frozenset(",:}]")
+
+
+class _Truncated(Exception):
+    """Internal signal: the text ended inside a value."""
+
+
+class _LenientParser:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.pos = 0
+        self.truncated = False
+
+    def _skip(self) -> None:
+        text = self.text
+        while True:
+            self.pos = _WHITESPACE.match(text, self.pos).end()
+            if text.startswith("//", self.pos):
+                end = text.find("\n", self.pos)
+                self.pos = len(text) if end == -1 else end
+            elif text.startswith("```", self.pos):
+                # A closing code fence right after the object, or an opening one inside it.
+                end = text.find("\n", self.pos)
+                self.pos = len(text) if end == -1 else end
+            else:
+                return
+
+    def value(self) -> Any:
+        self._skip()
+        if self.pos >= len(self.text):
+            raise _Truncated()
+        char = self.text[self.pos]
+        if char == "{":
+            return self.object()
+        if char == "[":
+            return self.array()
+        if char in "\"'“":
+            return self.string()
+        match = _NUMBER.match(self.text, self.pos)
+        if match is not None:
+            self.pos = match.end()
+            literal = match.group()
+            try:
+                return int(literal) if literal.lstrip("-").isdigit() else float(literal)
+            except ValueError:
+                return literal
+        match = _BARE_WORD.match(self.text, self.pos)
+        if match is None:
+            # A stray delimiter where a value should be; skip it rather than loop.
+            self.pos += 1
+            return None
+        self.pos = match.end()
+        word = match.group()
+        return _LITERALS.get(word, word)
+
+    def object(self) -> Dict[str, Any]:
+        self.pos += 1
+        result: Dict[str, Any] = {}
+        while True:
+            self._skip()
+            if self.pos >= len(self.text):
+                self.truncated = True
+                return result
+            char = self.text[self.pos]
+            if char == "}":
+                self.pos += 1
+                return result
+            if char in ",;":
+                self.pos += 1
+                continue
+            if char == "]":
+                # Mismatched closer: treat it as the end of this object.
+                self.pos += 1
+                return result
+            try:
+                key = self.value()
+                self._skip()
+                if self.pos >= len(self.text):
+                    raise _Truncated()
+                if self.text[self.pos] in ":=":
+                    self.pos += 1
+                    result[str(key)] = self.value()
+                elif isinstance(key, str):
+                    # A key with no value; keep scanning for the next member.
+                    continue
+            except _Truncated:
+                self.truncated = True
+                return result
+
+    def array(self) -> List[Any]:
+        self.pos += 1
+        result: List[Any] = []
+        while True:
+            self._skip()
+            if self.pos >= len(self.text):
+                self.truncated = True
+                return result
+            char = self.text[self.pos]
+            if char == "]":
+                self.pos += 1
+                return result
+            if char == ",":
+                self.pos += 1
+                continue
+            if char == "}":
+                self.pos += 1
+                return result
+            try:
+                item = self.value()
+            except _Truncated:
+                self.truncated = True
+                return result
+            if self.truncated and isinstance(item, (dict, list)) and not item:
+                # An element cut off before its first member carries nothing.
+                return result
+            result.append(item)
+
+    def string(self) -> str:
+        text = self.text
+        opening = text[self.pos]
+        quote = "”" if opening == "“" else opening
+        self.pos += 1
+        parts: List[str] = []
+        while True:
+            stop = self._next_special(quote)
+            if stop == -1:
+                # Truncated inside the string: keep what was received.
+                parts.append(text[self.pos :])
+                self.pos = len(text)
+                self.truncated = True
+                return "".join(parts)
+            parts.append(text[self.pos : stop])
+            char = text[stop]
+            if char == "\\":
+                parts.append(self._escape(stop))
+                continue
+            self.pos = stop + 1
+            if self._closes_string():
+                return "".join(parts)
+            # An unescaped quote inside the text, e.g. "针对"数字孪生"问题".
+            parts.append(char)
+
+    def _next_special(self, quote: str) -> int:
+        text = self.text
+        quote_at = text.find(quote, self.pos)
+        escape_at = text.find("\\", self.pos)
+        if escape_at != -1 and (quote_at == -1 or escape_at < quote_at):
+            return escape_at
+        return quote_at
+
+    def _closes_string(self) -> bool:
+        after = _WHITESPACE.match(self.text, self.pos).end()
+        return after >= len(self.text) or self.text[after] in _STRING_END_FOLLOWERS or (
+            self.text.startswith("```", after)
+        )
+
+    def _escape(self, index: int) -> str:
+        text = self.text
+        if index + 1 >= len(text):
+            self.pos = len(text)
+            return ""
+        code = text[index + 1]
+        simple = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "/": "/", "\\": "\\", '"': '"', "'": "'"}
+        if code in simple:
+            self.pos = index + 2
+            return simple[code]
+        if code == "u" and re.fullmatch(r"[0-9a-fA-F]{4}", text[index + 2 : index + 6]):
+            self.pos = index + 6
+            return chr(int(text[index + 2 : index + 6], 16))
+        self.pos = index + 2
+        return code
+
+
+def _first_container(text: str) -> int:
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    return min(starts) if starts else -1
+
+
+def repair_json(text: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """Leniently parse the first JSON object in ``text``; return it and whether it was truncated."""
+    start = _first_container(text)
+    while start != -1:
+        parser = _LenientParser(text)
+        parser.pos = start
+        try:
+            value = parser.value()
+        except RecursionError:
+            return None, False
+        if isinstance(value, list):
+            # Some answers wrap the object in a list; use its first object.
+            value = next((item for item in value if isinstance(item, dict)), None)
+        if isinstance(value, dict) and value:
+            return value, parser.truncated
+        next_start = _first_container(text[parser.pos :])
+        start = -1 if next_start == -1 else parser.pos + next_start
+    return None, False
+
+
+def extract_json(payload: str, stage: str = "llm") -> Tuple[Optional[Dict[str, Any]], bool]:
+    """Return the JSON object in a model answer (``None`` when nothing is found) and whether it was truncated.
+
+    A truncated object holds only the part of the answer that arrived; callers
+    must not treat it as a complete answer.
+    """
+    try:
+        data = json.loads(payload)
+    except (json.JSONDecodeError, TypeError):
+        data = None
+    if isinstance(data, dict):
+        metrics.increment(f"json.{stage}.strict")
+        return data, False
+
+    start = payload.find("{")
+    end = payload.rfind("}")
+    if start != -1 and start < end:
+        try:
+            data = json.loads(payload[start : end + 1])
+        except json.JSONDecodeError:
+            data = None
+        if isinstance(data, dict):
+            metrics.increment(f"json.{stage}.sliced")
+            return data, False
+
+    data, truncated = repair_json(payload)
+    if data is None:
+        metrics.increment(f"json.{stage}.failed")
+        return None, False
+    metrics.increment(f"json.{stage}.truncated" if truncated else f"json.{stage}.repaired")
+    return data, truncated
+
+
+def report_lines() -> List[str]:
+    """Per-stage parse outcomes; only complete repaired answers are model calls that did not need a retry."""
+    counters = metrics.snapshot()
+    stages = sorted({name.split(".")[1] for name in counters if name.startswith("json.")})
+    lines: List[str] = []
+    for stage in stages:
+        counts = {key: int(counters.get(f"json.{stage}.{key}", 0)) for key in JSON_OUTCOMES}
+        if not counts["repaired"] and not counts["truncated"] and not counts["failed"]:
+            continue
+        parts = "，".join(f"{label} {counts[key]}" for key, label in JSON_OUTCOMES.items())
+        lines.append(f"{stage}: {parts}，节省重试调用 {counts['repaired']} 次")
+    return lines
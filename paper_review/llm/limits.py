@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+
+class _Completions:
+    def __init__(self, owner: "ConcurrencyLimitedClient") -> None:
+        self._owner = owner
+
+    def create(self, **kwargs: Any) -> Any:
+        return self._owner.create(**kwargs)
+
+
+class _Chat:
+    def __init__(self, owner: "ConcurrencyLimitedClient") -> None:
+        self.completions = _Completions(owner)
+
+
+class ConcurrencyLimitedClient:
+    """Cap the number of chat completions in flight across every user of the client.
+
+    Per-run ``--llm-concurrency`` only bounds one pipeline; when several jobs
+    share a client (as in the HTTP service) this wrapper enforces one global
+    limit. For streamed calls the slot is held until the response headers
+    arrive, not while the body is read.
+    """
+
+    def __init__(self, client: Any, limit: int) -> None:
+        self.client = client
+        self.limit = max(1, limit)
+        self._slots = threading.BoundedSemaphore(self.limit)
+        self.chat = _Chat(self)
+
+    def create(self, **kwargs: Any) -> Any:
+        with self._slots:
+            return self.client.chat.completions.create(**kwargs)
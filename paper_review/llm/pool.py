@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Status codes that describe a malformed request rather than an unhealthy endpoint.
+_CLIENT_ERROR_CODES = {400, 401, 403, 404, 422}
+
+
+@dataclass
+class EndpointConfig:
+    """Connection settings for one OpenAI-compatible endpoint/key pair."""
+
+    api_key: str
+    base_url: Optional[str] = None
+    weight: float = 1.0
+    name: str = ""
+
+    def display_name(self, index: int) -> str:
+        if self.name:
+            return self.name
+        host = (self.base_url or "default").split("://")[-1].rstrip("/")
+        suffix = self.api_key[-4:] if len(self.api_key) >= 4 else "****"
+        return f"{host}#{index + 1}(…{suffix})"
+
+
+def parse_endpoint_spec(spec: str) -> EndpointConfig:
+    """Parse ``key=value`` pairs such as ``base_url=...,api_key_env=KEY2,weight=2``."""
+    fields: Dict[str, str] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "=" not in part:
+            raise ValueError(f"无法解析 endpoint 配置片段“{part}”，应为 key=value 形式。")
+        key, value = part.split("=", 1)
+        fields[key.strip()] = value.strip()
+    return _endpoint_from_mapping(fields)
+
+
+def load_endpoint_configs(path: Path) -> List[EndpointConfig]:
+    """Load endpoint definitions from a YAML or JSON file.
+
+    The file may either be a list of endpoint mappings or a mapping with an
+    ``endpoints`` list. Each mapping accepts ``base_url``, ``api_key`` or
+    ``api_key_env``, ``weight`` and ``name``.
+    """
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() == ".json":
+        data = json.loads(text)
+    else:
+        try:
+            import yaml  # type: ignore
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("未安装 pyyaml，无法解析 YAML。请先 `pip install pyyaml`") from exc
+        data = yaml.safe_load(text)
+
+    if isinstance(data, dict):
+        data = data.get("endpoints")
+    if not isinstance(data, list) or not data:
+        raise ValueError(f"{path} 中未找到 endpoint 列表。")
+    return [_endpoint_from_mapping(item) for item in data]
+
+
+def _endpoint_from_mapping(item: Any) -> EndpointConfig:
+    if not isinstance(item, dict):
+        raise ValueError("每个 endpoint 应为包含 base_url/api_key 的映射。")
+    api_key = item.get("api_key")
+    env_name = item.get("api_key_env")
+    if not api_key and env_name:
+        api_key = os.environ.get(str(env_name))
+        if not api_key:
+            raise ValueError(f"环境变量 {env_name} 未设置，无法读取 endpoint 凭证。")
+    if not api_key:
+        raise ValueError("endpoint 配置缺少 api_key 或 api_key_env。")
+    weight = float(item.get("weight", 1.0))
+    if weight <= 0:
+        raise ValueError("endpoint 的 weight 必须为正数。")
+    base_url = item.get("base_url")
+    return EndpointConfig(
+        api_key=str(api_key),
+        base_url=str(base_url) if base_url else None,
+        weight=weight,
+        name=str(item.get("name", "")),
+    )
+
+
+class _EndpointState:
+    def __init__(self, name: str, client: Any, weight: float) -> None:
+        self.name = name
+        self.client = client
+        self.weight = weight
+        self.outstanding = 0
+        self.dispatched = 0
+        self.successes = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.cooldown_until = 0.0
+        self.tokens = 0
+        self.busy_seconds = 0.0
+        self.first_dispatch: Optional[float] = None
+        self.last_completion: Optional[float] = None
+
+    def available(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+
+class _Completions:
+    def __init__(self, pool: "ClientPool") -> None:
+        self._pool = pool
+
+    def create(self, **kwargs: Any) -> Any:
+        return self._pool.create(**kwargs)
+
+
+class _Chat:
+    def __init__(self, pool: "ClientPool") -> None:
+        self.completions = _Completions(pool)
+
+
+class ClientPool:
+    """Spread chat-completion calls over several endpoints.
+
+    The pool exposes the same ``chat.completions.create`` surface as an
+    ``OpenAI`` client, so consumers can use it transparently. Requests are
+    routed by weighted least-outstanding-requests; endpoints are taken out of
+    rotation for ``cooldown`` seconds after ``max_failures`` consecutive
+    failures, or right away when the server answers with HTTP 429.
+    """
+
+    def __init__(
+        self,
+        members: Sequence[tuple],
+        *,
+        max_failures: int = 3,
+        cooldown: float = 30.0,
+        rate_limit_cooldown: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not members:
+            raise ValueError("ClientPool 至少需要一个 endpoint。")
+        self._states = [_EndpointState(name, client, weight) for name, client, weight in members]
+        self.max_failures = max(1, max_failures)
+        self.cooldown = cooldown
+        self.rate_limit_cooldown = rate_limit_cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.chat = _Chat(self)
+
+    @classmethod
+    def from_configs(
+        cls,
+        configs: Sequence[EndpointConfig],
+        client_factory: Callable[[EndpointConfig], Any],
+        **kwargs: Any,
+    ) -> "ClientPool":
+        members = [
+            (config.display_name(index), client_factory(config), config.weight)
+            for index, config in enumerate(configs)
+        ]
+        return cls(members, **kwargs)
+
+    @property
+    def endpoint_names(self) -> List[str]:
+        return [state.name for state in self._states]
+
+    def create(self, **kwargs: Any) -> Any:
+        tried: List[_EndpointState] = []
+        while True:
+            state = self._acquire(exclude=tried)
+            tried.append(state)
+            started = self._clock()
+            try:
+                response = state.client.chat.completions.create(**kwargs)
+            except Exception as exc:
+                retry = self._release_failure(state, exc, started)
+                if retry and len(tried) < len(self._states):
+                    continue
+                raise
+            self._release_success(state, response, started)
+            return response
+
+    def _acquire(self, exclude: Sequence[_EndpointState]) -> _EndpointState:
+        with self._lock:
+            now = self._clock()
+            candidates = [s for s in self._states if s not in exclude and s.available(now)]
+            if not candidates:
+                # Every endpoint is cooling down: fall back to the one that recovers first.
+                remaining = [s for s in self._states if s not in exclude] or self._states
+                chosen = min(remaining, key=lambda s: s.cooldown_until)
+            else:
+                chosen = min(
+                    candidates,
+                    key=lambda s: ((s.outstanding + 1) / s.weight, s.dispatched / s.weight),
+                )
+            chosen.outstanding += 1
+            chosen.dispatched += 1
+            if chosen.first_dispatch is None:
+                chosen.first_dispatch = now
+            return chosen
+
+    def _release_success(self, state: _EndpointState, response: Any, started: float) -> None:
+        tokens = _usage_tokens(response)
+        with self._lock:
+            now = self._clock()
+            state.outstanding -= 1
+            state.successes += 1
+            state.consecutive_failures = 0
+            state.tokens += tokens
+            state.busy_seconds += now - started
+            state.last_completion = now
+
+    def _release_failure(self, state: _EndpointState, exc: Exception, started: float) -> bool:
+        """Record a failed call and report whether another endpoint should be tried."""
+        status = getattr(exc, "status_code", None)
+        with self._lock:
+            now = self._clock()
+            state.outstanding -= 1
+            state.busy_seconds += now - started
+            state.last_completion = now
+            if status in _CLIENT_ERROR_CODES:
+                return False
+            state.failures += 1
+            state.consecutive_failures += 1
+            if status == 429:
+                state.rate_limited += 1
+                delay = _retry_after(exc) or self.rate_limit_cooldown
+                self._eject(state, now, delay)
+            elif state.consecutive_failures >= self.max_failures:
+                self._eject(state, now, self.cooldown)
+        return True
+
+    def _eject(self, state: _EndpointState, now: float, delay: float) -> None:
+        if state.available(now):
+            state.ejections += 1
+            print(f"⚠️ endpoint {state.name} 暂时移出轮转 {delay:.0f} 秒。")
+        state.cooldown_until = max(state.cooldown_until, now + delay)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = []
+            for state in self._states:
+                window = 0.0
+                if state.first_dispatch is not None and state.last_completion is not None:
+                    window = max(state.last_completion - state.first_dispatch, 1e-9)
+                completed = state.successes + state.failures
+                rows.append(
+                    {
+                        "name": state.name,
+                        "weight": state.weight,
+                        "requests": state.dispatched,
+                        "successes": state.successes,
+                        "failures": state.failures,
+                        "rate_limited": state.rate_limited,
+                        "ejections": state.ejections,
+                        "tokens": state.tokens,
+                        "requests_per_second": state.successes / window if window else 0.0,
+                        "tokens_per_second": state.tokens / window if window else 0.0,
+                        "avg_latency": state.busy_seconds / completed if completed else 0.0,
+                    }
+                )
+            return rows
+
+    def report_lines(self) -> List[str]:
+        lines = []
+        for row in self.stats():
+            lines.append(
+                f"{row['name']} (权重 {row['weight']:g}): 请求 {row['requests']}，"
+                f"成功 {row['successes']}，失败 {row['failures']}（429: {row['rate_limited']}），"
+                f"移出轮转 {row['ejections']} 次，{row['requests_per_second']:.2f} req/s，"
+                f"{row['tokens_per_second']:.1f} tokens/s，平均延迟 {row['avg_latency']:.2f}s"
+            )
+        return lines
+
+
+def _usage_tokens(response: Any) -> int:
+    usage = getattr(response, "usage", None)
+    total = getattr(usage, "total_tokens", None) if usage is not None else None
+    return int(total) if isinstance(total, (int, float)) else 0
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,62 @@
+"""Per-stage model routing with escalation of low-quality answers.
+
+Classification and summaries can run on a fast, cheap model; a paper is sent
+again to a stronger model only when the cheap answer is unusable (invalid
+JSON, a truncated answer, no matching main category, an empty or over-long
+summary). Outcomes are counted under ``escalation.<stage>.*`` so the report
+can show which share of papers needed the stronger model.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from ..metrics import metrics
+
+ESCALATION_STAGES = {"classify": "分类", "summary": "摘要"}
+ESCALATION_REASONS = {
+    "invalid_json": "JSON 无法解析",
+    "truncated": "输出被截断",
+    "no_match": "未匹配主类",
+    "empty": "摘要为空",
+    "too_long": "摘要超长",
+}
+
+
+def record_escalation(stage: str, reason: Optional[str] = None, *, recovered: bool = False) -> None:
+    """Count one paper of ``stage``; ``reason`` is set when it was escalated."""
+    metrics.increment(f"escalation.{stage}.papers")
+    if reason is None:
+        return
+    metrics.increment(f"escalation.{stage}.escalated")
+    metrics.increment(f"escalation.{stage}.reason.{reason}")
+    if recovered:
+        metrics.increment(f"escalation.{stage}.recovered")
+
+
+class EscalationReport:
+    """Renders the escalated share per stage for the run summary."""
+
+    def __init__(self, routes: Dict[str, Tuple[str, str]]) -> None:
+        # stage -> (default model, escalation model)
+        self.routes = routes
+
+    def report_lines(self) -> List[str]:
+        lines: List[str] = []
+        for stage, (model, stronger) in self.routes.items():
+            papers = int(metrics.get(f"escalation.{stage}.papers"))
+            if not papers:
+                continue
+            escalated = int(metrics.get(f"escalation.{stage}.escalated"))
+            recovered = int(metrics.get(f"escalation.{stage}.recovered"))
+            reasons = "，".join(
+                f"{label} {int(metrics.get(f'escalation.{stage}.reason.{key}'))}"
+                for key, label in ESCALATION_REASONS.items()
+                if metrics.get(f"escalation.{stage}.reason.{key}")
+            )
+            line = (
+                f"{ESCALATION_STAGES.get(stage, stage)}：{model} 处理 {papers} 篇，"
+                f"升级到 {stronger} {escalated} 篇（{escalated / papers:.1%}），升级后合格 {recovered} 篇"
+            )
+            lines.append(f"{line}（{reasons}）" if reasons else line)
+        return lines
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from ..metrics import metrics
+from ..text import estimate_tokens
+from .hedging import LatencyTracker
+
+
+class JSONObjectScanner:
+    """Incrementally find the first complete top-level JSON object in streamed text.
+
+    Text before the opening ``{`` (for example a Markdown fence) is skipped.
+    Braces inside string literals, including escaped quotes, are ignored, so
+    the scanner only reports completion once the outermost object closes.
+    """
+
+    def __init__(self) -> None:
+        self._buffer: List[str] = []
+        self._start: Optional[int] = None
+        self._length = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.result: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self._buffer)
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Consume ``chunk``; return the object text once it is complete."""
+        if self.result is not None or not chunk:
+            return self.result
+        offset = self._length
+        self._buffer.append(chunk)
+        self._length += len(chunk)
+        for index, char in enumerate(chunk):
+            if self._start is None:
+                if char == "{":
+                    self._start = offset + index
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.result = self.text[self._start : offset + index + 1]
+                    return self.result
+        return None
+
+
+class StreamTimings:
+    """Per-stage time-to-first-token and time-to-complete-JSON samples."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._first_token: Dict[str, LatencyTracker] = {}
+        self._complete: Dict[str, LatencyTracker] = {}
+        self._early: Dict[str, int] = {}
+        self._calls: Dict[str, int] = {}
+
+    def record(self, stage: str, first_token: Optional[float], complete: float, early: bool) -> None:
+        with self._lock:
+            self._calls[stage] = self._calls.get(stage, 0) + 1
+            if early:
+                self._early[stage] = self._early.get(stage, 0) + 1
+            first_tracker = self._first_token.setdefault(stage, LatencyTracker())
+            complete_tracker = self._complete.setdefault(stage, LatencyTracker())
+        if first_token is not None:
+            first_tracker.record(first_token)
+        complete_tracker.record(complete)
+
+    def report_lines(self) -> List[str]:
+        with self._lock:
+            stages = sorted(self._calls)
+            rows = [
+                (stage, self._calls[stage], self._early.get(stage, 0), self._first_token[stage], self._complete[stage])
+                for stage in stages
+            ]
+        lines: List[str] = []
+        for stage, calls, early, first_tracker, complete_tracker in rows:
+            line = f"{stage}: 流式请求 {calls}，提前断开 {early}"
+            ttft_p50, ttft_p95 = first_tracker.quantile(0.5), first_tracker.quantile(0.95)
+            if ttft_p50 is not None and ttft_p95 is not None:
+                line += f"，首 token p50 {ttft_p50:.2f}s / p95 {ttft_p95:.2f}s"
+            json_p50, json_p95 = complete_tracker.quantile(0.5), complete_tracker.quantile(0.95)
+            if json_p50 is not None and json_p95 is not None:
+                line += f"，JSON 完整 p50 {json_p50:.2f}s / p95 {json_p95:.2f}s"
+            lines.append(line)
+        return lines
+
+
+stream_timings = StreamTimings()
+
+
+def complete_json(client: Any, request: Dict[str, Any], *, stream: bool = False, stage: str = "llm") -> str:
+    """Run one chat completion expected to answer with a JSON object and return its text.
+
+    Without ``stream`` this is a plain ``stream=False`` call. With ``stream``
+    the deltas are scanned as they arrive; as soon as the top-level object
+    closes the stream is closed, dropping any trailing text the model would
+    still emit. If the stream ends first, the whole accumulated text is
+    returned so that the usual tolerant extraction can still run.
+    """
+    if not stream:
+        response = client.chat.completions.create(**request, stream=False)
+        content = response.choices[0].message.content or ""
+        usage = getattr(response, "usage", None)
+        total = getattr(usage, "total_tokens", None) if usage is not None else None
+        metrics.increment(f"tokens.{stage}", total if isinstance(total, int) else _estimate_request(request, content))
+        return content
+
+    started = time.monotonic()
+    response = client.chat.completions.create(**request, stream=True)
+    scanner = JSONObjectScanner()
+    first_token: Optional[float] = None
+    early = False
+    try:
+        for chunk in response:
+            delta = _delta_text(chunk)
+            if not delta:
+                continue
+            if first_token is None:
+                first_token = time.monotonic() - started
+            if scanner.feed(delta) is not None:
+                early = True
+                break
+    finally:
+        close = getattr(response, "close", None)
+        if callable(close):
+            close()
+
+    stream_timings.record(stage, first_token, time.monotonic() - started, early)
+    content = scanner.result if scanner.result is not None else scanner.text
+    # Streams carry no usage block, so count the prompt and what was actually received.
+    metrics.increment(f"tokens.{stage}", _estimate_request(request, scanner.text))
+    return content
+
+
+def _estimate_request(request: Dict[str, Any], content: str) -> int:
+    prompt = sum(estimate_tokens(str(message.get("content", ""))) for message in request.get("messages", []))
+    return prompt + estimate_tokens(content)
+
+
+def _delta_text(chunk: Any) -> str:
+    choices = getattr(chunk, "choices", None)
+    if not choices:
+        return ""
+    delta = getattr(choices[0], "delta", None)
+    return (getattr(delta, "content", None) or "") if delta is not None else ""
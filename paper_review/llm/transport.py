@@ -0,0 +1,113 @@
+"""Shared, tunable HTTP transport for every OpenAI-compatible client.
+
+The OpenAI SDK creates its own ``httpx.Client`` per instance with default
+pool limits. :func:`build_http_client` builds one pooled client from a
+:class:`TransportConfig` that all endpoint clients (and therefore every
+consumer behind the :class:`~paper_review.llm.pool.ClientPool`) share, so
+warm keep-alive connections are reused instead of paying a TCP/TLS handshake
+per request. :class:`TransportStats` counts how often that happens using
+httpcore's ``trace`` request extension.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from ..metrics import metrics
+
+
+@dataclass
+class TransportConfig:
+    """Connection-pool and timeout settings for the shared HTTP client."""
+
+    max_connections: int = 100
+    max_keepalive: int = 32
+    keepalive_expiry: float = 60.0
+    http2: bool = False
+    connect_timeout: float = 10.0
+    read_timeout: float = 120.0
+
+    def timeout(self) -> Any:
+        import httpx
+
+        read = self.read_timeout if self.read_timeout > 0 else None
+        return httpx.Timeout(read, connect=self.connect_timeout)
+
+
+class TransportStats:
+    """Thread-safe counters of requests, new connections and handshake time."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+        self.connect_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def on_request(self, request: Any) -> None:
+        """``httpx`` request hook: count the request and attach a connection tracer."""
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._trace_events()
+
+    def _trace_events(self) -> Any:
+        started: Dict[str, float] = {}
+
+        def trace(event: str, info: Dict[str, Any]) -> None:
+            # httpcore emits "<scope>.<step>.started/complete/failed" for every phase.
+            step, _, phase = event.rpartition(".")
+            if step not in ("connection.connect_tcp", "connection.start_tls"):
+                return
+            if phase == "started":
+                started[step] = time.perf_counter()
+                return
+            if phase != "complete":
+                return
+            elapsed = time.perf_counter() - started.pop(step, time.perf_counter())
+            with self._lock:
+                if step == "connection.connect_tcp":
+                    self.connections += 1
+                else:
+                    self.tls_handshakes += 1
+                self.connect_seconds += elapsed
+
+        return trace
+
+    def report_lines(self) -> List[str]:
+        if not self.requests:
+            return []
+        reused = max(0, self.requests - self.connections)
+        average = self.connect_seconds / self.connections * 1000 if self.connections else 0.0
+        return [
+            f"请求 {self.requests}，新建连接 {self.connections}（TLS 握手 {self.tls_handshakes}），"
+            f"复用 {reused} 次（{reused / self.requests:.0%}），平均建连耗时 {average:.0f} ms"
+        ]
+
+
+def build_http_client(config: TransportConfig, stats: Optional[TransportStats] = None) -> Any:
+    """Create the pooled ``httpx.Client`` handed to every OpenAI client as ``http_client``."""
+    try:  # pragma: no cover - optional dependency, installed together with openai
+        import httpx
+    except ImportError as exc:  # pragma: no cover
+        raise RuntimeError("未安装 httpx，请先 `pip install openai`（会一并安装 httpx）。") from exc
+    if config.http2:
+        try:
+            import h2  # type: ignore # noqa: F401
+        except ImportError as exc:
+            raise RuntimeError("启用 HTTP/2 需要 h2 依赖，请先 `pip install 'httpx[http2]'`。") from exc
+
+    stats = stats or TransportStats()
+    metrics.add_section("HTTP 连接复用", stats.report_lines)
+    return httpx.Client(
+        http2=config.http2,
+        timeout=config.timeout(),
+        limits=httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+        event_hooks={"request": [stats.on_request]},
+    )
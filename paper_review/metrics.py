@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, List, Tuple
+
+SectionRenderer = Callable[[], List[str]]
+
+
+class RunMetrics:
+    """Thread-safe collector for counters reported at the end of a run."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._sections: List[Tuple[str, SectionRenderer]] = []
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._counters)
+
+    def add_section(self, title: str, renderer: SectionRenderer) -> None:
+        """Register a callable that contributes extra lines to :meth:`render`."""
+        with self._lock:
+            self._sections = [item for item in self._sections if item[0] != title]
+            self._sections.append((title, renderer))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._sections.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+            sections = list(self._sections)
+
+        lines: List[str] = []
+        for title, renderer in sections:
+            body = renderer()
+            if not body:
+                continue
+            lines.append(f"[{title}]")
+            lines.extend(f"  {line}" for line in body)
+        if counters:
+            lines.append("[计数器]")
+            for name, value in counters:
+                shown = int(value) if float(value).is_integer() else round(value, 3)
+                lines.append(f"  {name}: {shown}")
+        return "\n".join(lines)
+
+
+metrics = RunMetrics()
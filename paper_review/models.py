@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 @dataclass
@@ -16,9 +16,12 @@ class PaperEntry:
     authors: List[str]
     year: Optional[int]
     venue: str
+    doi: str = ""
     main_category: Optional[str] = None
     sub_category: Optional[str] = None
     summary_zh: str = ""
+    # Stage name -> error message for stages that still failed after retries.
+    errors: Dict[str, str] = field(default_factory=dict)
 
 
 @dataclass
@@ -28,3 +31,5 @@ class CategoryNode:
     name: str
     parent: Optional[str] = None
     children: List[str] = field(default_factory=list)
+    # Optional free text from categories.yaml, used to retrieve candidate categories.
+    description: str = ""
@@ -1,7 +1,23 @@
-"""Parsers for different bibliography formats."""
+"""Parsers for different bibliography formats.
+
+Built-in parsers are registered lazily so that importing the package does
+not import every parser module; see :class:`ParserRegistry`.
+"""
 
 from .base import BibliographyParser, registry
-from . import refworks  # noqa: F401 - ensure RefWorks parser is registered on import
-from . import ris  # noqa: F401 - ensure RIS parser is registered on import
+from .filters import RecordFilter
+
+registry.register_lazy("refworks", "paper_review.parsing.refworks:RefWorksParser", primary=True)
+registry.register_lazy(".refworks", "paper_review.parsing.refworks:RefWorksParser")
+registry.register_lazy(".txt", "paper_review.parsing.refworks:RefWorksParser")
+registry.register_lazy("ris", "paper_review.parsing.ris:RISParser", primary=True)
+registry.register_lazy(".ris", "paper_review.parsing.ris:RISParser")
+registry.register_lazy("bibtex", "paper_review.parsing.bibtex:BibTeXParser", primary=True)
+registry.register_lazy(".bib", "paper_review.parsing.bibtex:BibTeXParser")
+registry.register_lazy("csl-json", "paper_review.parsing.csl_json:CSLJSONParser", primary=True)
+registry.register_lazy(".json", "paper_review.parsing.csl_json:CSLJSONParser")
+registry.register_lazy("medline", "paper_review.parsing.medline:MedlineParser", primary=True)
+registry.register_lazy(".nbib", "paper_review.parsing.medline:MedlineParser")
+registry.register_lazy(".medline", "paper_review.parsing.medline:MedlineParser")
 
-__all__ = ["BibliographyParser", "registry"]
+__all__ = ["BibliographyParser", "RecordFilter", "registry"]
@@ -1,44 +1,128 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from importlib import import_module
 from pathlib import Path
-from typing import List, Set
+from typing import Any, Dict, List, Set
 
 from ..models import PaperEntry
 
+ENTRY_POINT_GROUP = "paper_review.parsers"
+
 
 class BibliographyParser(ABC):
     """Base class for converting bibliography files into :class:`PaperEntry` objects."""
 
+    # Bump whenever the produced entries change, so cached corpus snapshots are rebuilt.
+    version = "1"
+    # Parsers that accept ``parse(source, record_filter=...)`` and drop records before
+    # building entries; for the others the filter is applied to the parsed list.
+    supports_filters = False
+    # Parsers that provide ``record_boundary`` plus ``iter_records``/``build_entry``,
+    # so that byte ranges of one file can be parsed in parallel (see ``chunked``).
+    supports_chunks = False
+
     @abstractmethod
     def parse(self, source: Path) -> List[PaperEntry]:
         """Parse the given ``source`` file into a list of entries."""
 
+    def record_boundary(self, data: Any, position: int) -> int:
+        """Return the first byte offset at or after ``position`` where a record starts afresh, or -1.
+
+        The default finds no boundary, so the whole file is read as a single chunk.
+        """
+        return -1
+
+    def check_records(self, records: int) -> None:
+        """Validate the number of raw records read from one source."""
+
 
 class ParserRegistry:
-    """Registry used to map format names (or aliases) to parser implementations."""
+    """Registry used to map format names (or aliases) to parser implementations.
+
+    Parsers can be registered eagerly with an instance, or lazily with a
+    ``"module:attribute"`` target that is imported on first use. Third-party
+    packages may contribute lazy parsers through the ``paper_review.parsers``
+    entry-point group; names starting with ``.`` are treated as suffix
+    aliases, all other names as primary format names.
+    """
 
     def __init__(self) -> None:
         self._parsers: dict[str, BibliographyParser] = {}
+        self._lazy: Dict[str, str] = {}
         self._primary_names: Set[str] = set()
+        self._entry_points_loaded = False
 
     def register(self, name: str, parser: BibliographyParser, *, primary: bool = False) -> None:
         key = name.lower()
         self._parsers[key] = parser
+        self._lazy.pop(key, None)
+        if primary:
+            self._primary_names.add(key)
+
+    def register_lazy(self, name: str, target: str, *, primary: bool = False) -> None:
+        """Register ``target`` (``"package.module:ParserClass"``) without importing it."""
+        key = name.lower()
+        if key in self._parsers:
+            return
+        self._lazy[key] = target
         if primary:
             self._primary_names.add(key)
 
     def get(self, name: str) -> BibliographyParser:
         normalized = name.lower()
-        if normalized not in self._parsers:
-            available = ", ".join(sorted(self.available_formats())) or "无可用解析器"
-            raise ValueError(f"没有找到名为 {name} 的解析器，可选值: {available}。")
-        return self._parsers[normalized]
+        if normalized not in self._parsers and normalized not in self._lazy:
+            self._load_entry_points()
+        if normalized in self._parsers:
+            return self._parsers[normalized]
+        if normalized in self._lazy:
+            return self._resolve(normalized)
+        available = ", ".join(sorted(self.available_formats())) or "无可用解析器"
+        raise ValueError(f"没有找到名为 {name} 的解析器，可选值: {available}。")
 
-    def available_formats(self) -> List[str]:
+    def available_formats(self, *, discover: bool = True) -> List[str]:
+        if discover:
+            self._load_entry_points()
         if self._primary_names:
             return sorted(self._primary_names)
-        return sorted(self._parsers)
+        return sorted(set(self._parsers) | set(self._lazy))
+
+    def _resolve(self, key: str) -> BibliographyParser:
+        target = self._lazy[key]
+        module_name, _, attribute = target.partition(":")
+        module = import_module(module_name)
+        if key in self._parsers:
+            # The module registered its own instance when it was imported.
+            return self._parsers[key]
+        loaded = getattr(module, attribute)
+        parser = loaded() if isinstance(loaded, type) else loaded
+        if not isinstance(parser, BibliographyParser):
+            raise TypeError(f"{target} 不是 BibliographyParser 实现。")
+        # Every alias pointing at the same target shares one parser instance.
+        for alias in [alias for alias, value in self._lazy.items() if value == target]:
+            del self._lazy[alias]
+            self._parsers.setdefault(alias, parser)
+        return self._parsers[key]
+
+    def _load_entry_points(self) -> None:
+        if self._entry_points_loaded:
+            return
+        self._entry_points_loaded = True
+        try:
+            from importlib.metadata import entry_points
+        except ImportError:  # pragma: no cover - Python < 3.8
+            return
+        discovered = entry_points()
+        if hasattr(discovered, "select"):
+            group = discovered.select(group=ENTRY_POINT_GROUP)
+        else:  # pragma: no cover - Python < 3.10 returns a dict
+            group = discovered.get(ENTRY_POINT_GROUP, [])
+        for entry_point in group:
+            self.register_lazy(
+                entry_point.name,
+                entry_point.value,
+                primary=not entry_point.name.startswith("."),
+            )
 
 
 registry = ParserRegistry()
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .base import BibliographyParser, registry
+from .filters import RecordFilter
+from .utils import normalize_authors, normalize_doi
+from ..models import PaperEntry
+
+_ENTRY_START_PATTERN = re.compile(r"^\s*@\s*([A-Za-z]+)\s*([{(])")
+_FIELD_NAME_PATTERN = re.compile(r"\s*([A-Za-z][\w\-:.+]*)\s*=\s*")
+_BARE_VALUE_PATTERN = re.compile(r"[^\s,#{}()\"]+")
+_CONCAT_PATTERN = re.compile(r"\s*#\s*")
+_BRACE_PATTERN = re.compile(r"(?<!\\)[{}]")
+_QUOTED_END_PATTERN = re.compile(r'(?<!\\)[{}"]')
+_AUTHOR_SEPARATOR = re.compile(r"\s+and\s+", re.IGNORECASE)
+_ACCENT_PATTERN = re.compile(r"\\([`'^\"~=.])\s*\{?\s*([A-Za-z])\s*\}?")
+_ESCAPE_PATTERN = re.compile(r"\\([&%$#_{}])")
+_COMMAND_PATTERN = re.compile(r"\\[A-Za-z]+\s*")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+# Escaped braces survive the removal of grouping braces via placeholders.
+_ESCAPED = {"{": "\x01", "}": "\x02"}
+_ACCENTS = {"`": "\u0300", "'": "\u0301", "^": "\u0302", '"': "\u0308", "~": "\u0303", "=": "\u0304", ".": "\u0307"}
+_MONTHS = {
+    name: name.capitalize()
+    for name in ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+}
+
+
+def _clean_latex(value: str) -> str:
+    """Resolve common accents and escapes, drop grouping braces and collapse whitespace."""
+    if "\\" in value:
+        value = _ACCENT_PATTERN.sub(
+            lambda match: unicodedata.normalize("NFC", match.group(2) + _ACCENTS[match.group(1)]), value
+        )
+        value = _ESCAPE_PATTERN.sub(lambda match: _ESCAPED.get(match.group(1), match.group(1)), value)
+        value = _COMMAND_PATTERN.sub("", value)
+    value = value.replace("{", "").replace("}", "").replace("~", " ")
+    value = value.replace("\x01", "{").replace("\x02", "}")
+    return _WHITESPACE_PATTERN.sub(" ", value).strip()
+
+
+class BibTeXParser(BibliographyParser):
+    """Streaming BibTeX/BibLaTeX parser built on the Python standard library.
+
+    Entries are collected line by line with a small state machine (outside an
+    entry, inside one until its braces balance), so memory stays bounded by
+    the largest single entry. ``@string`` macros and ``#`` concatenation are
+    resolved; ``@comment`` and ``@preamble`` blocks are skipped.
+    """
+
+    TITLE_FIELDS = ("title",)
+    VENUE_FIELDS = ("journal", "journaltitle", "booktitle")
+    supports_filters = True
+
+    def parse(self, source: Path, record_filter: Optional[RecordFilter] = None) -> List[PaperEntry]:
+        papers: List[PaperEntry] = []
+        with source.open("r", encoding="utf-8") as handle:
+            for record in self.iter_records(handle):
+                paper = self.build_entry(record, len(papers), record_filter)
+                if paper is not None:
+                    papers.append(paper)
+        return papers
+
+    @classmethod
+    def iter_records(cls, lines: Iterable[str]) -> Iterator[Dict[str, str]]:
+        """Yield one ``field -> cleaned value`` mapping per bibliographic entry."""
+        macros: Dict[str, str] = dict(_MONTHS)
+        for entry_type, body in cls._iter_entries(lines):
+            if entry_type in ("comment", "preamble"):
+                continue
+            fields = cls._parse_fields(body, macros)
+            if entry_type == "string":
+                macros.update(fields)
+                continue
+            if fields:
+                yield {name: _clean_latex(value) for name, value in fields.items()}
+
+    @staticmethod
+    def _iter_entries(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+        """Group lines into ``(entry type, body)`` pairs; the body excludes the outer delimiters."""
+        entry_type: Optional[str] = None
+        closer = "}"
+        depth = 0
+        buffer: List[str] = []
+        for line in lines:
+            if entry_type is None:
+                match = _ENTRY_START_PATTERN.match(line)
+                if match is None:
+                    continue
+                entry_type = match.group(1).lower()
+                closer = "}" if match.group(2) == "{" else ")"
+                line = line[match.end() :]
+                depth = 0
+                buffer = []
+
+            if closer == "}":
+                end = -1
+                for brace in _BRACE_PATTERN.finditer(line):
+                    depth += 1 if brace.group() == "{" else -1
+                    if depth < 0:
+                        end = brace.start()
+                        break
+            else:
+                for brace in _BRACE_PATTERN.finditer(line):
+                    depth += 1 if brace.group() == "{" else -1
+                stripped = line.rstrip()
+                end = len(stripped) - 1 if depth <= 0 and stripped.endswith(")") else -1
+
+            if end == -1:
+                buffer.append(line)
+                continue
+            buffer.append(line[:end])
+            yield entry_type, "".join(buffer)
+            entry_type = None
+        if entry_type is not None and buffer:
+            # Unterminated last entry (e.g. a truncated export): keep what was read.
+            yield entry_type, "".join(buffer)
+
+    @staticmethod
+    def _parse_fields(body: str, macros: Dict[str, str]) -> Dict[str, str]:
+        fields: Dict[str, str] = {}
+        # Skip the citation key (absent in @string blocks).
+        position = 0
+        comma = body.find(",")
+        if comma != -1 and "=" not in body[:comma]:
+            position = comma + 1
+        length = len(body)
+        while position < length:
+            match = _FIELD_NAME_PATTERN.match(body, position)
+            if match is None:
+                next_comma = body.find(",", position)
+                if next_comma == -1:
+                    break
+                position = next_comma + 1
+                continue
+            name = match.group(1).lower()
+            position = match.end()
+            parts: List[str] = []
+            while position < length:
+                value, position = _read_value(body, position, macros)
+                parts.append(value)
+                concat = _CONCAT_PATTERN.match(body, position)
+                if concat is None:
+                    break
+                position = concat.end()
+            fields[name] = "".join(parts)
+            comma = body.find(",", position)
+            if comma == -1:
+                break
+            position = comma + 1
+        return fields
+
+    @classmethod
+    def build_entry(
+        cls, record: Dict[str, str], index: int, record_filter: Optional[RecordFilter] = None
+    ) -> Optional[PaperEntry]:
+        """Convert one record; return ``None`` when ``record_filter`` rejects it."""
+        title = " ".join(record[name] for name in cls.TITLE_FIELDS if record.get(name)).strip() or "Untitled"
+        abstract = record.get("abstract", "").strip()
+
+        year = None
+        for name in ("year", "date"):
+            match = _YEAR_PATTERN.search(record.get(name, ""))
+            if match:
+                year = int(match.group(0))
+                break
+
+        if record_filter is not None and not record_filter.accepts(title=title, abstract=abstract, year=year):
+            return None
+
+        raw_authors = _AUTHOR_SEPARATOR.split(record["author"]) if record.get("author") else []
+        authors = normalize_authors(raw_authors)
+        first_author = authors[0] if authors else "Unknown"
+
+        venue = next((record[name] for name in cls.VENUE_FIELDS if record.get(name)), "")
+
+        return PaperEntry(
+            id=index,
+            key=f"paper_{index + 1}",
+            title=title,
+            abstract=abstract,
+            first_author=first_author,
+            authors=authors or [first_author],
+            year=year,
+            venue=venue,
+            doi=normalize_doi([record.get("doi", ""), record.get("url", "")]),
+        )
+
+
+def _read_value(body: str, position: int, macros: Dict[str, str]) -> Tuple[str, int]:
+    """Read one braced, quoted, numeric or macro value starting at ``position``."""
+    while position < len(body) and body[position].isspace():
+        position += 1
+    if position >= len(body):
+        return "", position
+    opener = body[position]
+    if opener == "{":
+        depth = 0
+        for brace in _BRACE_PATTERN.finditer(body, position):
+            depth += 1 if brace.group() == "{" else -1
+            if depth == 0:
+                return body[position + 1 : brace.start()], brace.end()
+        return body[position + 1 :], len(body)
+    if opener == '"':
+        depth = 0
+        for mark in _QUOTED_END_PATTERN.finditer(body, position + 1):
+            char = mark.group()
+            if char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+            elif depth <= 0:
+                return body[position + 1 : mark.start()], mark.end()
+        return body[position + 1 :], len(body)
+    match = _BARE_VALUE_PATTERN.match(body, position)
+    if match is None:
+        return "", position
+    token = match.group()
+    return macros.get(token.lower(), token), match.end()
+
+
+def register_parser() -> None:
+    parser = BibTeXParser()
+    registry.register("bibtex", parser, primary=True)
+    registry.register(".bib", parser)
+
+
+register_parser()
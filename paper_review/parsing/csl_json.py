@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from .base import BibliographyParser, registry
+from .filters import RecordFilter
+from .utils import normalize_authors, normalize_doi
+from ..models import PaperEntry
+
+_YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+_READ_SIZE = 1 << 20
+
+
+class CSLJSONParser(BibliographyParser):
+    """Streaming parser for CSL-JSON exports (Zotero, Mendeley, citation.js, ...).
+
+    The file is read in 1 MB blocks and items are decoded one at a time with
+    ``json.JSONDecoder.raw_decode``, so a top-level array of a million items
+    never has to be loaded as a whole. A single item object, or items written
+    one per line (JSON Lines), are accepted as well.
+    """
+
+    supports_filters = True
+
+    def parse(self, source: Path, record_filter: Optional[RecordFilter] = None) -> List[PaperEntry]:
+        papers: List[PaperEntry] = []
+        with source.open("r", encoding="utf-8") as handle:
+            for record in self.iter_records(handle):
+                paper = self.build_entry(record, len(papers), record_filter)
+                if paper is not None:
+                    papers.append(paper)
+        return papers
+
+    @staticmethod
+    def iter_records(handle: TextIO) -> Iterator[Dict[str, Any]]:
+        """Yield the item objects of a CSL-JSON array, object or JSON Lines stream."""
+        decoder = json.JSONDecoder()
+        buffer = ""
+        position = 0
+        in_array = False
+        exhausted = False
+        while True:
+            # Skip whitespace and the array punctuation between items.
+            while position < len(buffer) and (buffer[position].isspace() or buffer[position] in ",﻿"):
+                position += 1
+            if position < len(buffer) and buffer[position] == "[" and not in_array:
+                in_array = True
+                position += 1
+                continue
+            if position < len(buffer) and buffer[position] == "]" and in_array:
+                return
+            if position >= len(buffer):
+                if exhausted:
+                    return
+                chunk = handle.read(_READ_SIZE)
+                buffer, position = buffer[position:] + chunk, 0
+                exhausted = not chunk
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as exc:
+                if exhausted:
+                    raise ValueError(f"CSL-JSON 解析失败（第 {exc.lineno} 行附近）：{exc.msg}") from exc
+                # Most likely an item cut by the block boundary: read more and retry.
+                chunk = handle.read(_READ_SIZE)
+                buffer, position = buffer[position:] + chunk, 0
+                exhausted = not chunk
+                continue
+            position = end
+            if isinstance(item, dict):
+                yield item
+            elif isinstance(item, list):
+                # A nested array of items, e.g. several arrays concatenated.
+                yield from (entry for entry in item if isinstance(entry, dict))
+
+    @staticmethod
+    def build_entry(
+        record: Dict[str, Any], index: int, record_filter: Optional[RecordFilter] = None
+    ) -> Optional[PaperEntry]:
+        """Convert one record; return ``None`` when ``record_filter`` rejects it."""
+        title = _text(record.get("title")) or "Untitled"
+        abstract = _text(record.get("abstract"))
+        year = _year(record)
+
+        if record_filter is not None and not record_filter.accepts(title=title, abstract=abstract, year=year):
+            return None
+
+        authors = normalize_authors(_name(person) for person in record.get("author") or [] if isinstance(person, dict))
+        first_author = authors[0] if authors else "Unknown"
+        venue = _text(record.get("container-title")) or _text(record.get("publisher"))
+
+        return PaperEntry(
+            id=index,
+            key=f"paper_{index + 1}",
+            title=title,
+            abstract=abstract,
+            first_author=first_author,
+            authors=authors or [first_author],
+            year=year,
+            venue=venue,
+            doi=normalize_doi([_text(record.get("DOI")), _text(record.get("URL"))]),
+        )
+
+
+def _text(value: Any) -> str:
+    # Some exporters write container-title and similar fields as lists.
+    if isinstance(value, list):
+        value = value[0] if value else ""
+    return str(value).strip() if value is not None else ""
+
+
+def _name(person: Dict[str, Any]) -> str:
+    family = _text(person.get("family"))
+    given = _text(person.get("given"))
+    if family and given:
+        return f"{family}, {given}"
+    return family or given or _text(person.get("literal"))
+
+
+def _year(record: Dict[str, Any]) -> Optional[int]:
+    for field in ("issued", "published-print", "published-online", "created"):
+        issued = record.get(field)
+        if not isinstance(issued, dict):
+            continue
+        parts = issued.get("date-parts")
+        if isinstance(parts, list) and parts and isinstance(parts[0], list) and parts[0]:
+            try:
+                return int(parts[0][0])
+            except (TypeError, ValueError):
+                pass
+        match = _YEAR_PATTERN.search(_text(issued.get("raw")) or _text(issued.get("literal")))
+        if match:
+            return int(match.group(0))
+    return None
+
+
+def register_parser() -> None:
+    parser = CSLJSONParser()
+    registry.register("csl-json", parser, primary=True)
+    registry.register(".json", parser)
+
+
+register_parser()
@@ -0,0 +1,110 @@
+"""Record filters evaluated by the parsers before a :class:`PaperEntry` is built.
+
+Checks run cheapest first (year, abstract presence, then keyword lookups on
+one case-folded copy of title and abstract), so rejected records cost little
+more than reading their lines. Parsers that set ``supports_filters`` apply
+the filter per raw record; for other parsers and for cached snapshots the
+same predicate is applied to the parsed entries with :meth:`RecordFilter.apply`.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import List, Optional, Sequence, Tuple
+
+from ..models import PaperEntry
+
+
+def _fold_keywords(keywords: Sequence[str]) -> Tuple[str, ...]:
+    # Substring tests on case-folded text are much cheaper than an IGNORECASE regex.
+    return tuple(keyword.strip().casefold() for keyword in keywords if keyword.strip())
+
+
+class RecordFilter:
+    """Year range, keyword include/exclude and abstract presence, with rejection counts.
+
+    ``include`` keywords are alternatives: a record passes when its title or
+    abstract contains any of them. A record containing any ``exclude``
+    keyword is rejected. Records without a year fail any year bound.
+    """
+
+    def __init__(
+        self,
+        *,
+        year_min: Optional[int] = None,
+        year_max: Optional[int] = None,
+        include: Sequence[str] = (),
+        exclude: Sequence[str] = (),
+        require_abstract: bool = False,
+    ) -> None:
+        self.year_min = year_min
+        self.year_max = year_max
+        self.require_abstract = require_abstract
+        self._include = _fold_keywords(include)
+        self._exclude = _fold_keywords(exclude)
+        self.seen = 0
+        self.rejected: Counter = Counter()
+
+    @property
+    def active(self) -> bool:
+        return (
+            self.year_min is not None
+            or self.year_max is not None
+            or self.require_abstract
+            or bool(self._include)
+            or bool(self._exclude)
+        )
+
+    def accepts(self, *, title: str, abstract: str, year: Optional[int]) -> bool:
+        self.seen += 1
+        if self.year_min is not None or self.year_max is not None:
+            if (
+                year is None
+                or (self.year_min is not None and year < self.year_min)
+                or (self.year_max is not None and year > self.year_max)
+            ):
+                self.rejected["year"] += 1
+                return False
+        if self.require_abstract and not abstract:
+            self.rejected["abstract"] += 1
+            return False
+        if self._include or self._exclude:
+            text = f"{title}\n{abstract}".casefold()
+            if self._include and not any(keyword in text for keyword in self._include):
+                self.rejected["include"] += 1
+                return False
+            if any(keyword in text for keyword in self._exclude):
+                self.rejected["exclude"] += 1
+                return False
+        return True
+
+    def fresh_copy(self) -> "RecordFilter":
+        """Same criteria with zeroed counts, e.g. for a worker process parsing one chunk."""
+        copy = RecordFilter(year_min=self.year_min, year_max=self.year_max, require_abstract=self.require_abstract)
+        copy._include = self._include
+        copy._exclude = self._exclude
+        return copy
+
+    def merge(self, other: "RecordFilter") -> None:
+        """Add the counts of ``other`` (a :meth:`fresh_copy`) to this filter."""
+        self.seen += other.seen
+        self.rejected.update(other.rejected)
+
+    def apply(self, papers: Sequence[PaperEntry]) -> List[PaperEntry]:
+        """Filter already parsed ``papers``, renumbering them as a filtering parser would."""
+        kept: List[PaperEntry] = []
+        for paper in papers:
+            if self.accepts(title=paper.title, abstract=paper.abstract, year=paper.year):
+                paper.id = len(kept)
+                paper.key = f"paper_{paper.id + 1}"
+                kept.append(paper)
+        return kept
+
+    def report_lines(self) -> List[str]:
+        if not self.seen:
+            return []
+        rejected = sum(self.rejected.values())
+        reasons = {"year": "年份", "abstract": "无摘要", "include": "未命中关键词", "exclude": "命中排除词"}
+        details = "，".join(f"{label} {self.rejected[key]}" for key, label in reasons.items() if self.rejected[key])
+        line = f"读取 {self.seen} 条记录，保留 {self.seen - rejected}，过滤 {rejected}"
+        return [f"{line}（{details}）" if details else line]
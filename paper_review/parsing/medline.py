@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .base import BibliographyParser, registry
+from .filters import RecordFilter
+from .utils import normalize_authors, normalize_doi
+from ..models import PaperEntry
+
+_TAG_LINE_PATTERN = re.compile(r"^([A-Z]{2,4})\s*- (.*)$")
+_YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+_DOI_SUFFIX = "[doi]"
+
+
+class MedlineParser(BibliographyParser):
+    """Streaming parser for PubMed's MEDLINE/``.nbib`` export.
+
+    Tags are padded to four characters (``TI  - ``); long values continue on
+    lines indented with spaces. Records are separated by blank lines, and a
+    new ``PMID-`` line also starts a record so concatenated exports work.
+    """
+
+    supports_filters = True
+
+    def parse(self, source: Path, record_filter: Optional[RecordFilter] = None) -> List[PaperEntry]:
+        papers: List[PaperEntry] = []
+        with source.open("r", encoding="utf-8") as handle:
+            for record in self.iter_records(handle):
+                paper = self.build_entry(record, len(papers), record_filter)
+                if paper is not None:
+                    papers.append(paper)
+        return papers
+
+    @staticmethod
+    def iter_records(lines: Iterable[str]) -> Iterator[Dict[str, List[str]]]:
+        """Group raw lines into ``tag -> values`` records."""
+        current: Dict[str, List[str]] = {}
+        last_values: Optional[List[str]] = None
+        for raw_line in lines:
+            line = raw_line.rstrip("\r\n")
+            if not line.strip():
+                if current:
+                    yield current
+                current, last_values = {}, None
+                continue
+            match = _TAG_LINE_PATTERN.match(line)
+            if match is None:
+                if last_values:
+                    last_values[-1] = f"{last_values[-1]} {line.strip()}"
+                continue
+            tag, value = match.group(1), match.group(2).strip()
+            if tag == "PMID" and current:
+                yield current
+                current = {}
+            last_values = current.setdefault(tag, [])
+            last_values.append(value)
+        if current:
+            yield current
+
+    @staticmethod
+    def build_entry(
+        record: Dict[str, List[str]], index: int, record_filter: Optional[RecordFilter] = None
+    ) -> Optional[PaperEntry]:
+        """Convert one record; return ``None`` when ``record_filter`` rejects it."""
+        title = " ".join(record.get("TI", [])).strip() or "Untitled"
+        abstract = " ".join(record.get("AB", [])).strip()
+
+        year = None
+        match = _YEAR_PATTERN.search(" ".join(record.get("DP", [])))
+        if match:
+            year = int(match.group(0))
+
+        if record_filter is not None and not record_filter.accepts(title=title, abstract=abstract, year=year):
+            return None
+
+        # Full author names when present, otherwise the abbreviated ``AU`` form.
+        authors = normalize_authors(record.get("FAU") or record.get("AU", []))
+        first_author = authors[0] if authors else "Unknown"
+
+        venue = " ".join(record.get("JT") or record.get("TA", [])).strip()
+
+        doi_values = [
+            value[: -len(_DOI_SUFFIX)]
+            for value in record.get("LID", []) + record.get("AID", [])
+            if value.endswith(_DOI_SUFFIX)
+        ]
+
+        return PaperEntry(
+            id=index,
+            key=f"paper_{index + 1}",
+            title=title,
+            abstract=abstract,
+            first_author=first_author,
+            authors=authors or [first_author],
+            year=year,
+            venue=venue,
+            doi=normalize_doi(value.strip() for value in doi_values),
+        )
+
+
+def register_parser() -> None:
+    parser = MedlineParser()
+    registry.register("medline", parser, primary=True)
+    registry.register(".nbib", parser)
+    registry.register(".medline", parser)
+
+
+register_parser()
@@ -2,105 +2,147 @@ from __future__ import annotations
 
 import re
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 from .base import BibliographyParser, registry
-from .utils import normalize_authors
+from .filters import RecordFilter
+from .utils import normalize_authors, normalize_doi
 from ..models import PaperEntry
 
+_TAG_LINE_PATTERN = re.compile(r"^([A-Z0-9]{2})\s+(.*)$")
+_YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+# Byte patterns after which record grouping restarts, with the offset of the restart:
+# a blank line ends a record, and an ``RT`` line starts one.
+_BOUNDARIES = ((b"\n\n", 2), (b"\r\n\r\n", 4), (b"\nRT ", 1))
+_BOUNDARY_WINDOW = 1 << 20
+
 
 class RefWorksParser(BibliographyParser):
     """Parser for RefWorks tagged text exports.
 
     The parser is intentionally minimal and only relies on the Python standard
     library. It collects common tags such as ``A1``/``AU`` for authors,
-    ``T1``/``TI`` for titles, ``AB`` for abstracts, ``YR`` for years, and
-    ``JF``/``T2`` for venues.
+    ``T1``/``TI`` for titles, ``AB`` for abstracts, ``YR`` for years,
+    ``JF``/``T2`` for venues, and ``DO`` for DOIs.
     """
 
     AUTHOR_TAGS = ("A1", "A2", "A3", "A4", "A5", "AU")
     TITLE_TAGS = ("T1", "TI")
     VENUE_TAGS = ("JF", "JO", "T2", "PB")
+    supports_filters = True
+    supports_chunks = True
 
-    def parse(self, source: Path) -> List[PaperEntry]:
-        records: List[Dict[str, List[str]]] = []
-        current: Dict[str, List[str]] = {}
-        last_key: str | None = None
-
-        def push_current() -> None:
-            nonlocal current, last_key
-            if any(current.values()):
-                records.append(current)
-            current = {}
-            last_key = None
-
+    def parse(self, source: Path, record_filter: Optional[RecordFilter] = None) -> List[PaperEntry]:
+        papers: List[PaperEntry] = []
+        records = 0
         with source.open("r", encoding="utf-8") as handle:
-            for raw_line in handle:
-                line = raw_line.rstrip("\n")
-                if not line.strip():
-                    push_current()
-                    continue
-
-                match = re.match(r"^([A-Z0-9]{2})\s+(.*)$", line)
-                if not match:
-                    if last_key:
-                        current.setdefault(last_key, []).append(line.strip())
-                    continue
-
-                tag, value = match.group(1), match.group(2).strip()
-                if tag == "RT" and current:
-                    push_current()
-                current.setdefault(tag, []).append(value)
-                last_key = tag
-
-            push_current()
+            for record in self.iter_records(handle):
+                records += 1
+                paper = self.build_entry(record, len(papers), record_filter)
+                if paper is not None:
+                    papers.append(paper)
 
+        self.check_records(records)
+        return papers
+
+    def check_records(self, records: int) -> None:
         if not records:
             raise ValueError("未能从 RefWorks 文件中解析出任何记录，请确认格式是否为带标签的导出。")
 
-        papers: List[PaperEntry] = []
-        for index, record in enumerate(records):
-            raw_authors: List[str] = []
-            for tag in self.AUTHOR_TAGS:
-                raw_authors.extend(record.get(tag, []))
-            authors = normalize_authors(raw_authors)
-            first_author = authors[0] if authors else "Unknown"
-
-            title_fields: List[str] = []
-            for tag in self.TITLE_TAGS:
-                title_fields.extend(record.get(tag, []))
-            title = " ".join(title_fields).strip() or "Untitled"
-
-            abstract = " ".join(record.get("AB", [])).strip()
-
-            year = None
-            for tag in ("YR", "PY"):
-                if tag in record:
-                    year_value = " ".join(record[tag])
-                    match = re.search(r"\b(19|20)\d{2}\b", year_value)
-                    if match:
-                        year = int(match.group(0))
-                        break
-
-            venue_fields: List[str] = []
-            for tag in self.VENUE_TAGS:
-                venue_fields.extend(record.get(tag, []))
-            venue = " ".join(venue_fields).strip()
-
-            papers.append(
-                PaperEntry(
-                    id=index,
-                    key=f"paper_{index + 1}",
-                    title=title,
-                    abstract=abstract,
-                    first_author=first_author,
-                    authors=authors or [first_author],
-                    year=year,
-                    venue=venue,
-                )
-            )
-
-        return papers
+    def record_boundary(self, data: Any, position: int) -> int:
+        """Return the offset after the first blank line, or of the first ``RT`` line, from ``position``."""
+        size = len(data)
+        start = max(position - 4, 0)
+        while start < size:
+            # Bounded windows keep a pattern that never occurs from scanning the whole file each time.
+            end = min(size, start + _BOUNDARY_WINDOW)
+            found = [
+                index + skip
+                for pattern, skip in _BOUNDARIES
+                for index in (data.find(pattern, start, end + len(pattern) - 1),)
+                if index != -1 and index + skip >= position
+            ]
+            if found:
+                return min(found)
+            start = end
+        return -1
+
+    @staticmethod
+    def iter_records(lines: Iterable[str]) -> Iterator[Dict[str, List[str]]]:
+        """Group raw lines into ``tag -> values`` records separated by blank lines or ``RT``."""
+        current: Dict[str, List[str]] = {}
+        last_key: Optional[str] = None
+        for raw_line in lines:
+            line = raw_line.rstrip("\n")
+            if not line.strip():
+                if any(current.values()):
+                    yield current
+                current = {}
+                last_key = None
+                continue
+
+            match = _TAG_LINE_PATTERN.match(line)
+            if not match:
+                if last_key:
+                    current.setdefault(last_key, []).append(line.strip())
+                continue
+
+            tag, value = match.group(1), match.group(2).strip()
+            if tag == "RT" and current:
+                if any(current.values()):
+                    yield current
+                current = {}
+            current.setdefault(tag, []).append(value)
+            last_key = tag
+        if any(current.values()):
+            yield current
+
+    @classmethod
+    def build_entry(
+        cls, record: Dict[str, List[str]], index: int, record_filter: Optional[RecordFilter] = None
+    ) -> Optional[PaperEntry]:
+        """Convert one record; return ``None`` when ``record_filter`` rejects it."""
+        title_fields: List[str] = []
+        for tag in cls.TITLE_TAGS:
+            title_fields.extend(record.get(tag, []))
+        title = " ".join(title_fields).strip() or "Untitled"
+
+        abstract = " ".join(record.get("AB", [])).strip()
+
+        year = None
+        for tag in ("YR", "PY"):
+            if tag in record:
+                year_value = " ".join(record[tag])
+                match = _YEAR_PATTERN.search(year_value)
+                if match:
+                    year = int(match.group(0))
+                    break
+
+        if record_filter is not None and not record_filter.accepts(title=title, abstract=abstract, year=year):
+            return None
+
+        raw_authors: List[str] = []
+        for tag in cls.AUTHOR_TAGS:
+            raw_authors.extend(record.get(tag, []))
+        authors = normalize_authors(raw_authors)
+        first_author = authors[0] if authors else "Unknown"
+
+        venue_fields: List[str] = []
+        for tag in cls.VENUE_TAGS:
+            venue_fields.extend(record.get(tag, []))
+        venue = " ".join(venue_fields).strip()
+
+        return PaperEntry(
+            id=index,
+            key=f"paper_{index + 1}",
+            title=title,
+            abstract=abstract,
+            first_author=first_author,
+            authors=authors or [first_author],
+            year=year,
+            venue=venue,
+            doi=normalize_doi(record.get("DO", [])),
+        )
 
 
 def register_parser() -> None:
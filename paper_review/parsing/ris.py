@@ -2,12 +2,17 @@ from __future__ import annotations
 
 import re
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 from .base import BibliographyParser, registry
-from .utils import normalize_authors
+from .filters import RecordFilter
+from .utils import normalize_authors, normalize_doi
 from ..models import PaperEntry
 
+_TAG_LINE_PATTERN = re.compile(r"^([A-Z0-9]{2})  - (.*)$")
+_YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+_END_TAG = b"ER  - "
+
 
 class RISParser(BibliographyParser):
     """Minimal RIS parser that only depends on the Python standard library."""
@@ -18,74 +23,103 @@ class RISParser(BibliographyParser):
         "year": ("PY", "Y1"),
         "venue": ("JO", "JF", "T2"),
     }
+    supports_filters = True
+    supports_chunks = True
 
-    def parse(self, source: Path) -> List[PaperEntry]:
-        records: List[Dict[str, List[str]]] = []
-        current: Dict[str, List[str]] = {}
-
-        def push_current() -> None:
-            nonlocal current
-            if current:
-                records.append(current)
-                current = {}
-
-        with source.open("r", encoding="utf-8") as handle:
-            for raw_line in handle:
-                line = raw_line.rstrip("\n")
-                if not line.strip():
-                    continue
-                match = re.match(r"^([A-Z0-9]{2})  - (.*)$", line)
-                if not match:
-                    if current:
-                        last_key = next(reversed(current))
-                        current[last_key].append(line.strip())
-                    continue
-
-                tag, value = match.group(1), match.group(2)
-                if tag == "ER":
-                    push_current()
-                else:
-                    current.setdefault(tag, []).append(value.strip())
-            push_current()
-
+    def parse(self, source: Path, record_filter: Optional[RecordFilter] = None) -> List[PaperEntry]:
         papers: List[PaperEntry] = []
-        for index, record in enumerate(records):
-            raw_authors = record.get("AU", []) + record.get("A1", [])
-            authors = normalize_authors(raw_authors)
-            first_author = authors[0] if authors else "Unknown"
-
-            title_fields = record.get("TI", []) + record.get("T1", [])
-            title = " ".join(title_fields).strip() if title_fields else "Untitled"
-
-            abstract = " ".join(record.get("AB", [])).strip()
-
-            year = None
-            for tag in ("PY", "Y1"):
-                if tag in record:
-                    year_value = " ".join(record[tag])
-                    match = re.search(r"\b(19|20)\d{2}\b", year_value)
-                    if match:
-                        year = int(match.group(0))
-                        break
-
-            venue_fields = record.get("JO", []) + record.get("JF", []) + record.get("T2", [])
-            venue = " ".join(venue_fields).strip()
-
-            papers.append(
-                PaperEntry(
-                    id=index,
-                    key=f"paper_{index + 1}",
-                    title=title,
-                    abstract=abstract,
-                    first_author=first_author,
-                    authors=authors or [first_author],
-                    year=year,
-                    venue=venue,
-                )
-            )
-
+        with source.open("r", encoding="utf-8") as handle:
+            for record in self.iter_records(handle):
+                paper = self.build_entry(record, len(papers), record_filter)
+                if paper is not None:
+                    papers.append(paper)
         return papers
 
+    @staticmethod
+    def iter_records(lines: Iterable[str]) -> Iterator[Dict[str, List[str]]]:
+        """Group raw lines into ``tag -> values`` records, one per ``ER`` terminator."""
+        current: Dict[str, List[str]] = {}
+        for raw_line in lines:
+            line = raw_line.rstrip("\n")
+            if not line.strip():
+                continue
+            match = _TAG_LINE_PATTERN.match(line)
+            if not match:
+                if current:
+                    last_key = next(reversed(current))
+                    current[last_key].append(line.strip())
+                continue
+
+            tag, value = match.group(1), match.group(2)
+            if tag == "ER":
+                if current:
+                    yield current
+                current = {}
+            else:
+                current.setdefault(tag, []).append(value.strip())
+        if current:
+            yield current
+
+    def record_boundary(self, data: Any, position: int) -> int:
+        """Return the offset just after the first ``ER`` line ending at or after ``position``."""
+        index = data.find(_END_TAG, max(position - len(_END_TAG), 0))
+        while index != -1:
+            # Only an ``ER`` tag at the start of a line ends a record.
+            if index == 0 or data[index - 1 : index] in (b"\n", b"\r"):
+                return _line_end(data, index)
+            index = data.find(_END_TAG, index + 1)
+        return -1
+
+    @staticmethod
+    def build_entry(
+        record: Dict[str, List[str]], index: int, record_filter: Optional[RecordFilter] = None
+    ) -> Optional[PaperEntry]:
+        """Convert one record; return ``None`` when ``record_filter`` rejects it."""
+        title_fields = record.get("TI", []) + record.get("T1", [])
+        title = " ".join(title_fields).strip() if title_fields else "Untitled"
+
+        abstract = " ".join(record.get("AB", [])).strip()
+
+        year = None
+        for tag in ("PY", "Y1"):
+            if tag in record:
+                year_value = " ".join(record[tag])
+                match = _YEAR_PATTERN.search(year_value)
+                if match:
+                    year = int(match.group(0))
+                    break
+
+        if record_filter is not None and not record_filter.accepts(title=title, abstract=abstract, year=year):
+            return None
+
+        raw_authors = record.get("AU", []) + record.get("A1", [])
+        authors = normalize_authors(raw_authors)
+        first_author = authors[0] if authors else "Unknown"
+
+        venue_fields = record.get("JO", []) + record.get("JF", []) + record.get("T2", [])
+        venue = " ".join(venue_fields).strip()
+
+        return PaperEntry(
+            id=index,
+            key=f"paper_{index + 1}",
+            title=title,
+            abstract=abstract,
+            first_author=first_author,
+            authors=authors or [first_author],
+            year=year,
+            venue=venue,
+            doi=normalize_doi(record.get("DO", [])),
+        )
+
+
+def _line_end(data: Any, index: int) -> int:
+    """Offset after the line containing ``index``, honouring ``\\n``, ``\\r\\n`` and ``\\r`` endings."""
+    newline = data.find(b"\n", index)
+    carriage = data.find(b"\r", index, len(data) if newline == -1 else newline)
+    if carriage != -1:
+        return carriage + 2 if data[carriage + 1 : carriage + 2] == b"\n" else carriage + 1
+    return -1 if newline == -1 else newline + 1
+
 
 def register_parser() -> None:
     parser = RISParser()
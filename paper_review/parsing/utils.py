@@ -4,6 +4,7 @@ import re
 from typing import Iterable, List
 
 _AUTHOR_SPLIT_PATTERN = re.compile(r"[;；、]+")
+_DOI_PATTERN = re.compile(r"10\.\d{4,9}/\S+")
 
 
 def normalize_authors(raw_authors: Iterable[str]) -> List[str]:
@@ -21,3 +22,12 @@ def normalize_authors(raw_authors: Iterable[str]) -> List[str]:
             if stripped:
                 normalized.append(stripped)
     return normalized
+
+
+def normalize_doi(raw_values: Iterable[str]) -> str:
+    """Return the first DOI found in ``raw_values``, lower-cased and without URL prefixes."""
+    for value in raw_values:
+        match = _DOI_PATTERN.search(value)
+        if match:
+            return match.group(0).rstrip(".,;").lower()
+    return ""
@@ -1,17 +1,75 @@
 from __future__ import annotations
 
+from dataclasses import replace
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from .budget import PRIORITY_POLICIES, BudgetExhausted, interleave_by_category, prioritize, skipped_summary
 from .classification import CategoryAssigner
+from .concurrency import run_concurrently
+from .deadletter import DeadLetterQueue, mark_failed
 from .exporters.markdown import export_markdown
+from .exporters.stats import STATS_NAME
+from .fanout import ReviewSpec
+from .metrics import metrics
 from .models import CategoryNode, PaperEntry
-from .parsing import registry
-from .progress import ProgressReporter
+from .parsing import BibliographyParser, RecordFilter, registry
+from .parsing.chunked import parse_chunked
+from .progress import ProgressReporter, StageDashboard
 from .schema import DefaultSchemaBuilder, SchemaBuilder
+from .snapshot import SnapshotCache
 from .summarization.base import Summarizer
 
 
+def parse_source(
+    source: Path,
+    input_format: Optional[str] = None,
+    snapshots: Optional[SnapshotCache] = None,
+    record_filter: Optional[RecordFilter] = None,
+    workers: int = 1,
+) -> List[PaperEntry]:
+    """Parse ``source`` with the parser registered for ``input_format`` or its suffix.
+
+    With ``workers`` other than 1, a large file is split at record boundaries
+    and parsed in a process pool (``0`` uses every CPU).
+    """
+    parser_key = input_format or source.suffix
+    parser = registry.get(parser_key)
+    papers = _parse_file(source, parser, snapshots, record_filter, workers)
+    if not papers and record_filter is not None and record_filter.seen:
+        raise ValueError(f"{source.name} 中的 {record_filter.seen} 条记录均被过滤条件排除，请放宽过滤条件。")
+    print(f"解析 {source.name} 完成，共 {len(papers)} 篇文献。")
+    return papers
+
+
+def _parse_file(
+    source: Path,
+    parser: BibliographyParser,
+    snapshots: Optional[SnapshotCache],
+    record_filter: Optional[RecordFilter],
+    workers: int = 1,
+) -> List[PaperEntry]:
+    if record_filter is not None and not record_filter.active:
+        record_filter = None
+
+    def parse(record_filter: Optional[RecordFilter] = None) -> List[PaperEntry]:
+        if workers != 1:
+            papers = parse_chunked(source, parser, workers, record_filter)
+            if papers is not None:
+                return papers
+        if record_filter is None:
+            return parser.parse(source)
+        return parser.parse(source, record_filter=record_filter)  # type: ignore[call-arg]
+
+    if snapshots is not None:
+        # Snapshots hold the whole corpus so that any filter can reuse them.
+        papers = snapshots.load_or_parse(source, parser, parse)
+        return papers if record_filter is None else record_filter.apply(papers)
+    if record_filter is None or parser.supports_filters:
+        return parse(record_filter)
+    return record_filter.apply(parse())
+
+
 class ReviewPipeline:
     """High-level orchestration for generating structured literature reviews."""
 
@@ -20,6 +78,15 @@ class ReviewPipeline:
         summarizer: Summarizer,
         category_assigner: CategoryAssigner,
         schema_builder: Optional[SchemaBuilder] = None,
+        *,
+        max_workers: int = 1,
+        retry_attempts: int = 2,
+        priority: str = "input",
+        budget_batch_size: Optional[int] = None,
+        snapshots: Optional[SnapshotCache] = None,
+        record_filter: Optional[RecordFilter] = None,
+        parse_workers: int = 1,
+        write_stats: bool = False,
     ) -> None:
         if summarizer is None:
             raise ValueError("必须提供基于大模型的 summarizer 实例。")
@@ -28,17 +95,125 @@ class ReviewPipeline:
         self.summarizer = summarizer
         self.category_assigner = category_assigner
         self.schema_builder = schema_builder or DefaultSchemaBuilder()
+        self.max_workers = max_workers
+        self.retry_attempts = max(0, retry_attempts)
+        if priority not in PRIORITY_POLICIES:
+            raise ValueError(f"未知的优先级策略：{priority}")
+        self.priority = priority
+        # With a budget, papers are processed in priority-ordered batches no larger
+        # than the concurrency, so that the budget is spent on complete papers
+        # rather than on one stage.
+        self.budget_batch_size = budget_batch_size
+        self.snapshots = snapshots
+        self.record_filter = record_filter
+        self.parse_workers = parse_workers
+        # Also write section statistics as ``stats.json`` next to each review.
+        self.write_stats = write_stats
 
     def parse(self, source: Path, input_format: Optional[str] = None) -> List[PaperEntry]:
-        parser_key = input_format or source.suffix
-        parser = registry.get(parser_key)
-        papers = parser.parse(source)
-        print(f"解析 {source.name} 完成，共 {len(papers)} 篇文献。")
-        return papers
+        return parse_source(
+            source,
+            input_format=input_format,
+            snapshots=self.snapshots,
+            record_filter=self.record_filter,
+            workers=self.parse_workers,
+        )
+
+    def summarize(
+        self, papers: List[PaperEntry], dead_letters: Optional[DeadLetterQueue] = None
+    ) -> None:
+        dashboard = StageDashboard("summary", "摘要", len(papers))
+        dashboard.start()
+
+        def summarize_one(paper: PaperEntry) -> None:
+            dashboard.task_started()
+            try:
+                paper.summary_zh = self.summarizer.summarize(paper)
+            except BudgetExhausted:
+                paper.summary_zh = skipped_summary(paper)
+                metrics.increment("budget.skipped.summary")
+                dashboard.task_finished()
+                return
+            except Exception as exc:  # pragma: no cover - depends on remote API behaviour
+                dashboard.task_finished(failed=True)
+                if dead_letters is None:
+                    raise
+                letter = dead_letters.add(paper, "summary", exc)
+                dashboard.log(f"⚠️ 摘要失败（第 {letter.attempts} 次），稍后重试：{paper.title or paper.first_author}")
+                return
+            dashboard.task_finished()
+
+        try:
+            run_concurrently(summarize_one, papers, self.max_workers)
+        finally:
+            dashboard.close()
+
+    def process(
+        self,
+        papers: List[PaperEntry],
+        schema: Dict[str, CategoryNode],
+        *,
+        classify: bool = True,
+        progress: Optional[ProgressReporter] = None,
+    ) -> DeadLetterQueue:
+        """Classify and summarize ``papers`` without aborting on per-paper failures.
+
+        Failed papers are parked in a dead-letter queue while the stage carries
+        on, then retried up to ``retry_attempts`` times once both stages are
+        done. Papers that still fail are marked via ``PaperEntry.errors`` and
+        returned in the queue.
+        """
+        dead_letters = DeadLetterQueue()
+        skipped_before = metrics.get("budget.skipped.summary")
+        ordered = prioritize(papers, self.priority)
+        if self.priority == "categories":
+            # Categories are only known after classification, so classify
+            # everything first and then spread summaries across categories.
+            if classify:
+                self.category_assigner.assign_isolated(ordered, schema, dead_letters)
+            batches = [interleave_by_category(ordered)]
+        else:
+            size = self.budget_batch_size or len(ordered) or 1
+            batches = [ordered[start : start + size] for start in range(0, len(ordered), size)]
+
+        for batch in batches:
+            if classify and self.priority != "categories":
+                self.category_assigner.assign_isolated(batch, schema, dead_letters)
+            self.summarize(batch, dead_letters)
+        if progress is not None:
+            if classify:
+                progress.advance("调用模型完成分类")
+            progress.advance("生成中文摘要")
+
+        skipped = int(metrics.get("budget.skipped.summary") - skipped_before)
+        if skipped:
+            print(f"⚠️ 调用预算已用尽，{skipped} 篇文献未生成摘要，已以占位内容导出。")
+
+        self._retry_dead_letters(schema, dead_letters)
+        self._mark_failures(dead_letters)
+        if progress is not None:
+            progress.advance("重试失败文献")
+        return dead_letters
+
+    def _retry_dead_letters(
+        self, schema: Dict[str, CategoryNode], dead_letters: DeadLetterQueue
+    ) -> None:
+        for attempt in range(1, self.retry_attempts + 1):
+            if not len(dead_letters):
+                return
+            print(f"\n🔁 第 {attempt}/{self.retry_attempts} 轮重试，共 {len(dead_letters)} 项失败任务。")
+            failed_classification = [letter.paper for letter in dead_letters.take("classify")]
+            if failed_classification:
+                self.category_assigner.assign_isolated(failed_classification, schema, dead_letters)
+            failed_summaries = [letter.paper for letter in dead_letters.take("summary")]
+            if failed_summaries:
+                self.summarize(failed_summaries, dead_letters)
 
-    def summarize(self, papers: List[PaperEntry]) -> None:
-        for paper in papers:
-            paper.summary_zh = self.summarizer.summarize(paper)
+    def _mark_failures(self, dead_letters: DeadLetterQueue) -> None:
+        for letter in dead_letters.letters():
+            mark_failed(letter.paper, letter.stage, letter.error)
+        if len(dead_letters):
+            print(f"⚠️ 重试后仍有 {len(dead_letters)} 项任务失败，将在综述中标注。")
 
     def build_schema(
         self,
@@ -59,8 +234,10 @@ class ReviewPipeline:
         m_sub: Optional[int] = None,
         sort_by_year: str = "none",
         input_format: Optional[str] = None,
+        papers: Optional[List[PaperEntry]] = None,
     ) -> Path:
-        if (source is None) == (categorized_dir is None):
+        """Run every stage; ``papers`` replaces parsing with an already selected corpus."""
+        if sum(item is not None for item in (source, categorized_dir, papers)) != 1:
             raise ValueError("必须通过 --input 或 --categorized-dir 提供且仅提供一种输入来源。")
         if categorized_dir is not None and (
             categories_yaml is not None or n_main is not None or m_sub is not None
@@ -70,8 +247,8 @@ class ReviewPipeline:
         out_md = out_dir / "review.md"
 
         if categorized_dir is not None:
-            progress = ProgressReporter(total_steps=4)
-            progress.start("🚀 开始文献综述流程（按文件分大类），共 4 个步骤。")
+            progress = ProgressReporter(total_steps=5)
+            progress.start("🚀 开始文献综述流程（按文件分大类），共 5 个步骤。")
 
             papers, grouped = self._parse_categorized_dir(categorized_dir, input_format=input_format)
             progress.advance("解析分组文献文件")
@@ -79,29 +256,114 @@ class ReviewPipeline:
             schema = self._build_schema_from_grouping(grouped)
             progress.advance("根据文件名固定分类")
 
-            self.summarize(papers)
-            progress.advance("生成中文摘要")
+            dead_letters = self.process(papers, schema, classify=False, progress=progress)
         else:
-            progress = ProgressReporter(total_steps=5)
-            progress.start("🚀 开始自动文献综述流程，共 5 个步骤。")
+            progress = ProgressReporter(total_steps=6)
+            progress.start("🚀 开始自动文献综述流程，共 6 个步骤。")
 
-            papers = self.parse(source, input_format=input_format)
-            progress.advance("解析文献源文件")
+            if papers is None:
+                papers = self.parse(source, input_format=input_format)
+                progress.advance("解析文献源文件")
+            else:
+                progress.advance("载入检索选出的文献")
 
             schema = self.build_schema(papers, categories_yaml, n_main, m_sub)
             progress.advance("构建分类体系")
 
-            self.category_assigner.assign(papers, schema)
-            progress.advance("调用模型完成分类")
+            dead_letters = self.process(papers, schema, progress=progress)
 
-            self.summarize(papers)
-            progress.advance("生成中文摘要")
-
-        export_markdown(papers, schema, out_md, sort_by_year=sort_by_year)
+        self._write_failures(dead_letters, out_dir / "failed.jsonl")
+        export_markdown(papers, schema, out_md, sort_by_year=sort_by_year, stats_path=self._stats_path(out_md))
         progress.advance("导出 Markdown 报告")
         print(f"\n✅ 已导出 Markdown 到: {out_md}")
         return out_md
 
+    def run_many(
+        self,
+        source: Path,
+        out_dir: Path,
+        specs: Sequence[ReviewSpec],
+        input_format: Optional[str] = None,
+    ) -> Dict[str, Path]:
+        """Produce one review per spec from a single parse and a single summary pass.
+
+        Summaries do not depend on the schema, so every paper is summarized
+        once; only schema building and classification run per spec, on
+        per-spec copies of the entries, with the specs classified concurrently.
+        Each review is written to ``out_dir/<spec.name>/review.md``.
+        """
+        if not specs:
+            raise ValueError("至少需要一个综述配置。")
+        progress = ProgressReporter(total_steps=6)
+        progress.start(f"🚀 开始多综述流程（{len(specs)} 份综述共用解析与摘要），共 6 个步骤。")
+
+        papers = self.parse(source, input_format=input_format)
+        progress.advance("解析文献源文件")
+
+        schemas = [self.build_schema(papers, spec.categories, spec.n_main, spec.m_sub) for spec in specs]
+        progress.advance(f"构建 {len(specs)} 套分类体系")
+
+        if self.priority == "categories":
+            print("多综述模式下各综述分类不同，摘要按输入顺序生成。")
+            ordered = list(papers)
+        else:
+            ordered = prioritize(papers, self.priority)
+        summary_letters = DeadLetterQueue()
+        skipped_before = metrics.get("budget.skipped.summary")
+        self.summarize(ordered, summary_letters)
+        skipped = int(metrics.get("budget.skipped.summary") - skipped_before)
+        if skipped:
+            print(f"⚠️ 调用预算已用尽，{skipped} 篇文献未生成摘要，已以占位内容导出。")
+        self._retry_dead_letters({}, summary_letters)
+        self._mark_failures(summary_letters)
+        metrics.increment("fanout.summaries", len(papers))
+        progress.advance("生成中文摘要（各综述共用）")
+
+        # Copies carry the shared summary and its failure mark, but get their own categories.
+        copies = [[replace(paper, errors=dict(paper.errors)) for paper in ordered] for _ in specs]
+
+        def classify_spec(index: int) -> DeadLetterQueue:
+            dead_letters = DeadLetterQueue()
+            self.category_assigner.assign_isolated(copies[index], schemas[index], dead_letters)
+            return dead_letters
+
+        spec_letters = run_concurrently(classify_spec, range(len(specs)), len(specs))
+        metrics.increment("fanout.classifications", len(papers) * len(specs))
+        progress.advance(f"调用模型完成 {len(specs)} 套分类")
+
+        for index, dead_letters in enumerate(spec_letters):
+            self._retry_dead_letters(schemas[index], dead_letters)
+            self._mark_failures(dead_letters)
+        progress.advance("重试失败文献")
+
+        outputs: Dict[str, Path] = {}
+        for spec, schema, spec_papers, dead_letters in zip(specs, schemas, copies, spec_letters):
+            spec_dir = out_dir / spec.name
+            spec_dir.mkdir(parents=True, exist_ok=True)
+            dead_letters.merge(summary_letters)
+            self._write_failures(dead_letters, spec_dir / "failed.jsonl")
+            spec_papers.sort(key=lambda paper: paper.id)
+            out_md = spec_dir / "review.md"
+            export_markdown(
+                spec_papers, schema, out_md, sort_by_year=spec.sort_by_year, stats_path=self._stats_path(out_md)
+            )
+            outputs[spec.name] = out_md
+        progress.advance("导出 Markdown 报告")
+        for name, out_md in outputs.items():
+            print(f"✅ 综述“{name}”已导出到: {out_md}")
+        return outputs
+
+    def _stats_path(self, out_md: Path) -> Optional[Path]:
+        return out_md.with_name(STATS_NAME) if self.write_stats else None
+
+    @staticmethod
+    def _write_failures(dead_letters: DeadLetterQueue, failed_path: Path) -> None:
+        if len(dead_letters):
+            dead_letters.write_jsonl(failed_path)
+            print(f"⚠️ 失败文献清单已写入: {failed_path}")
+        elif failed_path.exists():
+            failed_path.unlink()
+
     def _parse_categorized_dir(
         self, categorized_dir: Path, *, input_format: Optional[str]
     ) -> Tuple[List[PaperEntry], Dict[str, List[PaperEntry]]]:
@@ -116,11 +378,14 @@ class ReviewPipeline:
             category_name = entry.stem
             parser_key = input_format or entry.suffix
             parser = registry.get(parser_key)
-            parsed = parser.parse(entry)
+            parsed = _parse_file(entry, parser, self.snapshots, self.record_filter, self.parse_workers)
             print(f"解析 {entry.name} 完成，映射到大类“{category_name}”，共 {len(parsed)} 篇文献。")
             for paper in parsed:
                 paper.main_category = category_name
-            papers.extend(parsed)
+                # Each file numbers its records from 1; keys must be unique across the run.
+                paper.id = len(papers)
+                paper.key = f"paper_{paper.id + 1}"
+                papers.append(paper)
             grouped[category_name] = parsed
 
         if not papers:
@@ -1,6 +1,33 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from .metrics import metrics
+from .trace import QUIET, VERBOSE, trace
+
+ProgressObserver = Callable[[Dict[str, Any]], None]
+
+_observer: ContextVar[Optional[ProgressObserver]] = ContextVar("progress_observer", default=None)
+
+
+@contextmanager
+def observe_progress(observer: ProgressObserver) -> Iterator[None]:
+    """Send structured progress events of the current thread's run to ``observer``.
+
+    Stage dashboards capture the observer when they are created, so events
+    from their worker threads are attributed to the right run as well.
+    """
+    token = _observer.set(observer)
+    try:
+        yield
+    finally:
+        _observer.reset(token)
 
 
 @dataclass
@@ -10,20 +37,29 @@ class ProgressReporter:
     total_steps: int
     width: int = 24
     current_step: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
 
     def start(self, message: str) -> None:
         """Display an initial hint before entering the workflow."""
+        if trace.verbosity <= QUIET:
+            return
         print(message)
         self._display_bar()
 
     def advance(self, label: str) -> None:
         """Advance the bar by one step and output the current status."""
-        if self.total_steps <= 0:
-            print(f"\n{label}")
-            return
-        self.current_step = min(self.total_steps, self.current_step + 1)
-        print(f"\n[{self.current_step}/{self.total_steps}] {label}")
-        self._display_bar()
+        with self._lock:
+            self.current_step = min(self.total_steps, self.current_step + 1)
+            observer = _observer.get()
+            if observer is not None:
+                observer({"kind": "step", "label": label, "current": self.current_step, "total": self.total_steps})
+            if trace.verbosity <= QUIET:
+                return
+            if self.total_steps <= 0:
+                print(f"\n{label}")
+                return
+            print(f"\n[{self.current_step}/{self.total_steps}] {label}")
+            self._display_bar()
 
     def _display_bar(self) -> None:
         bar = self._render_bar()
@@ -38,3 +74,121 @@ class ProgressReporter:
         filled = max(0, min(self.width, filled))
         bar = "█" * filled + "░" * (self.width - filled)
         return f"[{bar}] {ratio * 100:5.1f}%"
+
+
+class StageDashboard:
+    """Rate-limited live status line for one per-paper stage.
+
+    Shows completed/total papers, papers/s, tokens/s (from the
+    ``tokens.<stage>`` counter), requests in flight, errors and ETA. On a
+    terminal the line is redrawn in place at most every ``tty_interval``
+    seconds; otherwise a line is printed every ``log_interval`` seconds, so
+    output volume no longer grows with the number of papers.
+    """
+
+    tty_interval = 0.2
+    log_interval = 5.0
+
+    def __init__(self, stage: str, label: str, total: int) -> None:
+        self.stage = stage
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._tokens_at_start = metrics.get(f"tokens.{stage}")
+        self._last_render = 0.0
+        # Echoed prompts would tear an in-place line, so verbose runs log periodically instead.
+        self._is_tty = sys.stdout.isatty() and trace.verbosity < VERBOSE
+        self._silent = trace.verbosity <= QUIET
+        self._line_open = False
+        self._rendered_done = -1
+        self._observer = _observer.get()
+
+    def start(self) -> None:
+        with self._lock:
+            self._notify()
+            self._render(force=True)
+
+    def task_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self._render()
+
+    def task_finished(self, *, failed: bool = False) -> None:
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            self.done += 1
+            if failed:
+                self.failed += 1
+            self._notify()
+            self._render(force=self.done >= self.total)
+
+    def log(self, message: str) -> None:
+        """Print ``message`` on its own line without tearing the live status line."""
+        with self._lock:
+            if self._is_tty and self._line_open and not self._silent:
+                sys.stdout.write("\r\x1b[K")
+                self._line_open = False
+            print(message)
+            self._render(force=self._is_tty)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._rendered_done != self.done:
+                self._render(force=True)
+            if self._is_tty and self._line_open and not self._silent:
+                sys.stdout.write("\n")
+                sys.stdout.flush()
+                self._line_open = False
+
+    def status_line(self) -> str:
+        elapsed = max(time.monotonic() - self._started, 1e-6)
+        rate = self.done / elapsed
+        tokens = (metrics.get(f"tokens.{self.stage}") - self._tokens_at_start) / elapsed
+        remaining = self.total - self.done
+        eta = _format_duration(remaining / rate) if rate > 0 and remaining > 0 else "--:--"
+        if remaining <= 0:
+            eta = "00:00"
+        return (
+            f"{self.label} {self.done}/{self.total}，{rate:.2f} 篇/s，{tokens:.0f} tokens/s，"
+            f"在途 {self.in_flight}，失败 {self.failed}，预计剩余 {eta}"
+        )
+
+    def _notify(self) -> None:
+        if self._observer is not None:
+            self._observer(
+                {
+                    "kind": "stage",
+                    "stage": self.stage,
+                    "done": self.done,
+                    "total": self.total,
+                    "failed": self.failed,
+                    "in_flight": self.in_flight,
+                }
+            )
+
+    def _render(self, force: bool = False) -> None:
+        if self._silent:
+            return
+        now = time.monotonic()
+        interval = self.tty_interval if self._is_tty else self.log_interval
+        if not force and now - self._last_render < interval:
+            return
+        self._last_render = now
+        self._rendered_done = self.done
+        line = self.status_line()
+        if self._is_tty:
+            sys.stdout.write("\r" + line + "\x1b[K")
+            sys.stdout.flush()
+            self._line_open = True
+        else:
+            print(line)
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import math
+from collections import Counter
+from typing import Dict, List
+
+from .models import CategoryNode, PaperEntry
+from .text import terms
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def _category_document(schema: Dict[str, CategoryNode], main: CategoryNode) -> str:
+    """Text indexed for ``main``: its name, sub-category names and any descriptions."""
+    parts = [main.name, main.description]
+    for child in main.children:
+        node = schema.get(child)
+        parts.append(child)
+        if node is not None:
+            parts.append(node.description)
+    return "\n".join(part for part in parts if part)
+
+
+class CategoryRetriever:
+    """BM25 index with one document per main category of ``schema``.
+
+    With large taxonomies the full category list dominates every classification
+    prompt; only the ``k`` best-scoring main categories (with their children)
+    are shown to the model.
+    """
+
+    def __init__(self, schema: Dict[str, CategoryNode], k: int) -> None:
+        self.schema = schema
+        self.k = k
+        self._mains = [node.name for node in schema.values() if node.parent is None]
+        self._term_counts: List[Counter] = [
+            Counter(terms(_category_document(schema, schema[name]))) for name in self._mains
+        ]
+        lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._lengths = lengths
+        self._average_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+        document_frequency: Counter = Counter()
+        for counts in self._term_counts:
+            document_frequency.update(counts.keys())
+        total = len(self._mains)
+        self._idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()
+        }
+
+    @property
+    def active(self) -> bool:
+        """Retrieval only pays off when it can actually drop main categories."""
+        return 0 < self.k < len(self._mains)
+
+    def scores(self, paper: PaperEntry) -> Dict[str, float]:
+        """Okapi BM25 score of every main category, using ``paper`` as the query."""
+        # The title is the densest signal, so it is counted twice.
+        query = Counter(terms(f"{paper.title}\n{paper.title}\n{paper.abstract}"))
+        result: Dict[str, float] = {}
+        for name, counts, length in zip(self._mains, self._term_counts, self._lengths):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (self._average_length or 1.0))
+            score = 0.0
+            for term, query_count in query.items():
+                frequency = counts.get(term)
+                if frequency:
+                    score += query_count * self._idf[term] * frequency * (BM25_K1 + 1) / (frequency + norm)
+            result[name] = score
+        return result
+
+    def candidates(self, paper: PaperEntry) -> List[str]:
+        """Return the top-``k`` main categories, or ``[]`` when nothing in the paper matches."""
+        scores = self.scores(paper)
+        ranked = sorted(self._mains, key=lambda name: -scores[name])[: self.k]
+        if not ranked or scores[ranked[0]] <= 0:
+            return []
+        return ranked
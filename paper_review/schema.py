@@ -3,14 +3,17 @@ from __future__ import annotations
 import json
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence
 
+from .budget import BudgetExhausted
+from .llm.json_repair import extract_json
+from .llm.streaming import complete_json
+from .metrics import metrics
 from .models import CategoryNode, PaperEntry
+from .text import budgeted_abstract
 
-try:  # pragma: no cover - optional dependency
-    import yaml  # type: ignore
-except ImportError:  # pragma: no cover - handled gracefully
-    yaml = None
+if TYPE_CHECKING:  # pragma: no cover - import cycle only matters for annotations
+    from .schema_cache import SchemaCache
 
 
 def build_simple_auto_schema() -> Dict[str, CategoryNode]:
@@ -43,8 +46,10 @@ def suggest_schema_from_papers_auto(
 
 
 def load_schema_from_yaml(path: Path) -> Dict[str, CategoryNode]:
-    if yaml is None:
-        raise RuntimeError("未安装 pyyaml，无法解析 YAML。请先 `pip install pyyaml`")
+    try:  # pragma: no cover - optional dependency, imported on first use
+        import yaml  # type: ignore
+    except ImportError as exc:  # pragma: no cover - handled gracefully
+        raise RuntimeError("未安装 pyyaml，无法解析 YAML。请先 `pip install pyyaml`") from exc
 
     data = yaml.safe_load(path.read_text(encoding="utf-8"))
     if not isinstance(data, list):
@@ -58,18 +63,51 @@ def load_schema_from_yaml(path: Path) -> Dict[str, CategoryNode]:
         children_names: List[str] = []
 
         for child in main.get("children", []):
+            description = ""
             if isinstance(child, dict):
                 sub_name = str(child.get("name", "未命名子类"))
+                description = str(child.get("description") or "")
             else:
                 sub_name = str(child)
             children_names.append(sub_name)
-            schema[sub_name] = CategoryNode(name=sub_name, parent=main_name, children=[])
+            schema[sub_name] = CategoryNode(
+                name=sub_name, parent=main_name, children=[], description=description
+            )
 
-        schema[main_name] = CategoryNode(name=main_name, parent=None, children=children_names)
+        schema[main_name] = CategoryNode(
+            name=main_name,
+            parent=None,
+            children=children_names,
+            description=str(main.get("description") or ""),
+        )
 
     return schema
 
 
+def dump_schema_yaml(schema: Dict[str, CategoryNode]) -> str:
+    """Render ``schema`` in the ``categories.yaml`` layout read by :func:`load_schema_from_yaml`."""
+    try:  # pragma: no cover - optional dependency, imported on first use
+        import yaml  # type: ignore
+    except ImportError as exc:  # pragma: no cover - handled gracefully
+        raise RuntimeError("未安装 pyyaml，无法写出 YAML。请先 `pip install pyyaml`") from exc
+
+    def item(node: CategoryNode) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"name": node.name}
+        if node.description:
+            data["description"] = node.description
+        return data
+
+    items = [
+        {
+            **item(node),
+            "children": [item(schema.get(child) or CategoryNode(name=child)) for child in node.children],
+        }
+        for node in schema.values()
+        if node.parent is None
+    ]
+    return yaml.safe_dump(items, allow_unicode=True, sort_keys=False)
+
+
 class SchemaSuggestionFailed(RuntimeError):
     """Raised when the LLM-backed schema builder cannot infer a valid schema."""
 
@@ -111,9 +149,20 @@ class DefaultSchemaBuilder(SchemaBuilder):
 class LLMSchemaBuilder(DefaultSchemaBuilder):
     """Infer schema names by prompting a chat-completions compatible model."""
 
-    def __init__(self, client: Any, *, model: str = "deepseek-chat") -> None:
+    def __init__(
+        self,
+        client: Any,
+        *,
+        model: str = "deepseek-chat",
+        abstract_budget: Optional[int] = None,
+        stream: bool = False,
+        cache: Optional["SchemaCache"] = None,
+    ) -> None:
         self.client = client
         self.model = model
+        self.abstract_budget = abstract_budget
+        self.stream = stream
+        self.cache = cache
 
     def build(
         self,
@@ -125,12 +174,63 @@ class LLMSchemaBuilder(DefaultSchemaBuilder):
         if categories_yaml is not None:
             return super().build(papers, categories_yaml, n_main, m_sub)
 
+        if self.cache is not None:
+            cached = self._build_from_cache(self.cache, papers, n_main, m_sub)
+            if cached is not None:
+                return cached
+
         try:
             print("未提供 YAML，使用大模型自动推断类别结构。")
-            return self._build_with_llm(papers, n_main, m_sub)
-        except SchemaSuggestionFailed as exc:
+            schema = self._build_with_llm(papers, n_main, m_sub)
+        except (SchemaSuggestionFailed, BudgetExhausted) as exc:
             print(f"⚠️ 大模型推断类别结构失败，将退回默认策略：{exc}")
             return super().build(papers, None, n_main, m_sub)
+        if self.cache is not None:
+            path = self.cache.store(papers, self._cache_settings(n_main, m_sub), schema)
+            if path is not None:
+                print(f"类别结构已写入缓存: {path}")
+        return schema
+
+    def _cache_settings(self, n_main: Optional[int], m_sub: Optional[int]) -> str:
+        return f"model={self.model};n_main={n_main};m_sub={m_sub};budget={self.abstract_budget}"
+
+    def _build_from_cache(
+        self,
+        cache: "SchemaCache",
+        papers: List[PaperEntry],
+        n_main: Optional[int],
+        m_sub: Optional[int],
+    ) -> Optional[Dict[str, CategoryNode]]:
+        """Reuse a cached schema, extending it when only a few papers are new."""
+        settings = self._cache_settings(n_main, m_sub)
+        hit = cache.lookup(papers, settings)
+        if hit is None:
+            metrics.increment("schema_cache.miss")
+            return None
+        if hit.exact:
+            metrics.increment("schema_cache.hit")
+            print(f"语料与参数未变化，复用缓存的类别结构: {hit.path}")
+            return hit.schema
+        if not hit.new_papers:
+            # The cached corpus contains every current paper (e.g. a filtered subset).
+            metrics.increment("schema_cache.reused")
+            print(f"语料有变化，但 {len(papers)} 篇文献均已被缓存的类别结构覆盖，直接复用: {hit.path}")
+            return hit.schema
+
+        metrics.increment("schema_cache.extended")
+        print(
+            f"缓存的类别结构已覆盖 {len(papers) - len(hit.new_papers)}/{len(papers)} 篇文献，"
+            f"仅用 {len(hit.new_papers)} 篇新文献扩展: {hit.path}"
+        )
+        try:
+            schema = self._extend_with_llm(hit.schema, hit.new_papers, n_main, m_sub)
+        except (SchemaSuggestionFailed, BudgetExhausted) as exc:
+            print(f"⚠️ 扩展类别结构失败，沿用缓存版本：{exc}")
+            schema = hit.schema
+        path = cache.store(papers, settings, schema)
+        if path is not None:
+            print(f"扩展后的类别结构已写入缓存: {path}")
+        return schema
 
     def _build_with_llm(
         self,
@@ -139,18 +239,19 @@ class LLMSchemaBuilder(DefaultSchemaBuilder):
         m_sub: Optional[int],
     ) -> Dict[str, CategoryNode]:
         prompt = self._build_prompt(papers, n_main, m_sub)
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
+        request = {
+            "model": self.model,
+            "messages": [
                 {"role": "system", "content": "You are a helpful assistant."},
                 {"role": "user", "content": prompt},
             ],
-            response_format={"type": "json_object"},
-            stream=False,
-        )
-        content = response.choices[0].message.content or ""
-        data = _extract_json(content) or {}
-        main_categories = data.get("main_categories")
+            "response_format": {"type": "json_object"},
+        }
+        content = complete_json(self.client, request, stream=self.stream, stage="schema")
+        data, truncated = extract_json(content, "schema")
+        if truncated:
+            raise SchemaSuggestionFailed("模型返回的类别结构被截断。")
+        main_categories = (data or {}).get("main_categories")
         if not isinstance(main_categories, list) or not main_categories:
             raise SchemaSuggestionFailed("模型未返回 main_categories 列表。")
 
@@ -159,6 +260,44 @@ class LLMSchemaBuilder(DefaultSchemaBuilder):
             raise SchemaSuggestionFailed("模型返回的类别结构为空。")
         return normalized
 
+    def _extend_with_llm(
+        self,
+        schema: Dict[str, CategoryNode],
+        new_papers: List[PaperEntry],
+        n_main: Optional[int],
+        m_sub: Optional[int],
+    ) -> Dict[str, CategoryNode]:
+        existing = [
+            {"name": node.name, "sub_categories": list(node.children)}
+            for node in schema.values()
+            if node.parent is None
+        ]
+        instructions = [
+            "你是一名中文学术综述助手，需要在已有的主类(main_category)和子类(sub_category)结构上吸收一批新增文献。",
+            "已有主类与子类的名称必须原样保留；只有当新文献明显无法归入任何已有类别时，才新增子类或主类。",
+            "新增名称保持 4-10 个汉字，不要带序号或冒号。",
+            "请输出完整结构的 JSON，格式为 {\"main_categories\": [{\"name\": \"...\", \"sub_categories\": [\"...\"]}, ...]}。",
+            "已有结构：" + json.dumps({"main_categories": existing}, ensure_ascii=False),
+        ]
+        paper_descriptions = "\n".join(self._render_paper_digest(paper) for paper in new_papers)
+        request = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": "You are a helpful assistant."},
+                {"role": "user", "content": "\n".join(instructions) + "\n\n新增文献：\n" + paper_descriptions},
+            ],
+            "response_format": {"type": "json_object"},
+        }
+        content = complete_json(self.client, request, stream=self.stream, stage="schema")
+        data, truncated = extract_json(content, "schema")
+        if truncated:
+            raise SchemaSuggestionFailed("模型返回的类别结构被截断。")
+        main_categories = (data or {}).get("main_categories")
+        if not isinstance(main_categories, list):
+            raise SchemaSuggestionFailed("模型未返回 main_categories 列表。")
+        proposed = self._normalize_main_categories(main_categories, None, m_sub)
+        return _merge_schema(schema, proposed, n_main, m_sub)
+
     def _build_prompt(
         self,
         papers: List[PaperEntry],
@@ -192,8 +331,11 @@ class LLMSchemaBuilder(DefaultSchemaBuilder):
         return "\n".join(instructions) + "\n\n文献列表：\n" + paper_descriptions
 
     def _render_paper_digest(self, paper: PaperEntry) -> str:
-        abstract = paper.abstract.strip() if paper.abstract else "（暂无摘要）"
-        truncated = _truncate(abstract, limit=400)
+        if self.abstract_budget:
+            abstract = budgeted_abstract(paper, self.abstract_budget, "schema").strip()
+        else:
+            abstract = _truncate(paper.abstract.strip(), limit=400) if paper.abstract else ""
+        truncated = abstract or "（暂无摘要）"
         year = f"，年份：{paper.year}" if paper.year is not None else ""
         return (
             f"- 标题：{paper.title or '未命名论文'}\n"
@@ -246,21 +388,40 @@ class LLMSchemaBuilder(DefaultSchemaBuilder):
         return schema
 
 
+def _merge_schema(
+    base: Dict[str, CategoryNode],
+    proposed: Dict[str, CategoryNode],
+    n_main: Optional[int],
+    m_sub: Optional[int],
+) -> Dict[str, CategoryNode]:
+    """Add the new names of ``proposed`` to ``base`` without renaming or dropping anything."""
+    merged = {
+        name: CategoryNode(name=node.name, parent=node.parent, children=list(node.children))
+        for name, node in base.items()
+    }
+    main_count = sum(1 for node in merged.values() if node.parent is None)
+    for node in proposed.values():
+        if node.parent is not None:
+            continue
+        target = merged.get(node.name)
+        if target is None:
+            if n_main is not None and n_main > 0 and main_count >= n_main:
+                continue
+            target = merged[node.name] = CategoryNode(name=node.name, parent=None, children=[])
+            main_count += 1
+        elif target.parent is not None:
+            continue
+        for child in node.children:
+            if child in merged:
+                continue
+            if m_sub is not None and len(target.children) >= max(m_sub, 0):
+                break
+            target.children.append(child)
+            merged[child] = CategoryNode(name=child, parent=target.name, children=[])
+    return merged
+
+
 def _truncate(text: str, *, limit: int) -> str:
     if len(text) <= limit:
         return text
     return text[: max(0, limit - 1)] + "…"
-
-
-def _extract_json(payload: str) -> Optional[Dict[str, Any]]:
-    try:
-        return json.loads(payload)
-    except json.JSONDecodeError:
-        start = payload.find("{")
-        end = payload.rfind("}")
-        if start != -1 and end != -1 and start < end:
-            try:
-                return json.loads(payload[start : end + 1])
-            except json.JSONDecodeError:
-                return None
-        return None
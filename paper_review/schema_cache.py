@@ -0,0 +1,134 @@
+"""Cross-run cache of LLM-inferred schemas, keyed by a corpus fingerprint.
+
+Each entry is a ``<fingerprint>.yaml`` file in the same format as
+``categories.yaml`` (so it can be loaded with :func:`load_schema_from_yaml`
+or copied into a project by hand) plus a ``<fingerprint>.meta.json`` sidecar
+holding the per-paper digests and the settings that produced it. The
+sidecar is what allows a later run to find an entry covering most of its
+papers and extend it instead of inferring a schema from scratch.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from .models import CategoryNode, PaperEntry
+from .schema import dump_schema_yaml, load_schema_from_yaml
+from .serialization import read_json, write_json
+
+SCHEMA_CACHE_VERSION = 1
+
+
+def paper_digest(paper: PaperEntry) -> str:
+    """Identify a paper by the fields the schema prompt is built from."""
+    text = "\x1f".join(
+        [
+            " ".join(paper.title.lower().split()),
+            " ".join(paper.abstract.split()),
+            str(paper.year or ""),
+            paper.first_author.lower(),
+        ]
+    )
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def schema_fingerprint(digests: Sequence[str], settings: str) -> str:
+    """Fingerprint a corpus (order-insensitive) together with the inference settings."""
+    digest = hashlib.sha256(settings.encode("utf-8"))
+    for item in sorted(set(digests)):
+        digest.update(item.encode("ascii"))
+    return digest.hexdigest()[:20]
+
+
+@dataclass(frozen=True)
+class SchemaCacheHit:
+    """A cached schema plus the papers of the current corpus it has never seen.
+
+    ``exact`` is set only when the entry was inferred from exactly this corpus;
+    an entry for a larger corpus can cover every paper without being exact.
+    """
+
+    schema: Dict[str, CategoryNode]
+    path: Path
+    new_papers: List[PaperEntry]
+    exact: bool = False
+
+
+class SchemaCache:
+    """Directory of inferred schemas reusable by later runs with the same settings."""
+
+    def __init__(self, directory: Path, *, extend_threshold: float = 0.2) -> None:
+        self.directory = directory
+        self.extend_threshold = extend_threshold
+
+    def lookup(self, papers: Sequence[PaperEntry], settings: str) -> Optional[SchemaCacheHit]:
+        """Return the exact entry for ``papers``, or the best entry worth extending."""
+        digests = [paper_digest(paper) for paper in papers]
+        exact = self._yaml_path(schema_fingerprint(digests, settings))
+        if exact.exists():
+            return SchemaCacheHit(load_schema_from_yaml(exact), exact, [], exact=True)
+
+        best: Optional[Path] = None
+        best_known: Set[str] = set()
+        for meta_path in sorted(self.directory.glob("*.meta.json")):
+            meta = _read_meta(meta_path)
+            if meta is None or meta.get("settings") != settings:
+                continue
+            known = set(meta.get("papers", [])).intersection(digests)
+            if len(known) > len(best_known):
+                best, best_known = meta_path, known
+
+        if best is None or not digests:
+            return None
+        new_papers = [paper for paper, digest in zip(papers, digests) if digest not in best_known]
+        if len(new_papers) > self.extend_threshold * len(papers):
+            return None
+        yaml_path = self._yaml_path(best.name[: -len(".meta.json")])
+        if not yaml_path.exists():
+            return None
+        return SchemaCacheHit(load_schema_from_yaml(yaml_path), yaml_path, new_papers)
+
+    def store(
+        self, papers: Sequence[PaperEntry], settings: str, schema: Dict[str, CategoryNode]
+    ) -> Optional[Path]:
+        """Write ``schema`` for ``papers``; return ``None`` when it cannot be cached (no pyyaml)."""
+        try:
+            text = dump_schema_yaml(schema)
+        except RuntimeError as exc:
+            # The schema is already paid for and in use; only the cache entry is lost.
+            print(f"⚠️ 类别结构未写入缓存：{exc}")
+            return None
+        digests = sorted({paper_digest(paper) for paper in papers})
+        key = schema_fingerprint(digests, settings)
+        yaml_path = self._yaml_path(key)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = yaml_path.with_name(yaml_path.name + ".tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        tmp_path.replace(yaml_path)
+        write_json(
+            self.directory / f"{key}.meta.json",
+            {
+                "version": SCHEMA_CACHE_VERSION,
+                "settings": settings,
+                "created": int(time.time()),
+                "papers": digests,
+            },
+        )
+        return yaml_path
+
+    def _yaml_path(self, key: str) -> Path:
+        return self.directory / f"{key}.yaml"
+
+
+def _read_meta(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        meta = read_json(path)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(meta, dict) or meta.get("version") != SCHEMA_CACHE_VERSION:
+        return None
+    return meta
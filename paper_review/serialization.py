@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, fields
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .models import CategoryNode, PaperEntry
+
+_PAPER_FIELDS = {item.name for item in fields(PaperEntry)}
+
+
+def paper_to_dict(paper: PaperEntry) -> Dict[str, Any]:
+    return asdict(paper)
+
+
+def paper_from_dict(data: Dict[str, Any]) -> PaperEntry:
+    """Rebuild a :class:`PaperEntry`, ignoring keys unknown to this version."""
+    return PaperEntry(**{key: value for key, value in data.items() if key in _PAPER_FIELDS})
+
+
+def schema_to_list(schema: Dict[str, CategoryNode]) -> List[Dict[str, Any]]:
+    """Serialize a schema while keeping its insertion order, which drives export order."""
+    return [asdict(node) for node in schema.values()]
+
+
+def schema_from_list(items: List[Dict[str, Any]]) -> Dict[str, CategoryNode]:
+    schema: Dict[str, CategoryNode] = {}
+    for item in items:
+        node = CategoryNode(
+            name=str(item["name"]),
+            parent=item.get("parent"),
+            children=[str(child) for child in item.get("children", [])],
+            description=str(item.get("description") or ""),
+        )
+        schema[node.name] = node
+    return schema
+
+
+def write_json(path: Path, payload: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(payload, ensure_ascii=False, indent=1), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def read_json(path: Path) -> Any:
+    return json.loads(path.read_text(encoding="utf-8"))
@@ -0,0 +1,343 @@
+"""Long-running review service: an HTTP job API over a warm, shared pipeline setup.
+
+Every job spawned through ``main.py`` used to re-import the package, rebuild
+the OpenAI client and start with cold caches. :class:`ReviewService` keeps
+one set of LLM clients, schema cache and summary store alive and runs
+uploaded bibliographies through a job queue; :func:`make_server` exposes it
+over HTTP using only the standard library:
+
+``POST /jobs``
+    Upload a RIS/RefWorks file, either as ``multipart/form-data`` (field
+    ``file``, optional ``categories`` YAML and option fields) or as the raw
+    request body with ``?filename=...`` and options in the query string.
+``GET /jobs`` / ``GET /jobs/<id>``
+    Job list / status with per-stage progress.
+``GET /jobs/<id>/review.md`` / ``GET /jobs/<id>/failed.jsonl`` / ``GET /jobs/<id>/stats.json``
+    Download results once the job has finished (``stats.json`` only when the
+    service runs with ``--stats-json``).
+``GET /metrics`` / ``GET /health``
+    Run statistics of the service process / liveness.
+"""
+
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from email.parser import BytesParser
+from email.policy import HTTP
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from .budget import PRIORITY_POLICIES
+from .exporters.stats import STATS_NAME
+from .metrics import metrics
+from .pipeline import ReviewPipeline
+from .progress import observe_progress
+
+JOB_OPTIONS = ("input_format", "n_main", "m_sub", "sort_by_year", "priority")
+_INT_OPTIONS = ("n_main", "m_sub")
+_SORT_CHOICES = ("none", "asc", "desc")
+
+PipelineFactory = Callable[[Dict[str, Any]], ReviewPipeline]
+
+
+class JobRequestError(ValueError):
+    """Raised for malformed job submissions; reported to the client as HTTP 400."""
+
+
+@dataclass
+class ReviewJob:
+    id: str
+    input_path: Path
+    out_dir: Path
+    options: Dict[str, Any]
+    categories_path: Optional[Path] = None
+    status: str = "queued"
+    error: str = ""
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    step: Dict[str, Any] = field(default_factory=dict)
+    stages: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def observe(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            if event.get("kind") == "step":
+                self.step = {key: event[key] for key in ("label", "current", "total")}
+            elif event.get("kind") == "stage":
+                self.stages[str(event["stage"])] = {
+                    key: event[key] for key in ("done", "total", "failed", "in_flight")
+                }
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "error": self.error,
+                "input": self.input_path.name,
+                "options": dict(self.options),
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+                "step": dict(self.step),
+                "stages": {name: dict(values) for name, values in self.stages.items()},
+                "review_url": f"/jobs/{self.id}/review.md" if self.status == "succeeded" else None,
+            }
+
+
+class ReviewService:
+    """Queue of review jobs executed by ``max_jobs`` worker threads."""
+
+    def __init__(
+        self,
+        pipeline_factory: PipelineFactory,
+        work_dir: Path,
+        *,
+        max_jobs: int = 1,
+        defaults: Optional[Dict[str, Any]] = None,
+        default_categories: Optional[Path] = None,
+    ) -> None:
+        self.pipeline_factory = pipeline_factory
+        self.work_dir = work_dir
+        self.max_jobs = max(1, max_jobs)
+        self.defaults = dict(defaults or {})
+        self.default_categories = default_categories
+        self._jobs: Dict[str, ReviewJob] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[ReviewJob]]" = queue.Queue()
+        self._workers: List[threading.Thread] = []
+
+    def start(self) -> None:
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        for index in range(self.max_jobs):
+            worker = threading.Thread(target=self._work, name=f"review-job-{index + 1}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self) -> None:
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers.clear()
+
+    def submit(
+        self,
+        filename: str,
+        data: bytes,
+        options: Dict[str, str],
+        categories: Optional[bytes] = None,
+    ) -> ReviewJob:
+        name = Path(filename or "").name
+        if not name or not data:
+            raise JobRequestError("缺少上传的文献文件。")
+        resolved = self._resolve_options(options)
+
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = self.work_dir / job_id
+        job_dir.mkdir(parents=True)
+        input_path = job_dir / name
+        input_path.write_bytes(data)
+        categories_path = self.default_categories
+        if categories:
+            categories_path = job_dir / "categories.yaml"
+            categories_path.write_bytes(categories)
+
+        job = ReviewJob(
+            id=job_id,
+            input_path=input_path,
+            out_dir=job_dir / "output",
+            options=resolved,
+            categories_path=categories_path,
+        )
+        with self._lock:
+            self._jobs[job_id] = job
+        metrics.increment("service.jobs_submitted")
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ReviewJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[ReviewJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created)
+
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    def _resolve_options(self, options: Dict[str, str]) -> Dict[str, Any]:
+        unknown = sorted(set(options) - set(JOB_OPTIONS))
+        if unknown:
+            raise JobRequestError(f"不支持的参数：{', '.join(unknown)}")
+        resolved: Dict[str, Any] = {key: self.defaults.get(key) for key in JOB_OPTIONS}
+        for key, value in options.items():
+            if value == "":
+                continue
+            if key in _INT_OPTIONS:
+                try:
+                    resolved[key] = int(value)
+                except ValueError as exc:
+                    raise JobRequestError(f"{key} 应为整数。") from exc
+            else:
+                resolved[key] = value
+        if resolved.get("sort_by_year") not in (None, *_SORT_CHOICES):
+            raise JobRequestError(f"sort_by_year 取值应为 {'/'.join(_SORT_CHOICES)}。")
+        if resolved.get("priority") not in (None, *PRIORITY_POLICIES):
+            raise JobRequestError(f"priority 取值应为 {'/'.join(PRIORITY_POLICIES)}。")
+        return resolved
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._run(job)
+
+    def _run(self, job: ReviewJob) -> None:
+        with job._lock:
+            job.status = "running"
+            job.started = time.time()
+        try:
+            pipeline = self.pipeline_factory(job.options)
+            with observe_progress(job.observe):
+                pipeline.run(
+                    source=job.input_path,
+                    out_dir=job.out_dir,
+                    categories_yaml=job.categories_path,
+                    n_main=job.options.get("n_main"),
+                    m_sub=job.options.get("m_sub"),
+                    sort_by_year=job.options.get("sort_by_year") or "none",
+                    input_format=job.options.get("input_format"),
+                )
+        except Exception as exc:  # pragma: no cover - reported through the job status
+            status, error = "failed", f"{type(exc).__name__}: {exc}"
+            metrics.increment("service.jobs_failed")
+        else:
+            status, error = "succeeded", ""
+            metrics.increment("service.jobs_succeeded")
+        with job._lock:
+            job.status = status
+            job.error = error
+            job.finished = time.time()
+
+
+def make_server(service: ReviewService, host: str, port: int, *, max_upload_bytes: int) -> ThreadingHTTPServer:
+    """Create (but do not start) the HTTP front end for ``service``."""
+
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "paper-review"
+
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            parts = [part for part in urlparse(self.path).path.split("/") if part]
+            if parts == ["health"]:
+                self._send_json({"status": "ok", "jobs": len(service.jobs()), "queued": service.queued()})
+            elif parts == ["metrics"]:
+                self._send_bytes(metrics.render().encode("utf-8"), "text/plain; charset=utf-8")
+            elif parts == ["jobs"]:
+                self._send_json({"jobs": [job.to_dict() for job in service.jobs()]})
+            elif len(parts) in (2, 3) and parts[0] == "jobs":
+                job = service.get(parts[1])
+                if job is None:
+                    self._send_json({"error": "任务不存在。"}, HTTPStatus.NOT_FOUND)
+                elif len(parts) == 2:
+                    self._send_json(job.to_dict())
+                else:
+                    self._send_result(job, parts[2])
+            else:
+                self._send_json({"error": "未知路径。"}, HTTPStatus.NOT_FOUND)
+
+        def do_POST(self) -> None:  # noqa: N802 - http.server naming
+            url = urlparse(self.path)
+            if url.path.rstrip("/") != "/jobs":
+                self._send_json({"error": "未知路径。"}, HTTPStatus.NOT_FOUND)
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > max_upload_bytes:
+                self._send_json({"error": "上传文件过大。"}, HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+                return
+            body = self.rfile.read(length)
+            try:
+                filename, data, options, categories = _parse_submission(
+                    self.headers.get("Content-Type", ""), body, parse_qs(url.query)
+                )
+                job = service.submit(filename, data, options, categories)
+            except JobRequestError as exc:
+                self._send_json({"error": str(exc)}, HTTPStatus.BAD_REQUEST)
+                return
+            self._send_json(job.to_dict(), HTTPStatus.ACCEPTED, location=f"/jobs/{job.id}")
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - signature from base
+            metrics.increment("service.http_requests")
+
+        def _send_result(self, job: ReviewJob, name: str) -> None:
+            if name not in ("review.md", "failed.jsonl", STATS_NAME):
+                self._send_json({"error": "未知文件。"}, HTTPStatus.NOT_FOUND)
+                return
+            if job.status != "succeeded":
+                self._send_json({"error": f"任务状态为 {job.status}，结果尚不可用。"}, HTTPStatus.CONFLICT)
+                return
+            path = job.out_dir / name
+            if not path.exists():
+                self._send_json({"error": "文件不存在。"}, HTTPStatus.NOT_FOUND)
+                return
+            content_types = {".md": "text/markdown; charset=utf-8", ".json": "application/json; charset=utf-8"}
+            content_type = content_types.get(Path(name).suffix, "application/x-ndjson")
+            self._send_bytes(path.read_bytes(), content_type)
+
+        def _send_json(self, payload: Any, status: HTTPStatus = HTTPStatus.OK, location: str = "") -> None:
+            self._send_bytes(
+                json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+                "application/json; charset=utf-8",
+                status,
+                location,
+            )
+
+        def _send_bytes(
+            self, body: bytes, content_type: str, status: HTTPStatus = HTTPStatus.OK, location: str = ""
+        ) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            if location:
+                self.send_header("Location", location)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def _parse_submission(
+    content_type: str, body: bytes, query: Dict[str, List[str]]
+) -> Tuple[str, bytes, Dict[str, str], Optional[bytes]]:
+    """Return ``(filename, data, options, categories)`` from a multipart or raw upload."""
+    options = {key: values[-1] for key, values in query.items() if key != "filename"}
+    if not content_type.lower().startswith("multipart/form-data"):
+        return query.get("filename", [""])[-1], body, options, None
+
+    message = BytesParser(policy=HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body
+    )
+    if not message.is_multipart():
+        raise JobRequestError("无法解析 multipart 请求体。")
+    filename, data, categories = "", b"", None
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        payload = part.get_payload(decode=True) or b""
+        if name == "file":
+            filename, data = part.get_filename() or "", payload
+        elif name == "categories":
+            categories = payload
+        elif name:
+            options[str(name)] = payload.decode("utf-8").strip()
+    return filename, data, options, categories
@@ -0,0 +1,232 @@
+"""Split a parsed corpus into independent shards and merge their results.
+
+A sharded run has three steps that may execute on different machines:
+
+1. :func:`split_corpus` fixes the schema and writes ``manifest.json`` plus one
+   self-contained shard file per slice of the corpus.
+2. :func:`run_shard` classifies and summarizes the papers of a single shard
+   and writes a result file.
+3. :func:`merge_shard_results` validates that every paper of the manifest is
+   present exactly once and exports the combined ``review.md``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .deadletter import write_failed_report
+from .exporters.markdown import export_markdown
+from .exporters.stats import STATS_NAME
+from .models import CategoryNode, PaperEntry
+from .serialization import (
+    paper_from_dict,
+    paper_to_dict,
+    read_json,
+    schema_from_list,
+    schema_to_list,
+    write_json,
+)
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+class ShardMergeError(ValueError):
+    """Raised when shard results are inconsistent with the manifest."""
+
+
+def corpus_fingerprint(papers: Sequence[PaperEntry]) -> str:
+    digest = hashlib.sha256()
+    for paper in papers:
+        digest.update(f"{paper.id}\x1f{paper.key}\x1f{paper.title}\x1e".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def shard_file_name(index: int, count: int) -> str:
+    return f"shard-{index + 1:04d}-of-{count:04d}.json"
+
+
+def split_corpus(
+    papers: Sequence[PaperEntry],
+    schema: Dict[str, CategoryNode],
+    num_shards: int,
+    out_dir: Path,
+) -> Path:
+    """Write ``num_shards`` shard files and a manifest; return the manifest path.
+
+    Papers are dealt round-robin by position so that every shard gets a
+    similar mix of the corpus and shard sizes differ by at most one.
+    """
+    if num_shards <= 0:
+        raise ValueError("分片数量必须为正整数。")
+    if not papers:
+        raise ValueError("语料为空，无法分片。")
+    num_shards = min(num_shards, len(papers))
+    corpus_id = corpus_fingerprint(papers)
+    schema_items = schema_to_list(schema)
+
+    buckets: List[List[PaperEntry]] = [[] for _ in range(num_shards)]
+    for position, paper in enumerate(papers):
+        buckets[position % num_shards].append(paper)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    shard_names: List[str] = []
+    for index, bucket in enumerate(buckets):
+        name = shard_file_name(index, num_shards)
+        write_json(
+            out_dir / name,
+            {
+                "version": FORMAT_VERSION,
+                "kind": "shard",
+                "corpus_id": corpus_id,
+                "shard_index": index,
+                "shard_count": num_shards,
+                "schema": schema_items,
+                "papers": [paper_to_dict(paper) for paper in bucket],
+            },
+        )
+        shard_names.append(name)
+        print(f"写入分片 {name}，共 {len(bucket)} 篇文献。")
+
+    manifest_path = out_dir / MANIFEST_NAME
+    write_json(
+        manifest_path,
+        {
+            "version": FORMAT_VERSION,
+            "kind": "manifest",
+            "corpus_id": corpus_id,
+            "shard_count": num_shards,
+            "shards": shard_names,
+            "paper_keys": [paper.key for paper in papers],
+            "schema": schema_items,
+        },
+    )
+    print(f"已生成分片清单: {manifest_path}")
+    return manifest_path
+
+
+def run_shard(shard_path: Path, pipeline, out_path: Path) -> Path:
+    """Classify and summarize one shard with ``pipeline`` and write its result file."""
+    data = _read_kind(shard_path, "shard")
+    schema = schema_from_list(data["schema"])
+    papers = [paper_from_dict(item) for item in data["papers"]]
+    print(
+        f"处理分片 {data['shard_index'] + 1}/{data['shard_count']}（{shard_path.name}），"
+        f"共 {len(papers)} 篇文献。"
+    )
+
+    dead_letters = pipeline.process(papers, schema)
+    if len(dead_letters):
+        failed_path = out_path.with_name(out_path.stem + ".failed.jsonl")
+        dead_letters.write_jsonl(failed_path)
+        print(f"⚠️ 分片内失败文献清单已写入: {failed_path}")
+
+    write_json(
+        out_path,
+        {
+            "version": FORMAT_VERSION,
+            "kind": "result",
+            "corpus_id": data["corpus_id"],
+            "shard_index": data["shard_index"],
+            "shard_count": data["shard_count"],
+            "schema": data["schema"],
+            "papers": [paper_to_dict(paper) for paper in papers],
+        },
+    )
+    print(f"分片结果已写入: {out_path}")
+    return out_path
+
+
+def collect_result_paths(inputs: Iterable[Path]) -> List[Path]:
+    """Expand directories into their ``result-*.json`` files, in a stable order."""
+    paths: List[Path] = []
+    for item in inputs:
+        if item.is_dir():
+            paths.extend(sorted(item.glob("result-*.json")))
+        else:
+            paths.append(item)
+    return paths
+
+
+def merge_shard_results(
+    manifest_path: Path,
+    result_paths: Sequence[Path],
+    out_md: Path,
+    *,
+    sort_by_year: str = "none",
+    write_stats: bool = False,
+) -> Path:
+    """Validate shard results against the manifest and export one Markdown review.
+
+    The merge is deterministic: papers are ordered by their original ``id``
+    regardless of the order in which result files are given.
+    """
+    manifest = _read_kind(manifest_path, "manifest")
+    corpus_id = manifest["corpus_id"]
+    expected_keys: List[str] = manifest["paper_keys"]
+
+    papers_by_key: Dict[str, PaperEntry] = {}
+    duplicates: List[str] = []
+    seen_shards: Dict[int, Path] = {}
+    for path in sorted(result_paths, key=lambda item: str(item)):
+        data = _read_kind(path, "result")
+        if data["corpus_id"] != corpus_id:
+            raise ShardMergeError(f"{path} 与分片清单不属于同一语料（corpus_id 不一致）。")
+        shard_index = data["shard_index"]
+        if shard_index in seen_shards:
+            raise ShardMergeError(
+                f"分片 {shard_index + 1} 的结果重复出现：{seen_shards[shard_index]} 与 {path}。"
+            )
+        seen_shards[shard_index] = path
+        for item in data["papers"]:
+            paper = paper_from_dict(item)
+            if paper.key in papers_by_key:
+                duplicates.append(paper.key)
+                continue
+            papers_by_key[paper.key] = paper
+
+    expected = set(expected_keys)
+    missing = [key for key in expected_keys if key not in papers_by_key]
+    unexpected = sorted(key for key in papers_by_key if key not in expected)
+    problems: List[str] = []
+    if missing:
+        problems.append(f"缺失 {len(missing)} 篇：{_preview(missing)}")
+    if duplicates:
+        problems.append(f"重复 {len(duplicates)} 篇：{_preview(sorted(set(duplicates)))}")
+    if unexpected:
+        problems.append(f"清单外 {len(unexpected)} 篇：{_preview(unexpected)}")
+    if problems:
+        raise ShardMergeError("分片结果校验失败，" + "；".join(problems) + "。")
+
+    papers = sorted(papers_by_key.values(), key=lambda paper: (paper.id, paper.key))
+    schema = schema_from_list(manifest["schema"])
+    out_md.parent.mkdir(parents=True, exist_ok=True)
+    failed_path = out_md.parent / "failed.jsonl"
+    failed = write_failed_report(papers, failed_path)
+    if failed:
+        print(f"⚠️ {failed} 篇文献在分片处理中失败，清单已写入: {failed_path}")
+    stats_path = out_md.with_name(STATS_NAME) if write_stats else None
+    export_markdown(papers, schema, out_md, sort_by_year=sort_by_year, stats_path=stats_path)
+    print(f"已合并 {len(seen_shards)} 个分片、{len(papers)} 篇文献到: {out_md}")
+    return out_md
+
+
+def default_result_path(shard_path: Path, results_dir: Optional[Path] = None) -> Path:
+    directory = results_dir or shard_path.parent
+    return directory / shard_path.name.replace("shard-", "result-", 1)
+
+
+def _read_kind(path: Path, kind: str) -> dict:
+    data = read_json(path)
+    if not isinstance(data, dict) or data.get("kind") != kind:
+        raise ShardMergeError(f"{path} 不是有效的 {kind} 文件。")
+    if data.get("version") != FORMAT_VERSION:
+        raise ShardMergeError(f"{path} 的格式版本 {data.get('version')} 不受支持。")
+    return data
+
+
+def _preview(keys: Sequence[str], limit: int = 5) -> str:
+    shown = ", ".join(keys[:limit])
+    return shown + (" …" if len(keys) > limit else "")
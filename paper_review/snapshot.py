@@ -0,0 +1,240 @@
+"""Binary snapshots of parsed corpora, so large exports are not re-parsed on every run.
+
+A snapshot stores the :class:`PaperEntry` list produced by a parser in a
+compact, memory-mappable layout::
+
+    magic | header length (u32) | JSON header | padding to 8 bytes
+    string offsets (int64, SLOTS per paper + 1) | id/year (int32, 2 per paper)
+    UTF-8 string blob
+
+Offsets point into the blob, so :class:`CorpusSnapshot` can decode any paper
+straight from the mapped file; several worker processes mapping the same
+snapshot share its pages instead of each holding a parsed copy.
+
+:class:`SnapshotCache` keys snapshots by source path and parser identity
+(class and ``version``). A snapshot is used when the file's size and mtime
+still match, or when only the mtime changed but the content hash is equal;
+otherwise the source is parsed again and the snapshot rewritten.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import struct
+import sys
+from array import array
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .metrics import metrics
+from .models import PaperEntry
+from .parsing.base import BibliographyParser
+
+SNAPSHOT_FORMAT = 1
+_MAGIC = b"PRSNAP\x00\x01"
+_HEADER_LENGTH = struct.Struct("<I")
+_STRING_FIELDS = ("key", "title", "abstract", "first_author", "venue", "doi", "main_category", "sub_category")
+SLOTS = len(_STRING_FIELDS) + 1  # + authors, joined by _AUTHOR_SEPARATOR
+_AUTHOR_SEPARATOR = "\x1f"
+_NO_YEAR = -1
+_HASH_CHUNK = 1 << 20
+
+
+def content_hash(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parser_identity(parser: BibliographyParser) -> str:
+    cls = type(parser)
+    model = ",".join(item.name for item in fields(PaperEntry))
+    return f"{cls.__module__}.{cls.__qualname__}:{parser.version}|{model}|{SNAPSHOT_FORMAT}"
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def write_snapshot(path: Path, papers: List[PaperEntry], header: Dict[str, Any]) -> None:
+    """Write ``papers`` to ``path`` atomically."""
+    offsets = array("q", [0])
+    numbers = array("i")
+    blob = bytearray()
+    for paper in papers:
+        values = [getattr(paper, name) or "" for name in _STRING_FIELDS]
+        values.append(_AUTHOR_SEPARATOR.join(paper.authors))
+        for value in values:
+            blob += value.encode("utf-8")
+            offsets.append(len(blob))
+        numbers.append(paper.id)
+        numbers.append(paper.year if paper.year is not None else _NO_YEAR)
+    if offsets.itemsize != 8 or numbers.itemsize != 4 or sys.byteorder != "little":
+        raise RuntimeError("当前平台不支持语料快照格式。")
+
+    encoded_header = json.dumps({**header, "count": len(papers)}, ensure_ascii=False).encode("utf-8")
+    prefix = _MAGIC + _HEADER_LENGTH.pack(len(encoded_header)) + encoded_header
+    padding = b"\x00" * (_align(len(prefix)) - len(prefix))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb") as handle:
+        handle.write(prefix + padding)
+        handle.write(offsets.tobytes())
+        handle.write(numbers.tobytes())
+        handle.write(blob)
+    tmp_path.replace(path)
+
+
+def read_snapshot_header(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with path.open("rb") as handle:
+            if handle.read(len(_MAGIC)) != _MAGIC:
+                return None
+            (length,) = _HEADER_LENGTH.unpack(handle.read(_HEADER_LENGTH.size))
+            return json.loads(handle.read(length).decode("utf-8"))
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+class CorpusSnapshot:
+    """Read-only, memory-mapped view of a snapshot; papers are decoded on access."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with path.open("rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(_MAGIC)] != _MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} 不是语料快照文件。")
+        start = len(_MAGIC)
+        (length,) = _HEADER_LENGTH.unpack_from(self._map, start)
+        start += _HEADER_LENGTH.size
+        self.header: Dict[str, Any] = json.loads(self._map[start : start + length].decode("utf-8"))
+        count = int(self.header["count"])
+        offsets_start = _align(start + length)
+        numbers_start = offsets_start + (count * SLOTS + 1) * 8
+        self._blob_start = numbers_start + count * 2 * 4
+        if len(self._map) < self._blob_start:
+            self._map.close()
+            raise ValueError(f"语料快照 {path} 已截断。")
+        self._view = memoryview(self._map)
+        self._offsets = self._view[offsets_start:numbers_start].cast("q")
+        self._numbers = self._view[numbers_start : self._blob_start].cast("i")
+        self._count = count
+        # The last offset marks the end of the text blob, which ends the file.
+        if len(self._map) != self._blob_start + self._offsets[-1]:
+            self.close()
+            raise ValueError(f"语料快照 {path} 已截断或损坏。")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> PaperEntry:
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        base = index * SLOTS
+        blob_start = self._blob_start
+        offsets = self._offsets
+        data = self._map
+        values = [
+            data[blob_start + offsets[base + slot] : blob_start + offsets[base + slot + 1]].decode("utf-8")
+            for slot in range(SLOTS)
+        ]
+        year = self._numbers[index * 2 + 1]
+        authors = values[-1]
+        return PaperEntry(
+            id=self._numbers[index * 2],
+            key=values[0],
+            title=values[1],
+            abstract=values[2],
+            first_author=values[3],
+            authors=authors.split(_AUTHOR_SEPARATOR) if authors else [],
+            year=None if year == _NO_YEAR else year,
+            venue=values[4],
+            doi=values[5],
+            main_category=values[6] or None,
+            sub_category=values[7] or None,
+        )
+
+    def papers(self, start: int = 0, stop: Optional[int] = None) -> List[PaperEntry]:
+        stop = self._count if stop is None else min(stop, self._count)
+        return [self[index] for index in range(start, stop)]
+
+    def close(self) -> None:
+        # Views into the mapping must be released before it can be closed.
+        self._offsets.release()
+        self._numbers.release()
+        self._view.release()
+        self._map.close()
+
+
+class SnapshotCache:
+    """Directory of corpus snapshots keyed by source path and parser identity."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def snapshot_path(self, source: Path, parser: BibliographyParser) -> Path:
+        key = hashlib.sha256(f"{source.resolve()}|{parser_identity(parser)}".encode("utf-8")).hexdigest()
+        return self.directory / f"{key[:32]}.snap"
+
+    def load_or_parse(
+        self,
+        source: Path,
+        parser: BibliographyParser,
+        parse: Optional[Callable[[], List[PaperEntry]]] = None,
+    ) -> List[PaperEntry]:
+        """Load the snapshot of ``source``, or parse it (with ``parse`` if given) and write one."""
+        path = self.snapshot_path(source, parser)
+        stat = source.stat()
+        header = read_snapshot_header(path)
+        identity = parser_identity(parser)
+        digest: Optional[str] = None
+        if header is not None and header.get("parser") == identity and header.get("size") == stat.st_size:
+            fresh = header.get("mtime_ns") == stat.st_mtime_ns
+            if not fresh:
+                # Touched or copied but possibly unchanged: fall back to the content hash.
+                digest = content_hash(source)
+                fresh = digest == header.get("hash")
+            papers = self._read(path) if fresh else None
+            if papers is not None:
+                metrics.increment("snapshot.hit")
+                if header.get("mtime_ns") != stat.st_mtime_ns:
+                    write_snapshot(path, papers, {**header, "mtime_ns": stat.st_mtime_ns})
+                return papers
+
+        metrics.increment("snapshot.miss")
+        papers = parse() if parse is not None else parser.parse(source)
+        write_snapshot(
+            path,
+            papers,
+            {
+                "format": SNAPSHOT_FORMAT,
+                "parser": identity,
+                "source": str(source.resolve()),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "hash": digest or content_hash(source),
+            },
+        )
+        return papers
+
+    @staticmethod
+    def _read(path: Path) -> Optional[List[PaperEntry]]:
+        """Load every paper, or return ``None`` for a truncated or corrupt snapshot."""
+        try:
+            snapshot = CorpusSnapshot(path)
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            return None
+        try:
+            return snapshot.papers()
+        except (ValueError, IndexError, UnicodeDecodeError):
+            return None
+        finally:
+            snapshot.close()
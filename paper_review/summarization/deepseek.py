@@ -1,17 +1,20 @@
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
-
-try:  # pragma: no cover - optional dependency
-    from pydantic import BaseModel, ValidationError
-except ImportError:  # pragma: no cover - fallback for environments without pydantic
-    BaseModel = None  # type: ignore
-    ValidationError = Exception  # type: ignore
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Type
 
 from .base import SummaryFailed, Summarizer
+from ..budget import BudgetExhausted
+from ..llm.json_repair import extract_json
+from ..llm.routing import record_escalation
+from ..llm.streaming import complete_json
 from ..models import PaperEntry
+from ..text import budgeted_abstract
+from ..trace import trace
+
+if TYPE_CHECKING:  # pragma: no cover - annotations only
+    from ..summary_store import SummaryStore
 
 _PROMPT_HEADER = (
     "请阅读以下文献信息，总结该研究所解决的问题(problem)、提出的方案(approach)"
@@ -24,34 +27,45 @@ _PROMPT_HEADER = (
     "4. 不要输出多余说明文字。\n"
     "\n原始信息如下：\n"
 )
+# The prompt asks for at most 100 characters; leave slack for punctuation and English terms.
+SUMMARY_MAX_CHARS = 150
 
 
-if BaseModel is not None:
+@dataclass
+class _PlainSummary:
+    summary: str = ""
 
-    class Summary(BaseModel):
-        summary: str = ""
+    def render(self, paper: PaperEntry) -> str:
+        text = self.summary.strip()
+        if text:
+            return text
 
-        def render(self, paper: PaperEntry) -> str:
-            text = self.summary.strip()
-            if text:
-                return f"{paper.first_author}等人"+"{"+paper.title+"}"+text
+        # 回退：如果 summary 为空，就至少给出“作者+标题”
+        author = f"{paper.first_author}等人"
+        title = paper.title.strip() if paper.title else ""
+        title_part = f"《{title}》" if title else ""
+        return f"{author}{title_part}"
 
-            # 回退：如果 summary 为空，就至少给出“作者+标题”
-            author = f"{paper.first_author}等人"
-            title = paper.title.strip() if paper.title else ""
-            title_part = f"《{title}》" if title else ""
-            return f"{author}{title_part}"
 
-else:
+if TYPE_CHECKING:  # pragma: no cover - the pydantic ``Summary`` has the same fields and ``render``
+    Summary = _PlainSummary
+
 
-    @dataclass
-    class Summary:  # type: ignore[override]
+@lru_cache(maxsize=None)
+def _summary_model() -> Tuple[type, Optional[Type[Exception]]]:
+    """Return the ``Summary`` class and its validation error, importing pydantic on first use."""
+    try:  # pragma: no cover - optional dependency
+        from pydantic import BaseModel, ValidationError
+    except ImportError:  # pragma: no cover - fallback for environments without pydantic
+        return _PlainSummary, None
+
+    class Summary(BaseModel):
         summary: str = ""
 
         def render(self, paper: PaperEntry) -> str:
             text = self.summary.strip()
             if text:
-                return text
+                return f"{paper.first_author}等人"+"{"+paper.title+"}"+text
 
             # 回退：如果 summary 为空，就至少给出“作者+标题”
             author = f"{paper.first_author}等人"
@@ -59,69 +73,167 @@ else:
             title_part = f"《{title}》" if title else ""
             return f"{author}{title_part}"
 
+    return Summary, ValidationError
 
-def _extract_json(content: str) -> Optional[Dict[str, Any]]:
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        start = content.find("{")
-        end = content.rfind("}")
-        if start != -1 and end != -1 and start < end:
-            try:
-                return json.loads(content[start : end + 1])
-            except json.JSONDecodeError:
-                return None
-        return None
+
+def __getattr__(name: str) -> Any:
+    if name == "Summary":
+        return _summary_model()[0]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def normalize_summary(raw_json: Dict[str, Any]) -> Summary:
     payload = {
         "summary": raw_json.get("summary", ""),
     }
-    if BaseModel is not None:
+    summary_cls, validation_error = _summary_model()
+    if validation_error is not None:
         try:
-            return Summary(**payload)
-        except ValidationError as exc:  # pragma: no cover - depends on model output
+            return summary_cls(**payload)
+        except validation_error as exc:  # pragma: no cover - depends on model output
             raise SummaryFailed(str(exc)) from exc
-    return Summary(summary=str(payload["summary"]))
+    return summary_cls(summary=str(payload["summary"]))
 
 
-def summarize(text: str, client: Any, *, model: str = "deepseek-chat") -> Summary:
-    """调用 DeepSeek-chat 完成一次摘要，若解析失败则抛出 :class:`SummaryFailed`."""
-    prompt = _PROMPT_HEADER + text
-    print("\n🧠 摘要请求 Prompt:\n" + prompt + "\n")
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
+def build_summary_request(text: str, *, model: str = "deepseek-chat") -> Dict[str, Any]:
+    """Return the ``chat.completions.create`` arguments for summarizing ``text``."""
+    return {
+        "model": model,
+        "messages": [
             {"role": "system", "content": "You are a helpful assistant"},
-            {"role": "user", "content": prompt},
+            {"role": "user", "content": _PROMPT_HEADER + text},
         ],
-        response_format={"type": "json_object"},
-        stream=False,
-    )
-    content = response.choices[0].message.content or ""
-    print("📨 模型返回 (摘要)：\n" + content + "\n")
-    raw_json = _extract_json(content) or {}
-    return normalize_summary(raw_json)
+        "response_format": {"type": "json_object"},
+    }
+
+
+# A parsed answer: the JSON object (``None`` when unparseable) and whether it was truncated.
+SummaryAnswer = Tuple[Optional[Dict[str, Any]], bool]
+
+
+def parse_summary_answer(content: str) -> SummaryAnswer:
+    """Extract the JSON object of a raw answer; parse each answer once, counters are per call."""
+    return extract_json(content, "summary")
+
+
+def summary_from_answer(answer: SummaryAnswer) -> Summary:
+    """Validate a parsed answer; a truncated summary is incomplete and raises :class:`SummaryFailed`."""
+    raw_json, truncated = answer
+    if truncated:
+        raise SummaryFailed("模型返回的摘要被截断。")
+    return normalize_summary(raw_json or {})
+
+
+def parse_summary_content(content: str) -> Summary:
+    return summary_from_answer(parse_summary_answer(content))
+
+
+def summary_problem(answer: SummaryAnswer) -> Optional[str]:
+    """Return why a parsed answer is unusable (``invalid_json``/``truncated``/``empty``/``too_long``), or ``None``."""
+    raw_json, truncated = answer
+    if not isinstance(raw_json, dict):
+        return "invalid_json"
+    if truncated:
+        return "truncated"
+    text = str(raw_json.get("summary") or "").strip()
+    if not text:
+        return "empty"
+    if len(text) > SUMMARY_MAX_CHARS:
+        return "too_long"
+    return None
+
+
+def request_summary(text: str, client: Any, *, model: str = "deepseek-chat", stream: bool = False) -> str:
+    """Send one summary request and return the raw answer."""
+    request = build_summary_request(text, model=model)
+    if trace.enabled:
+        trace.emit("summary", "prompt", request["messages"][-1]["content"], label="🧠 摘要请求 Prompt:")
+    content = complete_json(client, request, stream=stream, stage="summary")
+    if trace.enabled:
+        trace.emit("summary", "response", content, label="📨 模型返回 (摘要)：")
+    return content
+
+
+def summarize(text: str, client: Any, *, model: str = "deepseek-chat", stream: bool = False) -> Summary:
+    """调用 DeepSeek-chat 完成一次摘要，若解析失败则抛出 :class:`SummaryFailed`."""
+    return parse_summary_content(request_summary(text, client, model=model, stream=stream))
 
 
 class DeepSeekSummarizer(Summarizer):
     """Summarizer backed by the DeepSeek-chat model."""
 
-    def __init__(self, client: Any, *, model: str = "deepseek-chat") -> None:
+    def __init__(
+        self,
+        client: Any,
+        *,
+        model: str = "deepseek-chat",
+        abstract_budget: Optional[int] = None,
+        stream: bool = False,
+        store: Optional["SummaryStore"] = None,
+        escalation_model: Optional[str] = None,
+    ) -> None:
         self.client = client
         self.model = model
+        # Stronger model asked again when ``model`` returns invalid, empty or over-long summaries.
+        self.escalation_model = escalation_model
+        self.abstract_budget = abstract_budget
+        self.stream = stream
+        self.store = store
 
     def summarize(self, paper: PaperEntry) -> str:
-        text = (
-            f"标题：{paper.title}\n"
-            f"作者：{', '.join(paper.authors)}\n"
-            f"摘要：{paper.abstract}"
-        )
+        if self.store is not None:
+            cached = self.store.get(paper)
+            if cached is not None:
+                rendered = normalize_summary({"summary": cached}).render(paper)
+                if trace.enabled:
+                    trace.emit("summary", "reused", rendered, label="♻️ 复用已有摘要：")
+                return rendered
         try:
-            summary = summarize(text, self.client, model=self.model)
+            model, answer = self._request(self._paper_text(paper))
+            summary = summary_from_answer(answer)
+            if self.store is not None:
+                self.store.put(paper, summary.summary, model=model)
             rendered = summary.render(paper)
-            print("📝 摘要结果：" + rendered + "\n")
+            if trace.enabled:
+                trace.emit("summary", "result", rendered, label="📝 摘要结果：")
             return rendered
+        except BudgetExhausted:
+            raise
         except Exception as exc:  # pragma: no cover - depends on API availability
             raise SummaryFailed(str(exc)) from exc
+
+    def _request(self, text: str) -> Tuple[str, SummaryAnswer]:
+        """Return the model used and its parsed answer, escalating unusable answers."""
+        answer = parse_summary_answer(request_summary(text, self.client, model=self.model, stream=self.stream))
+        if not self.escalation_model:
+            return self.model, answer
+        reason = summary_problem(answer)
+        if reason is None:
+            record_escalation("summary")
+            return self.model, answer
+        escalated = parse_summary_answer(
+            request_summary(text, self.client, model=self.escalation_model, stream=self.stream)
+        )
+        recovered = summary_problem(escalated) is None
+        record_escalation("summary", reason, recovered=recovered)
+        # An escalated answer that is still unusable is only kept if the first one was not even
+        # JSON or was cut off; a truncated answer then fails and goes to the retry queue.
+        if recovered or reason in ("invalid_json", "truncated"):
+            return self.escalation_model, escalated
+        return self.model, answer
+
+    def build_request(self, paper: PaperEntry) -> Dict[str, Any]:
+        """Return the ``chat.completions.create`` arguments used to summarize ``paper``."""
+        return build_summary_request(self._paper_text(paper), model=self.model)
+
+    def render_content(self, paper: PaperEntry, content: str) -> str:
+        """Validate a raw model answer and render it for ``paper``."""
+        return parse_summary_content(content).render(paper)
+
+    def _paper_text(self, paper: PaperEntry) -> str:
+        abstract = budgeted_abstract(paper, self.abstract_budget, "summary")
+        return (
+            f"标题：{paper.title}\n"
+            f"作者：{', '.join(paper.authors)}\n"
+            f"摘要：{abstract}"
+        )
@@ -0,0 +1,150 @@
+"""Shared store of generated summaries, keyed by a normalized paper identity.
+
+A paper is identified by its DOI when it has one and otherwise by its
+normalized title, first-author surname and year, so that the same paper is
+recognised across runs and projects even when the exports format authors or
+abstracts differently. Entries are evicted least-recently-used once the
+store grows past ``max_entries``.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Optional
+
+from .metrics import metrics
+from .models import PaperEntry
+
+_NON_WORD_PATTERN = re.compile(r"[\W_]+", re.UNICODE)
+# Placeholders written by the parsers when a record has no title or author.
+_UNTITLED = "untitled"
+_UNKNOWN_AUTHOR = "unknown"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    id INTEGER PRIMARY KEY,
+    doi TEXT NOT NULL,
+    title_key TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    model TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS summaries_doi ON summaries (doi);
+CREATE UNIQUE INDEX IF NOT EXISTS summaries_title_key ON summaries (title_key, doi);
+CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used);
+"""
+
+
+def _fold(text: str) -> str:
+    return _NON_WORD_PATTERN.sub("", unicodedata.normalize("NFKC", text).casefold())
+
+
+def author_surname(name: str) -> str:
+    """Reduce ``"Zhao, Fuqing"``, ``"Fuqing Zhao"`` and ``"F. Zhao"`` to the same key."""
+    name = name.strip()
+    if "," in name:
+        return _fold(name.split(",", 1)[0])
+    parts = name.split()
+    if len(parts) > 1:
+        return _fold(parts[-1])
+    return _fold(name)
+
+
+def title_key(paper: PaperEntry) -> str:
+    """Return the title-based identity, or ``""`` when the record is too sparse to identify.
+
+    Placeholder titles, and papers with neither a year nor a real author, would
+    otherwise collide with unrelated records from other projects.
+    """
+    title = _fold(paper.title)
+    author = author_surname(paper.first_author)
+    if author == _UNKNOWN_AUTHOR:
+        author = ""
+    if not title or title == _UNTITLED or not (paper.year or author):
+        return ""
+    return f"{title}|{author}|{paper.year or ''}"
+
+
+class SummaryStore:
+    """SQLite-backed summary cache that can be shared between projects."""
+
+    def __init__(self, path: Path, *, max_entries: int = 50_000) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+        self._inserted = 0
+        with self._lock:
+            self._evict()
+
+    def get(self, paper: PaperEntry) -> Optional[str]:
+        """Return the stored summary text for ``paper`` and mark it as recently used."""
+        with self._lock:
+            row = None
+            if paper.doi:
+                row = self._connection.execute(
+                    "SELECT id, summary FROM summaries WHERE doi = ? ORDER BY last_used DESC LIMIT 1",
+                    (paper.doi,),
+                ).fetchone()
+            key = title_key(paper)
+            if row is None and key:
+                # Fall back to the title key, but never across two different DOIs.
+                row = self._connection.execute(
+                    "SELECT id, summary FROM summaries WHERE title_key = ? AND (doi = '' OR ? = '') "
+                    "ORDER BY last_used DESC LIMIT 1",
+                    (key, paper.doi),
+                ).fetchone()
+            if row is None:
+                metrics.increment("summary_store.miss")
+                return None
+            self._connection.execute(
+                "UPDATE summaries SET last_used = ? WHERE id = ?", (time.time(), row[0])
+            )
+        metrics.increment("summary_store.hit")
+        return row[1]
+
+    def put(self, paper: PaperEntry, summary: str, *, model: str = "") -> None:
+        key = title_key(paper)
+        if not summary.strip() or not (key or paper.doi):
+            return
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO summaries (doi, title_key, summary, model, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (title_key, doi) DO UPDATE SET "
+                "summary = excluded.summary, model = excluded.model, last_used = excluded.last_used",
+                (paper.doi, key, summary, model, now, now),
+            )
+            self._inserted += 1
+            # Counting rows on every insert would dominate small writes; check periodically.
+            if self._inserted % 256 == 1:
+                self._evict()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._evict()
+            self._connection.close()
+
+    def _evict(self) -> None:
+        excess = self._connection.execute("SELECT COUNT(*) FROM summaries").fetchone()[0] - self.max_entries
+        if excess <= 0:
+            return
+        self._connection.execute(
+            "DELETE FROM summaries WHERE id IN (SELECT id FROM summaries ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        metrics.increment("summary_store.evicted", excess)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import math
+import re
+from typing import List, Optional, Set, Tuple
+
+from .metrics import metrics
+from .models import PaperEntry
+
+# CJK ideographs, kana, hangul and full-width punctuation all tokenize at
+# roughly the same rate, so they share one counter.
+_CJK_PATTERN = re.compile(
+    "[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff"
+    "\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]"
+)
+_CJK_RUN_PATTERN = re.compile("[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+")
+_LATIN_WORD_PATTERN = re.compile(r"[A-Za-z0-9]+")
+_SENTENCE_PATTERN = re.compile(r".+?(?:[。！？；!?;]+|\.(?=\s)|$)\s*", re.S)
+
+# Ratios published for DeepSeek's tokenizer; close enough for GPT-style BPEs.
+CJK_TOKENS_PER_CHAR = 0.6
+OTHER_TOKENS_PER_CHAR = 0.3
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheaply estimate the token count of mixed CJK/Latin ``text`` without a tokenizer."""
+    if not text:
+        return 0
+    cjk = _CJK_PATTERN.subn("", text)[1]
+    whitespace = len(text) - len("".join(text.split()))
+    other = len(text) - cjk - whitespace
+    return int(math.ceil(cjk * CJK_TOKENS_PER_CHAR + other * OTHER_TOKENS_PER_CHAR))
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split on Chinese and Latin sentence terminators, keeping the punctuation."""
+    return [match.group(0) for match in _SENTENCE_PATTERN.finditer(text) if match.group(0).strip()]
+
+
+def terms(text: str) -> List[str]:
+    """Tokenize into lower-cased Latin words and overlapping CJK bigrams."""
+    result: List[str] = [word.lower() for word in _LATIN_WORD_PATTERN.findall(text)]
+    for run in _CJK_RUN_PATTERN.findall(text):
+        if len(run) == 1:
+            result.append(run)
+        else:
+            result.extend(run[index : index + 2] for index in range(len(run) - 1))
+    return result
+
+
+def trim_to_budget(
+    text: str,
+    budget: Optional[int],
+    *,
+    title: str = "",
+    lead_sentences: int = 2,
+) -> Tuple[str, int]:
+    """Shorten ``text`` to roughly ``budget`` tokens and return it with the tokens saved.
+
+    The leading sentences are kept first because abstracts usually open with
+    the problem statement; the remaining budget goes to the sentences that
+    share the most terms with ``title``. Kept sentences stay in their
+    original order, with ``…`` marking each gap.
+    """
+    original = estimate_tokens(text)
+    if not budget or budget <= 0 or original <= budget:
+        return text, 0
+
+    sentences = split_sentences(text)
+    costs = [estimate_tokens(sentence) for sentence in sentences]
+    title_terms: Set[str] = set(terms(title))
+
+    def relevance(index: int) -> float:
+        sentence_terms = terms(sentences[index])
+        if not sentence_terms or not title_terms:
+            return 0.0
+        overlap = sum(1 for term in sentence_terms if term in title_terms)
+        return overlap / math.sqrt(len(sentence_terms))
+
+    lead = list(range(min(lead_sentences, len(sentences))))
+    rest = sorted(range(len(lead), len(sentences)), key=lambda index: (-relevance(index), index))
+
+    kept: Set[int] = set()
+    used = 0
+    for index in lead + rest:
+        if used + costs[index] <= budget:
+            kept.add(index)
+            used += costs[index]
+
+    if not kept:
+        trimmed = _cut_to_budget(sentences[0] if sentences else text, budget)
+    else:
+        pieces: List[str] = []
+        previous = -1
+        for index in sorted(kept):
+            if index != previous + 1:
+                pieces.append("…")
+            pieces.append(sentences[index].strip() if index != previous + 1 else sentences[index])
+            previous = index
+        if previous != len(sentences) - 1:
+            pieces.append("…")
+        trimmed = "".join(pieces).strip()
+
+    return trimmed, max(0, original - estimate_tokens(trimmed))
+
+
+def budgeted_abstract(paper: PaperEntry, budget: Optional[int], stage: str) -> str:
+    """Trim ``paper.abstract`` to ``budget`` tokens and record the savings for ``stage``."""
+    abstract, saved = trim_to_budget(paper.abstract, budget, title=paper.title)
+    if saved:
+        metrics.increment(f"trim.{stage}.papers_trimmed")
+        metrics.increment(f"trim.{stage}.tokens_saved", saved)
+    return abstract
+
+
+def _cut_to_budget(text: str, budget: int) -> str:
+    """Hard-cut a single over-long sentence, shrinking until the estimate fits."""
+    limit = len(text)
+    while limit > 0 and estimate_tokens(text[:limit]) > budget:
+        limit = int(limit * budget / max(estimate_tokens(text[:limit]), 1)) if limit > 1 else 0
+    return text[:limit].rstrip() + "…"
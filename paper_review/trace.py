@@ -0,0 +1,63 @@
+"""Verbosity-gated echo of prompts and model answers, with an optional trace file.
+
+Per-paper prompts and responses used to go straight to stdout, which on large
+corpora costs real time and produces enormous logs. They now go through the
+module-level :data:`trace`: echoed to the console only at verbosity 2 (``-v``)
+and appended as JSON lines to ``--trace-file`` through a large write buffer.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import IO, Optional
+
+QUIET = 0
+NORMAL = 1
+VERBOSE = 2
+
+_TRACE_BUFFER_BYTES = 1 << 20
+
+
+class Tracer:
+    """Thread-safe sink for per-request details that are not needed on the console."""
+
+    def __init__(self) -> None:
+        self.verbosity = NORMAL
+        self._handle: Optional[IO[str]] = None
+        self._lock = threading.Lock()
+
+    def configure(self, *, verbosity: int = NORMAL, path: Optional[Path] = None) -> None:
+        self.close()
+        self.verbosity = verbosity
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = path.open("a", encoding="utf-8", buffering=_TRACE_BUFFER_BYTES)
+
+    @property
+    def enabled(self) -> bool:
+        return self.verbosity >= VERBOSE or self._handle is not None
+
+    def emit(self, stage: str, kind: str, text: str, *, label: str = "") -> None:
+        """Record one prompt/response/result; ``label`` heads the console echo."""
+        if self._handle is not None:
+            line = json.dumps(
+                {"time": round(time.time(), 3), "stage": stage, "kind": kind, "text": text},
+                ensure_ascii=False,
+            )
+            with self._lock:
+                if self._handle is not None:
+                    self._handle.write(line + "\n")
+        if self.verbosity >= VERBOSE:
+            print(f"{label or f'[{stage}] {kind}'}\n{text}\n")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+
+trace = Tracer()